@@ -4,15 +4,44 @@ Genera un reporte básico para entender los datos antes de limpiarlos
 """
 
 import pandas as pd
+import os
 import sys
+from datetime import date
 
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
 
-def cargar_datos(filepath):
-    """Carga el CSV y muestra info básica"""
+from scraper.dataset_parquet import existe_dataset, leer_dataset
+
+
+def leer_filtros(args):
+    """
+    Filtros de partición desde la línea de comandos
+
+    --zona=NOMBRE (se puede repetir) y --desde=AAAA-MM-DD: con el dataset en
+    Parquet solo se leen esas particiones
+    """
+    zonas = [a.partition("=")[2] for a in args if a.startswith("--zona=")]
+    filtros = [("zona", "in", zonas)] if zonas else []
+    for arg in args:
+        if arg.startswith("--desde="):
+            filtros.append(("fecha", ">=", date.fromisoformat(arg.partition("=")[2])))
+    return filtros
+
+
+def cargar_datos(filepath, ruta_parquet=None, filtros=None):
+    """Carga el dataset (Parquet si está, si no el CSV) y muestra info básica"""
     print("=" * 60)
     print("CARGANDO DATOS")
     print("=" * 60)
 
+    if ruta_parquet and existe_dataset(ruta_parquet):
+        df = leer_dataset(ruta_parquet, filtros=filtros)
+        print(f"✓ Dataset cargado: {ruta_parquet} (Parquet)")
+        print(f"  Filas: {len(df)}")
+        print(f"  Columnas: {len(df.columns)}")
+        return df
+
     try:
         df = pd.read_csv(filepath)
         print(f"✓ Dataset cargado: {filepath}")
@@ -136,11 +165,12 @@ def validar_urls(df):
 
 
 def main():
-    # Ruta al CSV
+    # Rutas al dataset crudo
     filepath = "../data/data.csv"
+    ruta_parquet = "../data/parquet/crudo"
 
     # Cargar datos
-    df = cargar_datos(filepath)
+    df = cargar_datos(filepath, ruta_parquet, leer_filtros(sys.argv[1:]))
 
     # Análisis
     info_general(df)
@@ -4,17 +4,45 @@ Aplica filtros razonables y guarda dataset limpio
 """
 
 import pandas as pd
+import os
 import sys
 
-
-def cargar_datos(filepath):
-    """Carga el CSV raw"""
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scraper.dataset_parquet import (
+    HAY_PYARROW,
+    escribir_dataset,
+    existe_dataset,
+    leer_dataset,
+)
+
+# Lo único que usan la limpieza y la base; el resto no se lee
+COLUMNAS_LIMPIEZA = [
+    "fecha_scraping",
+    "zona",
+    "ciudad",
+    "precio",
+    "ambientes",
+    "bathrooms",
+    "area",
+    "url",
+]
+
+
+def cargar_datos(filepath, ruta_parquet=None):
+    """Carga el dataset raw (Parquet si está, si no el CSV)"""
     print("=" * 60)
     print("CARGANDO DATOS RAW")
     print("=" * 60)
 
+    if ruta_parquet and existe_dataset(ruta_parquet):
+        df = leer_dataset(ruta_parquet, columnas=COLUMNAS_LIMPIEZA)
+        print(f"✓ Dataset cargado desde Parquet: {len(df)} registros")
+        return df
+
     try:
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(filepath, usecols=COLUMNAS_LIMPIEZA)
         print(f"✓ Dataset cargado: {len(df)} registros")
         return df
     except FileNotFoundError:
@@ -22,6 +50,31 @@ def cargar_datos(filepath):
         sys.exit(1)
 
 
+def eliminar_duplicados(df):
+    """
+    Deja una fila por URL, la del scraping más reciente
+
+    El Parquet crudo suma archivos en cada corrida, también de avisos que ya
+    se habían visto, así que la misma URL aparece una vez por corrida.
+    """
+    print("\n" + "=" * 60)
+    print("ELIMINANDO DUPLICADOS")
+    print("=" * 60)
+
+    inicial = len(df)
+
+    # Orden estable: a igual fecha gana la última fila leída
+    df = df.sort_values("fecha_scraping", kind="stable")
+    repetida = df["url"].notna() & df.duplicated("url", keep="last")
+    df_limpio = df[~repetida].sort_index()
+
+    eliminados = inicial - len(df_limpio)
+    print(f"✓ Eliminados {eliminados} registros con URL repetida")
+    print(f"  Restantes: {len(df_limpio)}")
+
+    return df_limpio
+
+
 def convertir_precio(df):
     """Convierte precio correctamente (quita puntos argentinos)"""
     print("\nConvirtiendo precios...")
@@ -146,14 +199,18 @@ def mostrar_estadisticas_finales(df):
     print(f"  Máximo: {df['area'].max()} m²")
 
 
-def guardar_limpio(df, filepath):
-    """Guarda el dataset limpio"""
+def guardar_limpio(df, filepath, ruta_parquet=None):
+    """Guarda el dataset limpio (en Parquet si está pyarrow)"""
     print("\n" + "=" * 60)
     print("GUARDANDO DATASET LIMPIO")
     print("=" * 60)
 
-    df.to_csv(filepath, index=False)
-    print(f"✓ Dataset limpio guardado en: {filepath}")
+    if ruta_parquet and HAY_PYARROW:
+        escribir_dataset(df, ruta_parquet).imprimir_resumen()
+        print(f"✓ Dataset limpio guardado en: {ruta_parquet}")
+    else:
+        df.to_csv(filepath, index=False)
+        print(f"✓ Dataset limpio guardado en: {filepath}")
     print(f"  {len(df)} registros")
 
 
@@ -161,34 +218,39 @@ def main():
     # Rutas
     filepath_raw = "./data/data.csv"
     filepath_limpio = "./data/propiedades_limpias.csv"
+    parquet_raw = "./data/parquet/crudo"
+    parquet_limpio = "./data/parquet/limpio"
 
     print("\n" + "=" * 60)
     print("PROCESO DE LIMPIEZA DE DATOS")
     print("=" * 60 + "\n")
 
     # 1. Cargar
-    df = cargar_datos(filepath_raw)
+    df = cargar_datos(filepath_raw, parquet_raw)
+
+    # 2. Una fila por URL (el Parquet crudo acumula todas las corridas)
+    df = eliminar_duplicados(df)
 
-    # 2. Convertir precio
+    # 3. Convertir precio
     df = convertir_precio(df)
 
-    # 3. Eliminar nulos
+    # 4. Eliminar nulos
     df = eliminar_nulos(df)
 
-    # 4. Filtros de rangos
+    # 5. Filtros de rangos
     df = aplicar_filtros_rangos(df)
 
-    # 5. Filtros de lógica
+    # 6. Filtros de lógica
     df = aplicar_filtros_logica(df)
 
-    # 6. Convertir tipos
+    # 7. Convertir tipos
     df = convertir_tipos(df)
 
-    # 7. Estadísticas finales
+    # 8. Estadísticas finales
     mostrar_estadisticas_finales(df)
 
-    # 8. Guardar
-    guardar_limpio(df, filepath_limpio)
+    # 9. Guardar
+    guardar_limpio(df, filepath_limpio, parquet_limpio)
 
     print("\n" + "=" * 60)
     print("LIMPIEZA COMPLETADA ✓")
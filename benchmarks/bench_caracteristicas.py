@@ -0,0 +1,131 @@
+"""
+Benchmark de procesar_caracteristicas: original vs por tarjeta vs por lote
+
+Compara, sobre listas de atributos sintéticas (paginas_sinteticas.py):
+
+    original: la versión anterior (re.findall + `in` por cada texto)
+    tarjeta:  procesar_caracteristicas actual (clasificación cacheada)
+    lote:     procesar_caracteristicas_lote (factorize + numpy)
+
+a escala de una página (48 tarjetas) y del archivo entero, e informa en
+cuántas tarjetas cambia el resultado respecto del original (solo deberían
+ser superficies con separador de miles o decimales y tarjetas con m²
+totales y cubiertos a la vez).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_caracteristicas.py [tarjetas_archivo]
+"""
+
+import os
+import re
+import sys
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(benchmarks_dir), "scraper"))
+
+from paginas_sinteticas import generar_listas_caracteristicas
+from processing import (
+    columna_a_lista,
+    procesar_caracteristicas,
+    procesar_caracteristicas_lote,
+)
+
+TARJETAS_POR_PAGINA = 48
+REPETICIONES = 5
+
+
+def procesar_caracteristicas_original(caracteristicas_raw):
+    """La implementación anterior, como referencia"""
+    resultado = {"amb": None, "banos": None, "m2": None}
+    if not caracteristicas_raw:
+        return resultado
+    for item in caracteristicas_raw:
+        numeros = re.findall(r"\d+", item)
+        if not numeros:
+            continue
+        numero = int(numeros[0])
+        texto_lower = item.lower()
+        if "dorm" in texto_lower or "amb" in texto_lower:
+            resultado["amb"] = numero
+        elif "baño" in texto_lower:
+            resultado["banos"] = numero
+        elif "m²" in texto_lower or "m2" in texto_lower:
+            resultado["m2"] = numero
+    return resultado
+
+
+def mejor_tiempo(funcion, lotes):
+    mejor = None
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        for lote in lotes:
+            funcion(lote)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+def por_tarjeta(procesar):
+    return lambda listas: [procesar(lista) for lista in listas]
+
+
+def medir(nombre, lotes, tarjetas):
+    tiempos = {
+        "original": mejor_tiempo(por_tarjeta(procesar_caracteristicas_original), lotes),
+        "tarjeta": mejor_tiempo(por_tarjeta(procesar_caracteristicas), lotes),
+        "lote": mejor_tiempo(procesar_caracteristicas_lote, lotes),
+    }
+    print(f"\n{nombre} ({len(lotes):,} llamadas, {tarjetas:,} tarjetas):")
+    for version, segundos in tiempos.items():
+        print(
+            f"   {version:<9} {tarjetas / segundos:12,.0f} tarjetas/s | "
+            f"speedup {tiempos['original'] / segundos:5.1f}x"
+        )
+
+
+def diferencias(listas):
+    """Tarjetas donde el resultado nuevo difiere del original"""
+    lote = procesar_caracteristicas_lote(listas)
+    columnas = {campo: columna_a_lista(valores) for campo, valores in lote.items()}
+    distintas = []
+    for i, lista in enumerate(listas):
+        original = procesar_caracteristicas_original(lista)
+        nuevo = procesar_caracteristicas(lista)
+        en_lote = {campo: valores[i] for campo, valores in columnas.items()}
+        if nuevo != en_lote:
+            raise AssertionError(f"Lote y tarjeta difieren en {lista}: {en_lote}")
+        if nuevo != original:
+            distintas.append((lista, original, nuevo))
+    return distintas
+
+
+def main():
+    tarjetas_archivo = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    listas = generar_listas_caracteristicas(tarjetas_archivo)
+
+    paginas = [
+        listas[i : i + TARJETAS_POR_PAGINA]
+        for i in range(0, len(listas), TARJETAS_POR_PAGINA)
+    ]
+    medir("Por página", paginas, len(listas))
+    medir("Archivo entero", [listas], len(listas))
+
+    distintas = diferencias(listas)
+    print(
+        f"\n🔍 {len(distintas):,} de {len(listas):,} tarjetas cambian respecto "
+        f"del original (lote y tarjeta coinciden siempre)"
+    )
+    vistas = set()
+    for lista, original, nuevo in distintas:
+        clave = tuple(lista)
+        if clave in vistas:
+            continue
+        vistas.add(clave)
+        print(f"   {lista}: m2 {original['m2']} → {nuevo['m2']}")
+        if len(vistas) >= 5:
+            break
+
+
+if __name__ == "__main__":
+    main()
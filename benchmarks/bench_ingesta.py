@@ -0,0 +1,144 @@
+"""
+Benchmark de ingesta a SQLite: guardar_en_db vs EscritorDB
+
+Inserta las mismas propiedades sintéticas (páginas de 48) en bases temporales
+y compara filas/s del guardado página por página contra el escritor por lotes
+con distintos tamaños de lote. Cada variante corre REPETICIONES veces, cada
+una en una base nueva, y se informa la más rápida: en una máquina compartida
+una sola corrida varía ±30%.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_ingesta.py [filas]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+scraper_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraper"
+)
+sys.path.insert(0, scraper_dir)
+
+from escritor_db import EscritorDB
+from scraper_ml_incremental import crear_tabla_si_no_existe, guardar_en_db
+from urls_conocidas import cargar_urls_conocidas
+
+PROPIEDADES_POR_PAGINA = 48
+TAMANOS_LOTE = [48, 500, 5000]
+REPETICIONES = 5
+
+
+def generar_paginas(filas, semilla=42):
+    """Genera páginas de propiedades con el formato de extraer_data"""
+    rng = random.Random(semilla)
+    paginas = []
+    for inicio in range(0, filas, PROPIEDADES_POR_PAGINA):
+        pagina = []
+        for i in range(inicio, min(inicio + PROPIEDADES_POR_PAGINA, filas)):
+            pagina.append(
+                {
+                    "fecha_scraping": "2026-01-01 00:00:00",
+                    "zona": "GBA Norte",
+                    "ciudad": "pilar",
+                    "precio": f"{rng.randint(50, 900)}.000",
+                    "ambientes": rng.randint(1, 8),
+                    "bathrooms": rng.randint(1, 4),
+                    "area": rng.randint(40, 600),
+                    "url": f"https://casa.mercadolibre.com.ar/MLA-{i}",
+                }
+            )
+        paginas.append(pagina)
+    return paginas
+
+
+def base_temporal(directorio, nombre):
+    db_path = os.path.join(directorio, nombre)
+    crear_tabla_si_no_existe(db_path)
+    return db_path
+
+
+def medir_guardar_en_db(paginas, db_path):
+    inicio = time.perf_counter()
+    for pagina in paginas:
+        guardar_en_db(pagina, db_path)
+    return time.perf_counter() - inicio
+
+
+def medir_escritor(paginas, db_path, tamano_lote):
+    inicio = time.perf_counter()
+    urls = cargar_urls_conocidas(db_path)
+    with EscritorDB(db_path, tamano_lote, urls) as escritor:
+        for pagina in paginas:
+            escritor.agregar(pagina)
+    return time.perf_counter() - inicio
+
+
+def mejor_de(medir, paginas, directorio, nombre, reingesta=False):
+    """Menor duración de REPETICIONES corridas, cada una en una base nueva"""
+    duraciones = []
+    for i in range(REPETICIONES):
+        db_path = base_temporal(directorio, f"{nombre}_{i}.db")
+        if reingesta:
+            medir(paginas, db_path)  # La re-ingesta mide solo la segunda pasada
+        duraciones.append(medir(paginas, db_path))
+        os.remove(db_path)
+    return min(duraciones)
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    paginas = generar_paginas(filas)
+
+    print("=" * 60)
+    print(f"BENCHMARK DE INGESTA - {filas:,} filas en páginas de 48")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        resultados = [
+            (
+                "guardar_en_db (por página)",
+                mejor_de(medir_guardar_en_db, paginas, directorio, "guardar"),
+            )
+        ]
+
+        for tamano_lote in TAMANOS_LOTE:
+
+            def medir(paginas, db_path, tamano_lote=tamano_lote):
+                return medir_escritor(paginas, db_path, tamano_lote)
+
+            duracion = mejor_de(medir, paginas, directorio, f"escritor_{tamano_lote}")
+            resultados.append((f"EscritorDB (lote {tamano_lote})", duracion))
+
+        # Re-ingesta de las mismas filas: todo duplicado
+        resultados.append(
+            (
+                "guardar_en_db (re-ingesta)",
+                mejor_de(
+                    medir_guardar_en_db, paginas, directorio, "guardar", reingesta=True
+                ),
+            )
+        )
+
+        def medir_500(paginas, db_path):
+            return medir_escritor(paginas, db_path, 500)
+
+        resultados.append(
+            (
+                "EscritorDB (re-ingesta)",
+                mejor_de(medir_500, paginas, directorio, "escritor", reingesta=True),
+            )
+        )
+
+    base = resultados[0][1]
+    print(f"\n{'Variante':32} {'Segundos':>9} {'Filas/s':>10} {'Speedup':>8}")
+    for nombre, duracion in resultados:
+        print(
+            f"{nombre:32} {duracion:>9.2f} {filas / duracion:>10,.0f} {base / duracion:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
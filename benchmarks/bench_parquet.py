@@ -0,0 +1,158 @@
+"""
+Benchmark de almacenamiento: CSV vs dataset Parquet particionado
+
+Escribe las mismas propiedades sintéticas (varias zonas, 30 días de
+scraping) como CSV y como dataset Parquet (dataset_parquet.py) y compara
+tamaño en disco y tiempo de carga: completa, solo dos columnas y solo una
+zona en la última semana.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_parquet.py [filas]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+scraper_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraper"
+)
+sys.path.insert(0, scraper_dir)
+
+from config import CIUDADES_POR_ZONA
+from dataset_parquet import HAY_PYARROW, RespaldoParquet, leer_dataset
+from respaldo_csv import RespaldoCSV
+
+DIAS = 30
+PROPIEDADES_POR_PAGINA = 48
+
+
+def generar_paginas(filas, semilla=42):
+    """Páginas de propiedades con el formato de extraer_data"""
+    rng = random.Random(semilla)
+    ciudades = [(z, c) for z, cs in CIUDADES_POR_ZONA.items() for c in cs]
+    inicio = datetime(2026, 1, 1, 8)
+    paginas = []
+    for primera in range(0, filas, PROPIEDADES_POR_PAGINA):
+        zona, ciudad = rng.choice(ciudades)
+        fecha = inicio + timedelta(days=primera * DIAS // filas)
+        pagina = []
+        for i in range(primera, min(primera + PROPIEDADES_POR_PAGINA, filas)):
+            pagina.append(
+                {
+                    "fecha_scraping": fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                    "zona": zona,
+                    "ciudad": ciudad,
+                    "precio": f"{rng.randint(30, 900)}.000",
+                    "ambientes": rng.randint(1, 8),
+                    "bathrooms": rng.randint(1, 4),
+                    "area": rng.randint(40, 600),
+                    "url": f"https://casa.mercadolibre.com.ar/MLA-{1_000_000_000 + i}",
+                    "moneda": "USD",
+                    "titulo": f"Casa en venta en {ciudad} {i}",
+                    "ubicacion": f"Barrio {rng.randint(1, 40)}, {ciudad}",
+                }
+            )
+        paginas.append(pagina)
+    return paginas
+
+
+def tamano_mb(ruta):
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta) / 1024 / 1024
+    return (
+        sum(
+            os.path.getsize(os.path.join(d, a))
+            for d, _, archivos in os.walk(ruta)
+            for a in archivos
+        )
+        / 1024
+        / 1024
+    )
+
+
+def leer_csv_filtrado(ruta_csv, zona, desde):
+    # Con CSV hay que parsear todo y filtrar después
+    df = pd.read_csv(ruta_csv)
+    return df[(df["zona"] == zona) & (df["fecha_scraping"] >= desde.isoformat())]
+
+
+def medir(funcion, repeticiones=3):
+    """Mejor tiempo de varias corridas y filas devueltas"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        df = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, len(df)
+
+
+def main():
+    if not HAY_PYARROW:
+        print("Este benchmark necesita pyarrow (pip install pyarrow)")
+        return
+
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    paginas = generar_paginas(filas)
+    zona = next(iter(CIUDADES_POR_ZONA))
+    desde = date(2026, 1, 1) + timedelta(days=DIAS - 7)
+
+    print("=" * 60)
+    print(f"BENCHMARK CSV vs PARQUET - {filas:,} filas, {DIAS} días")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_csv = os.path.join(directorio, "data.csv")
+        ruta_parquet = os.path.join(directorio, "parquet")
+        with RespaldoCSV(ruta_csv, comprimir=False, rotar_mb=None) as csv_sink:
+            with RespaldoParquet(ruta_parquet) as parquet_sink:
+                for pagina in paginas:
+                    csv_sink.escribir(pagina)
+                    parquet_sink.escribir(pagina)
+
+        print(f"\nCSV:     {tamano_mb(ruta_csv):8.1f} MB")
+        print(
+            f"Parquet: {tamano_mb(ruta_parquet):8.1f} MB "
+            f"({parquet_sink.particiones()} particiones)"
+        )
+
+        casos = [
+            ("CSV completo", lambda: pd.read_csv(ruta_csv)),
+            ("Parquet completo", lambda: leer_dataset(ruta_parquet)),
+            (
+                "CSV precio + area",
+                lambda: pd.read_csv(ruta_csv, usecols=["precio", "area"]),
+            ),
+            (
+                "Parquet precio + area",
+                lambda: leer_dataset(ruta_parquet, columnas=["precio", "area"]),
+            ),
+            (
+                "CSV 1 zona, última semana",
+                lambda: leer_csv_filtrado(ruta_csv, zona, desde),
+            ),
+            (
+                "Parquet 1 zona, última semana",
+                lambda: leer_dataset(
+                    ruta_parquet,
+                    filtros=[("zona", "==", zona), ("fecha", ">=", desde)],
+                ),
+            ),
+        ]
+        resultados = [(nombre, *medir(funcion)) for nombre, funcion in casos]
+
+    print(f"\n{'Lectura':32} {'Segundos':>9} {'Filas':>10} {'Speedup':>8}")
+    for i, (nombre, duracion, leidas) in enumerate(resultados):
+        # Cada lectura Parquet se compara con la CSV equivalente
+        base = resultados[i - i % 2][1]
+        print(f"{nombre:32} {duracion:>9.3f} {leidas:>10,} {base / duracion:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Benchmark offline del parseo: extraer_data y procesar_caracteristicas
+
+Genera páginas sintéticas (paginas_sinteticas.py) y mide, para cada
+backend de parseo.py, páginas/s, tarjetas/s y el pico de memoria. Cada
+backend corre en su propio proceso, así el pico (ru_maxrss) no arrastra
+lo que dejó el anterior. También mide procesar_caracteristicas suelto.
+
+Cada corrida se agrega como una línea JSON al historial y se compara
+contra la última corrida con los mismos parámetros: si un backend bajó
+más que --umbral (10% por defecto) en páginas/s se marca como regresión
+y el script sale con código 1. Se toma la mejor de --repeticiones
+pasadas para que el ruido de la máquina pese menos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_parseo.py [--paginas 50] [--tarjetas 48]
+        [--relleno-kb 200] [--sin-json] [--historial RUTA] [--umbral 0.1]
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+scraper_dir = os.path.join(os.path.dirname(benchmarks_dir), "scraper")
+sys.path.insert(0, scraper_dir)
+
+import parseo
+from paginas_sinteticas import generar_listas_caracteristicas, generar_paginas
+from processing import procesar_caracteristicas
+from scraper_ml_incremental import extraer_data
+
+HISTORIAL_POR_DEFECTO = os.path.join(benchmarks_dir, "historial_parseo.jsonl")
+UMBRAL_REGRESION = 0.10  # Caída de páginas/s a partir de la cual se avisa
+
+
+def _medir_backend(backend, paginas, repeticiones, resultados):
+    # Corre en un proceso aparte: el pico de RSS es solo de este backend
+    parseo.BACKEND_POR_DEFECTO = backend
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    mejor = None
+    tarjetas = 0
+    # Las tarjetas malformadas hacen que el backend DOM imprima errores
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            tarjetas = 0
+            for html in paginas:
+                tarjetas += len(extraer_data(html, "Zona", "ciudad", "2026-01-01"))
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+
+    rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resultados.put(
+        {
+            "paginas_s": round(len(paginas) / mejor, 2),
+            "tarjetas_s": round(tarjetas / mejor, 1),
+            "ms_pagina": round(1000 * mejor / len(paginas), 3),
+            "tarjetas": tarjetas,
+            # ru_maxrss está en KB en Linux
+            "pico_mb": round((rss_final - rss_inicial) / 1024, 1),
+        }
+    )
+
+
+def medir_backend(backend, paginas, repeticiones):
+    contexto = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    resultados = contexto.Queue()
+    proceso = contexto.Process(
+        target=_medir_backend, args=(backend, paginas, repeticiones, resultados)
+    )
+    proceso.start()
+    resultado = resultados.get()
+    proceso.join()
+    return resultado
+
+
+def medir_caracteristicas(cantidad, repeticiones):
+    listas = generar_listas_caracteristicas(cantidad)
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for lista in listas:
+            procesar_caracteristicas(lista)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return {
+        "listas_s": round(cantidad / mejor, 1),
+        "us_lista": round(1e6 * mejor / cantidad, 3),
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=benchmarks_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ultima_corrida(historial, parametros):
+    """Última entrada del historial con los mismos parámetros, o None"""
+    if not os.path.exists(historial):
+        return None
+    anterior = None
+    with open(historial, "r", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                entrada = json.loads(linea)
+                if entrada.get("parametros") == parametros:
+                    anterior = entrada
+    return anterior
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paginas", type=int, default=50)
+    parser.add_argument("--tarjetas", type=int, default=48)
+    parser.add_argument("--relleno-kb", type=int, default=200)
+    parser.add_argument("--sin-json", action="store_true")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--listas", type=int, default=100_000)
+    parser.add_argument("--historial", default=HISTORIAL_POR_DEFECTO)
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION)
+    args = parser.parse_args()
+
+    parametros = {
+        "paginas": args.paginas,
+        "tarjetas": args.tarjetas,
+        "relleno_kb": args.relleno_kb,
+        "con_json": not args.sin_json,
+        "listas": args.listas,
+    }
+    paginas = generar_paginas(
+        args.paginas, args.tarjetas, not args.sin_json, args.relleno_kb
+    )
+    kb_pagina = sum(len(p) for p in paginas) / len(paginas) / 1024
+    print(
+        f"📄 {args.paginas} páginas sintéticas de {args.tarjetas} tarjetas "
+        f"(~{kb_pagina:.0f} KB c/u, {'con' if not args.sin_json else 'sin'} JSON)"
+    )
+
+    backends = {}
+    for backend in parseo.BACKENDS:
+        r = medir_backend(backend, paginas, args.repeticiones)
+        backends[backend] = r
+        print(
+            f"   {backend:<12} {r['paginas_s']:8.1f} páginas/s | "
+            f"{r['tarjetas_s']:10.0f} tarjetas/s | {r['ms_pagina']:7.2f} ms/página | "
+            f"pico +{r['pico_mb']:.1f} MB"
+        )
+
+    caracteristicas = medir_caracteristicas(args.listas, args.repeticiones)
+    print(
+        f"   procesar_caracteristicas: {caracteristicas['listas_s']:,.0f} listas/s "
+        f"({caracteristicas['us_lista']:.2f} µs/lista)"
+    )
+
+    anterior = ultima_corrida(args.historial, parametros)
+    regresiones = []
+    if anterior:
+        print(f"\nContra la corrida del {anterior['fecha']} ({anterior['commit']}):")
+        for backend, r in backends.items():
+            previo = anterior["backends"].get(backend)
+            if not previo:
+                continue
+            cambio = r["paginas_s"] / previo["paginas_s"] - 1
+            marca = ""
+            if cambio < -args.umbral:
+                marca = " ⚠️  regresión"
+                regresiones.append(backend)
+            print(f"   {backend:<12} {cambio:+.1%} páginas/s{marca}")
+
+    entrada = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "parametros": parametros,
+        "backends": backends,
+        "procesar_caracteristicas": caracteristicas,
+    }
+    with open(args.historial, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+    print(f"\n📝 Resultados agregados a {args.historial}")
+
+    if regresiones:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Generador de páginas de listado sintéticas con tarjetas poly-card
+
+Arma páginas con la misma estructura que las de MercadoLibre (contador de
+resultados, estado __PRELOADED_STATE__ y tarjetas div.poly-card__content)
+más relleno de scripts y estilos, para medir los parsers sin red. Una
+parte de las tarjetas trae las variantes que aparecen en la práctica:
+sin precio, "m² totales" (solos o junto a los cubiertos), números con
+separador de miles o decimales, listas de atributos vacías o sin números
+y atributos en otro orden.
+"""
+
+import json
+import random
+
+VARIANTES = {
+    "normal": 0.70,
+    "sin_precio": 0.05,
+    "m2_totales": 0.08,
+    "m2_ambos": 0.02,
+    "ambientes": 0.05,
+    "lista_vacia": 0.03,
+    "sin_lista": 0.02,
+    "sin_numeros": 0.03,
+    "desordenada": 0.02,
+}
+
+
+def generar_caracteristicas(rng, variante="normal"):
+    """
+    Lista de atributos de una tarjeta, como el texto de cada <li>
+
+    Returns:
+        Lista de strings, o None si la tarjeta no trae lista
+    """
+    dormitorios = rng.randint(1, 6)
+    banos = rng.randint(1, 4)
+    m2 = rng.randint(40, 900)
+
+    if variante == "sin_lista":
+        return None
+    if variante == "lista_vacia":
+        return []
+    if variante == "sin_numeros":
+        return ["Dormitorios", "Baños", "Superficie a consultar"]
+    if variante == "m2_totales":
+        m2 = rng.randint(1000, 5000)
+        return [
+            f"{dormitorios} dormitorios",
+            f"{banos} baños",
+            f"{m2:,} m² totales".replace(",", "."),
+        ]
+    if variante == "m2_ambos":
+        return [
+            f"{dormitorios} dormitorios",
+            f"{banos} baños",
+            f"{m2 * 3} m² totales",
+            f"{m2},5 m² cubiertos",
+        ]
+    if variante == "ambientes":
+        return [f"{dormitorios + 1} ambientes", f"{banos} baños", f"{m2} m2"]
+    if variante == "desordenada":
+        return [f"{m2} m² cubiertos", f"{banos} baño", f"{dormitorios} dorm."]
+    return [f"{dormitorios} dormitorios", f"{banos} baños", f"{m2} m² cubiertos"]
+
+
+def _variante(rng):
+    return rng.choices(list(VARIANTES), weights=list(VARIANTES.values()))[0]
+
+
+def generar_publicacion(rng, indice):
+    variante = _variante(rng)
+    precio = None if variante == "sin_precio" else rng.randint(30, 900) * 1000
+    return {
+        "id": f"MLA{1_000_000_000 + indice}",
+        "titulo": f"Casa en venta {indice}",
+        "precio": precio,
+        "caracteristicas": generar_caracteristicas(rng, variante),
+        "ubicacion": f"Barrio {rng.randint(1, 40)}, Ciudad {rng.randint(1, 9)}",
+        "url": f"casa.mercadolibre.com.ar/MLA-{1_000_000_000 + indice}-casa-_JM",
+    }
+
+
+def _tarjeta_html(pub):
+    precio = ""
+    if pub["precio"] is not None:
+        fraccion = f"{pub['precio']:,}".replace(",", ".")
+        precio = (
+            '<div class="poly-price__current"><span class="andes-money-amount '
+            'andes-money-amount--cents-superscript" role="img">'
+            '<span class="andes-money-amount__currency-symbol">US$</span>'
+            f'<span class="andes-money-amount__fraction">{fraccion}</span>'
+            "</span></div>"
+        )
+    atributos = ""
+    if pub["caracteristicas"] is not None:
+        items = "".join(
+            f'<li class="poly-attributes_list__item poly-attributes_list__bar">{t}</li>'
+            for t in pub["caracteristicas"]
+        )
+        atributos = f'<ul class="poly-attributes_list">{items}</ul>'
+    return (
+        '<li class="ui-search-layout__item"><div class="poly-card poly-card--grid">'
+        '<div class="poly-card__portada"><img class="poly-component__picture" '
+        f'src="https://http2.mlstatic.com/D_NQ_NP_{pub["id"]}-O.webp" '
+        f'alt="{pub["titulo"]}"></div>'
+        '<div class="poly-card__content">'
+        '<span class="poly-component__headline">Casa</span>'
+        f'<h3 class="poly-component__title-wrapper"><a href="https://{pub["url"]}" '
+        f'class="poly-component__title">{pub["titulo"]}</a></h3>'
+        f"{precio}{atributos}"
+        f'<span class="poly-component__location">{pub["ubicacion"]}</span>'
+        "</div></div></li>"
+    )
+
+
+def _resultado_json(pub):
+    componentes = [{"type": "title", "title": {"text": pub["titulo"]}}]
+    if pub["precio"] is not None:
+        componentes.append(
+            {
+                "type": "price",
+                "price": {"current_price": {"value": pub["precio"], "currency": "USD"}},
+            }
+        )
+    if pub["caracteristicas"] is not None:
+        componentes.append(
+            {
+                "type": "attributes_list",
+                "attributes_list": {"texts": pub["caracteristicas"]},
+            }
+        )
+    componentes.append({"type": "location", "location": {"text": pub["ubicacion"]}})
+    return {
+        "id": pub["id"],
+        "polycard": {
+            "metadata": {"id": pub["id"], "url": pub["url"], "url_params": ""},
+            "components": componentes,
+        },
+    }
+
+
+def _relleno(rng, kb):
+    # Scripts y estilos como los que acompañan a una página real
+    bloques = []
+    tamano = 0
+    while tamano < kb * 1024:
+        bloque = (
+            f".ui-search-{rng.randint(0, 10**6)}{{margin:{rng.randint(0, 32)}px;"
+            f"color:#{rng.randint(0, 0xFFFFFF):06x}}}"
+        )
+        bloques.append(bloque)
+        tamano += len(bloque)
+    mitad = len(bloques) // 2
+    return (
+        f"<style>{''.join(bloques[:mitad])}</style>",
+        f"<script>window.__tracking={json.dumps(bloques[mitad:])};</script>",
+    )
+
+
+def generar_pagina(rng, tarjetas=48, con_json=True, relleno_kb=200, inicio=0):
+    """
+    Genera el HTML de una página de listado
+
+    Args:
+        rng: random.Random
+        tarjetas: Publicaciones en la página
+        con_json: Si incluir el estado __PRELOADED_STATE__
+        relleno_kb: KB aproximados de CSS/JS que no son tarjetas
+        inicio: Índice de la primera publicación (para URLs únicas)
+    """
+    publicaciones = [generar_publicacion(rng, inicio + i) for i in range(tarjetas)]
+    estilos, scripts = _relleno(rng, relleno_kb)
+
+    estado = ""
+    if con_json:
+        datos = {
+            "pageState": {
+                "initialState": {
+                    "results": [_resultado_json(p) for p in publicaciones],
+                }
+            }
+        }
+        estado = (
+            '<script id="__PRELOADED_STATE__" type="application/json">'
+            f"{json.dumps(datos, ensure_ascii=False)}</script>"
+        )
+
+    total = f"{rng.randint(tarjetas, 5000):,}".replace(",", ".")
+    return (
+        '<!DOCTYPE html><html lang="es-AR"><head><meta charset="utf-8">'
+        f"<title>Casas en venta</title>{estilos}</head><body>"
+        '<header class="nav-header"><a href="/">Mercado Libre</a></header>'
+        '<main><section class="ui-search-results">'
+        '<span class="ui-search-search-result__quantity-results">'
+        f"{total} resultados</span>"
+        '<ol class="ui-search-layout ui-search-layout--grid">'
+        f"{''.join(_tarjeta_html(p) for p in publicaciones)}"
+        f"</ol></section></main>{estado}{scripts}</body></html>"
+    )
+
+
+def generar_paginas(cantidad, tarjetas=48, con_json=True, relleno_kb=200, semilla=42):
+    """Lista de `cantidad` páginas reproducibles con la misma semilla"""
+    rng = random.Random(semilla)
+    return [
+        generar_pagina(rng, tarjetas, con_json, relleno_kb, inicio=i * tarjetas)
+        for i in range(cantidad)
+    ]
+
+
+def generar_listas_caracteristicas(cantidad, semilla=42):
+    """Listas de atributos sueltas, con la misma mezcla de variantes"""
+    rng = random.Random(semilla)
+    return [generar_caracteristicas(rng, _variante(rng)) for _ in range(cantidad)]
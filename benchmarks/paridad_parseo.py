@@ -0,0 +1,102 @@
+"""
+Paridad y tiempo de parseo entre los backends de parseo.py
+
+Recorre las páginas del archivo HTML (una por blob), extrae precio,
+características y URL de cada tarjeta con cada backend (json, lxml +
+SoupStrainer y html.parser) y verifica que den exactamente lo mismo que
+html.parser, el comportamiento original. Informa además los ms/página de
+cada backend y cuántas páginas resolvió el JSON embebido. Sale con código
+1 si alguna página difiere.
+
+Uso (desde la raíz del repo):
+    python benchmarks/paridad_parseo.py [directorio_archivo] [max_paginas]
+"""
+
+import os
+import sys
+import time
+
+scraper_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraper"
+)
+sys.path.insert(0, scraper_dir)
+
+from archivo_html import ArchivoHTML
+from parseo import BACKENDS, extraer_tarjetas, tarjetas_desde_json
+
+DIRECTORIO_POR_DEFECTO = os.path.join(
+    os.path.dirname(scraper_dir), "data", "archivo_html"
+)
+
+
+def extraer_registros(html, backend):
+    """Campos que usa extraer_data de cada tarjeta"""
+    return [
+        (t["precio"], t["caracteristicas"], t["url"])
+        for t in extraer_tarjetas(html, backend)
+    ]
+
+
+def blobs_unicos(archivo, max_paginas):
+    """Una entrada por contenido distinto (el archivo deduplica por sha256)"""
+    vistos = set()
+    for entrada in archivo.entradas():
+        if entrada["sha256"] in vistos:
+            continue
+        vistos.add(entrada["sha256"])
+        yield entrada
+        if len(vistos) >= max_paginas:
+            return
+
+
+def main():
+    directorio = sys.argv[1] if len(sys.argv) > 1 else DIRECTORIO_POR_DEFECTO
+    max_paginas = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    archivo = ArchivoHTML(directorio)
+    segundos = {backend: 0.0 for backend in BACKENDS}
+    paginas = 0
+    tarjetas = 0
+    con_json = 0
+    diferencias = []
+
+    for entrada in blobs_unicos(archivo, max_paginas):
+        html = archivo.leer(entrada["sha256"])
+        resultados = {}
+        for backend in BACKENDS:
+            inicio = time.perf_counter()
+            resultados[backend] = extraer_registros(html, backend)
+            segundos[backend] += time.perf_counter() - inicio
+
+        paginas += 1
+        tarjetas += len(resultados["html.parser"])
+        con_json += tarjetas_desde_json(html) is not None
+        for backend in BACKENDS:
+            if resultados[backend] != resultados["html.parser"]:
+                diferencias.append((backend, entrada))
+
+    if not paginas:
+        print(f"No hay páginas archivadas en {directorio}")
+        return
+
+    print(
+        f"📄 {paginas:,} páginas, {tarjetas:,} tarjetas "
+        f"({con_json:,} páginas con JSON embebido)"
+    )
+    for backend in BACKENDS:
+        print(f"   {backend:<12} {1000 * segundos[backend] / paginas:7.2f} ms/página")
+    for backend in BACKENDS:
+        if backend != "html.parser":
+            speedup = segundos["html.parser"] / segundos[backend]
+            print(f"   Speedup {backend}: {speedup:.1f}x")
+
+    if diferencias:
+        print(f"❌ {len(diferencias)} páginas con resultados distintos:")
+        for backend, entrada in diferencias[:10]:
+            print(f"   [{backend}] {entrada['url']} ({entrada['sha256'][:12]})")
+        sys.exit(1)
+    print("✅ Mismos registros con todos los backends")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 import sys
 import os
 
@@ -7,7 +8,16 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from data.db_utils import get_all_properties, get_unique_zones, get_unique_cities
+from data.db_utils import (
+    CachePropiedades,
+    get_box_stats,
+    get_histogram,
+    get_price_changes,
+    get_sample,
+    get_summary,
+    get_unique_zones,
+    get_unique_cities,
+)
 
 # Configuración de la página
 st.set_page_config(
@@ -15,11 +25,41 @@ st.set_page_config(
 )
 
 
-# Cargar datos con caching
-@st.cache_data
+# Cargar datos con caching: una sola copia para todas las sesiones, que se
+# pone al día con la base solo cuando cambia (ver CachePropiedades)
+@st.cache_resource
+def cache_propiedades():
+    return CachePropiedades()
+
+
 def load_data():
     """Carga los datos de la base de datos"""
-    return get_all_properties()
+    return cache_propiedades().obtener()
+
+
+@st.cache_data(max_entries=1)
+def load_price_changes(version):
+    """Carga las publicaciones que cambiaron de precio (por versión de la base)"""
+    return get_price_changes()
+
+
+@st.cache_data(max_entries=1)
+def load_charts(version):
+    """
+    Datos ya agregados para los gráficos (por versión de la base)
+
+    Se calculan en SQLite: a plotly le llegan bins, promedios y resúmenes,
+    no una fila por propiedad
+    """
+    return {
+        "histograma": get_histogram("precio", bins=40),
+        # Métricas, zonas y ciudades: de las tablas de resumen
+        "global": get_summary("global").iloc[0],
+        "por_zona": get_summary("zona"),
+        "por_ciudad": get_summary("ciudad"),
+        "muestra": get_sample(1000),  # Para el scatter
+        "box": get_box_stats("zona", "precio_por_m2"),
+    }
 
 
 # Funciones helper para filtros
@@ -32,6 +72,7 @@ def get_cities_by_zone(zona):
 
 # Cargar datos
 df = load_data()
+graficos = load_charts(cache_propiedades().version)
 
 # ===============================
 # HEADER - Título y Métricas
@@ -47,16 +88,16 @@ st.markdown("---")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Properties", f"{len(df):,}")
+    st.metric("Total Properties", f"{graficos['global']['cantidad']:,.0f}")
 
 with col2:
-    st.metric("Average Price", f"${df['precio'].mean():,.0f}")
+    st.metric("Average Price", f"${graficos['global']['promedio_precio']:,.0f}")
 
 with col3:
-    st.metric("Average Area", f"{df['area'].mean():.0f} m²")
+    st.metric("Average Area", f"{graficos['global']['promedio_area']:.0f} m²")
 
 with col4:
-    st.metric("Precio/m²", f"${df['precio_por_m2'].mean():,.0f}")
+    st.metric("Precio/m²", f"${graficos['global']['promedio_m2']:,.0f}")
 
 # Separador
 st.markdown("---")
@@ -75,14 +116,19 @@ with col1:
     with st.container(border=True):
         # Gráfico 1: Distribución de Precios (Histograma)
         st.markdown("**Price Distribution**")
-        fig1 = px.histogram(
-            df,
+        histograma = graficos["histograma"]
+        histograma = histograma.assign(
+            precio=(histograma["desde"] + histograma["hasta"]) / 2
+        )
+        fig1 = px.bar(
+            histograma,
             x="precio",
-            nbins=40,
-            labels={"precio": "Price (USD)"},
+            y="cantidad",
+            labels={"precio": "Price (USD)", "cantidad": "count"},
             color_discrete_sequence=["#2e8dd1"],
         )
         fig1.update_layout(
+            bargap=0,
             showlegend=False,
             height=300,
             margin=dict(l=20, r=20, t=20, b=20),
@@ -95,8 +141,11 @@ with col2:
     with st.container(border=True):
         # Gráfico 2: Precio Promedio por Zona (Barras)
         st.markdown("**Average Price by Zone**")
-        precio_por_zona = df.groupby("zona")["precio"].mean().reset_index()
-        precio_por_zona = precio_por_zona.sort_values("precio", ascending=False)
+        precio_por_zona = (
+            graficos["por_zona"]
+            .sort_values("promedio_precio", ascending=False)
+            .rename(columns={"promedio_precio": "precio"})
+        )
 
         fig2 = px.bar(
             precio_por_zona,
@@ -119,8 +168,7 @@ with col3:
     with st.container(border=True):
         # Gráfico 3: Distribución por Zona (Pie Chart)
         st.markdown("**Properties by Zone**")
-        propiedades_por_zona = df["zona"].value_counts().reset_index()
-        propiedades_por_zona.columns = ["zona", "cantidad"]
+        propiedades_por_zona = graficos["por_zona"][["zona", "cantidad"]]
 
         fig3 = px.pie(
             propiedades_por_zona,
@@ -143,7 +191,7 @@ with col4:
         # Gráfico 4: Precio vs Área (Scatter)
         st.markdown("**Price vs Area Relationship**")
         fig4 = px.scatter(
-            df.sample(1000),  # Muestra de 1000 para mejor performance
+            graficos["muestra"],  # Muestra de 1000 para mejor performance
             x="area",
             y="precio",
             color="zona",
@@ -162,14 +210,38 @@ with col5:
     with st.container(border=True):
         # Gráfico 5: Precio por m² por Zona (Box Plot)
         st.markdown("**Price per m² - Distribution by Zone**")
-        fig5 = px.box(
-            df,
-            x="zona",
-            y="precio_por_m2",
-            labels={"zona": "Zone", "precio_por_m2": "Price per m² (USD)"},
-            color="zona",
-        )
+        # Cajas armadas con los cuartiles y bigotes de la base; los puntos
+        # son los atípicos más extremos de cada zona
+        resumen, atipicos = graficos["box"]
+        colores = px.colors.qualitative.Plotly
+        fig5 = go.Figure()
+        for i, fila in resumen.iterrows():
+            color = colores[i % len(colores)]
+            fig5.add_trace(
+                go.Box(
+                    x=[fila["zona"]],
+                    q1=[fila["q1"]],
+                    median=[fila["mediana"]],
+                    q3=[fila["q3"]],
+                    lowerfence=[fila["minimo"]],
+                    upperfence=[fila["maximo"]],
+                    name=fila["zona"],
+                    marker_color=color,
+                )
+            )
+            valores = atipicos.loc[atipicos["zona"] == fila["zona"], "valor"]
+            fig5.add_trace(
+                go.Scatter(
+                    x=[fila["zona"]] * len(valores),
+                    y=valores,
+                    mode="markers",
+                    marker=dict(color=color, size=4),
+                    name=fila["zona"],
+                )
+            )
         fig5.update_layout(
+            xaxis_title="Zone",
+            yaxis_title="Price per m² (USD)",
             showlegend=False,
             height=300,
             margin=dict(l=20, r=20, t=20, b=20),
@@ -182,10 +254,12 @@ with col6:
     with st.container(border=True):
         # Gráfico 6: Top 10 Ciudades más Caras
         st.markdown("**Top 10 Most Expensive Cities**")
-        precio_por_ciudad = df.groupby("ciudad")["precio"].mean().reset_index()
-        precio_por_ciudad = precio_por_ciudad.sort_values(
-            "precio", ascending=True
-        ).tail(10)
+        precio_por_ciudad = (
+            graficos["por_ciudad"]
+            .sort_values("promedio_precio")
+            .tail(10)
+            .rename(columns={"promedio_precio": "precio"})
+        )
 
         fig6 = px.bar(
             precio_por_ciudad,
@@ -208,6 +282,51 @@ with col6:
 
 st.markdown("---")
 
+# ============================================================
+# CAMBIOS DE PRECIO - Historial de snapshots
+# ============================================================
+
+cambios = load_price_changes(cache_propiedades().version)
+
+if len(cambios) > 0:
+    st.subheader("📉 Price Changes")
+    st.markdown("")  # Espaciado
+
+    bajas = cambios[cambios["variacion"] < 0]
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Listings with Price Changes", f"{len(cambios):,}")
+
+    with col2:
+        st.metric("Price Drops", f"{len(bajas):,}")
+
+    with col3:
+        st.metric(
+            "Median Drop",
+            f"{bajas['variacion_pct'].median():.1f}%" if len(bajas) > 0 else "-",
+        )
+
+    st.dataframe(
+        cambios.sort_values("variacion_pct")[
+            [
+                "zona",
+                "ciudad",
+                "precio_inicial",
+                "precio_actual",
+                "variacion_pct",
+                "first_seen",
+                "last_seen",
+                "url",
+            ]
+        ],
+        use_container_width=True,
+        height=300,
+    )
+
+    st.markdown("---")
+
 # ============================================================
 # EXPLORACIÓN DE DATOS - Filtros y Tabla
 # ============================================================
@@ -5,9 +5,29 @@ Script para crear la base de datos SQLite y cargar datos limpios
 import sqlite3
 import pandas as pd
 import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scraper.dataset_parquet import existe_dataset, leer_dataset
+from scraper.esquema_db import asegurar_esquema
 
 DB_PATH = "propiedades.db"
 CSV_PATH = "./data/propiedades_limpias.csv"
+PARQUET_PATH = "./data/parquet/limpio"
+
+# Columnas de la tabla que vienen del dataset limpio
+COLUMNAS_DB = [
+    "fecha_scraping",
+    "zona",
+    "ciudad",
+    "precio",
+    "ambientes",
+    "bathrooms",
+    "area",
+    "url",
+]
 
 
 def crear_database():
@@ -76,15 +96,33 @@ def crear_indices():
 
 
 def cargar_datos():
-    """Carga los datos del CSV limpio a la base de datos"""
+    """Carga los datos limpios (Parquet o CSV) a la base de datos"""
     print("\n" + "=" * 60)
     print("CARGANDO DATOS")
     print("=" * 60)
 
-    # Leer CSV
-    print(f"Leyendo {CSV_PATH}...")
-    df = pd.read_csv(CSV_PATH)
-    print(f"✓ {len(df)} registros leídos del CSV")
+    if existe_dataset(PARQUET_PATH):
+        print(f"Leyendo {PARQUET_PATH}...")
+        df = leer_dataset(PARQUET_PATH, columnas=COLUMNAS_DB)
+        # En la base las fechas son texto, como las escribe el scraper
+        df["fecha_scraping"] = df["fecha_scraping"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"✓ {len(df)} registros leídos del Parquet")
+    else:
+        print(f"Leyendo {CSV_PATH}...")
+        df = pd.read_csv(CSV_PATH, usecols=COLUMNAS_DB)
+        print(f"✓ {len(df)} registros leídos del CSV")
+
+    # Con URLs repetidas EscritorDB no puede crear su índice UNIQUE (y se
+    # queda sin historial). Un dataset limpio de antes de deduplicar por URL
+    # puede traerlas: queda la fila más reciente de cada una
+    repetida = df["url"].notna() & (
+        df.sort_values("fecha_scraping", kind="stable")
+        .duplicated("url", keep="last")
+        .sort_index()
+    )
+    if repetida.any():
+        df = df[~repetida]
+        print(f"✓ {repetida.sum()} registros con URL repetida descartados")
 
     # Calcular precio por m2
     df["precio_por_m2"] = (df["precio"] / df["area"]).round(2)
@@ -99,6 +137,10 @@ def cargar_datos():
 
     print(f"✓ {len(df)} registros insertados")
 
+    # first_seen/last_seen e historial de precios
+    asegurar_esquema(conn)
+    print("✓ Esquema de snapshots aplicado")
+
     conn.close()
 
 
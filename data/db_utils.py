@@ -3,18 +3,36 @@ Utilidades para consultar la base de datos de propiedades
 """
 
 import sqlite3
+import threading
 import pandas as pd
 import sys
 import os
 
-
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from scraper.config import CIUDADES_POR_ZONA
+from scraper.esquema_db import METRICAS_RESUMEN, agregados_propiedades
 
 DB_PATH = "./propiedades.db"
 
+# Lo que usa el dashboard; id hace falta para ponerlo al día (CachePropiedades)
+COLUMNAS_DASHBOARD = [
+    "id",
+    "fecha_scraping",
+    "zona",
+    "ciudad",
+    "precio",
+    "ambientes",
+    "bathrooms",
+    "area",
+    "precio_por_m2",
+    "url",
+]
+COLUMNAS_CATEGORICAS = ["zona", "ciudad"]
+COLUMNAS_ENTERAS = ["id", "precio", "ambientes", "bathrooms", "area"]
+COLUMNAS_FECHA = ["fecha_scraping", "first_seen", "last_seen", "fecha_creacion"]
+
 
 def obtener_zona_por_ciudad(ciudad):
     """Dado el nombre de una ciudad, devuelve la zona"""
@@ -24,16 +42,197 @@ def obtener_zona_por_ciudad(ciudad):
     return None
 
 
-def get_all_properties():
-    conn = sqlite3.connect(DB_PATH)
+def _compactar(df):
+    """
+    Tipos chicos para cada columna (in place)
+
+    Enteros al ancho justo (nullable si hay nulos), zona y ciudad como
+    category, fechas como datetime y reales como float32.
+    """
+    for columna in df.columns:
+        if columna in COLUMNAS_CATEGORICAS:
+            df[columna] = df[columna].astype("category")
+        elif columna in COLUMNAS_FECHA:
+            df[columna] = pd.to_datetime(df[columna], errors="coerce")
+        elif columna in COLUMNAS_ENTERAS:
+            serie = df[columna]
+            if serie.isna().any():
+                serie = serie.astype("Int64")
+            df[columna] = pd.to_numeric(serie, downcast="integer")
+        elif columna == "precio_por_m2":
+            df[columna] = df[columna].astype("float32")
+    return df
 
-    query = "SELECT * FROM propiedades"
 
-    df = pd.read_sql_query(query, conn)
+def _concatenar(partes):
+    """
+    pd.concat que no pierde las category aunque difieran las categorías
+
+    Las partes vacías se saltean: sin filas, read_sql no sabe que zona y
+    ciudad son texto y sus categorías quedan object en lugar de str, y
+    union_categoricals no mezcla las dos.
+    """
+    partes = [parte for parte in partes if len(parte)] or partes[:1]
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna not in partes[0].columns:
+            continue
+        categorias = pd.api.types.union_categoricals(
+            [parte[columna] for parte in partes]
+        ).categories
+        partes = [
+            parte.assign(**{columna: parte[columna].cat.set_categories(categorias)})
+            for parte in partes
+        ]
+    return pd.concat(partes, ignore_index=True)
+
+
+def _leer_propiedades(conn, where="", params=(), columnas=COLUMNAS_DASHBOARD):
+    proyeccion = ", ".join(columnas) if columnas else "*"
+    query = f"SELECT {proyeccion} FROM propiedades {where}"
+    return _compactar(pd.read_sql_query(query, conn, params=params))
+
+
+def get_all_properties(columnas=COLUMNAS_DASHBOARD):
+    """
+    Propiedades con tipos compactos
+
+    Args:
+        columnas: Columnas a leer; None para todas
+
+    Returns:
+        DataFrame con enteros achicados, zona/ciudad como category y fechas
+        como datetime (ver _compactar)
+    """
+    conn = sqlite3.connect(DB_PATH)
+    df = _leer_propiedades(conn, columnas=columnas)
     conn.close()
     return df
 
 
+def reporte_memoria(df, nombre="DataFrame"):
+    """Imprime los bytes por columna (contando el contenido de los strings)"""
+    por_columna = df.memory_usage(deep=True, index=False)
+    print(f"{nombre}: {por_columna.sum() / 1024 / 1024:.1f} MB, {len(df):,} filas")
+    for columna, bytes_ in por_columna.items():
+        print(f"  {columna:16} {str(df[columna].dtype):16} {bytes_ / 1024:10,.0f} KB")
+    return por_columna.sum()
+
+
+class CachePropiedades:
+    """
+    Todas las propiedades en memoria, releídas solo cuando cambia la base
+
+    `PRAGMA data_version` cambia cuando otra conexión confirma algo, así que
+    con una conexión abierta cada consulta del dashboard cuesta una lectura
+    de la cabecera de la base. Si cambió:
+
+    - las filas con id mayor al último cacheado se leen y se agregan
+    - las que tienen filas nuevas en historial_precios (el upsert cambió
+      precio, área, ambientes o baños) se releen y se reemplazan
+    - si el total no coincide (limpiar_db borró filas), cambió la generación
+      de version_datos (limpiar_db recalculó precio_por_m2) o el archivo es
+      otro (crear_db lo recrea) se recarga todo
+
+    Lo que cambie por otra vía sin tocar historial ni la generación no se ve
+    hasta la próxima recarga completa. En particular last_seen de las filas
+    que solo se volvieron a ver puede quedar viejo; el dashboard no lo usa.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        self.df = None
+        self.version = None  # (inode, data_version) con la que se leyó df
+        self.recargas = 0
+        self.anexadas = 0
+        self.actualizadas = 0
+        self._conn = None
+        self._inode = None
+        self._max_id = 0
+        self._max_historial = 0
+        self._generacion = 0
+        self._lock = threading.Lock()  # Streamlit atiende cada sesión en un hilo
+
+    def _version_actual(self):
+        inode = os.stat(self.db_path).st_ino
+        if inode != self._inode:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._inode = inode
+            self.df = None
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return inode, data_version
+
+    def _marcas(self):
+        """(máximo id, máximo id de historial, total de filas, generación)"""
+        tablas = {
+            fila[0]
+            for fila in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name IN ('historial_precios', 'version_datos')"
+            )
+        }
+        max_historial = (
+            "(SELECT MAX(id) FROM historial_precios)"
+            if "historial_precios" in tablas
+            else "0"
+        )
+        generacion = (
+            "(SELECT generacion FROM version_datos)"
+            if "version_datos" in tablas
+            else "0"
+        )
+        max_id, max_hist, total, gen = self._conn.execute(
+            f"SELECT (SELECT MAX(id) FROM propiedades), {max_historial}, "
+            f"(SELECT COUNT(*) FROM propiedades), {generacion}"
+        ).fetchone()
+        return max_id or 0, max_hist or 0, total, gen or 0
+
+    def _recargar(self, marcas):
+        self._max_id, self._max_historial, _, self._generacion = marcas
+        self.df = _leer_propiedades(self._conn, "WHERE id <= ?", (self._max_id,))
+        self.recargas += 1
+
+    def _actualizar(self, marcas):
+        max_id, max_historial, total, generacion = marcas
+        if generacion != self._generacion:
+            self._recargar(marcas)
+            return
+        nuevas = _leer_propiedades(
+            self._conn, "WHERE id > ? AND id <= ?", (self._max_id, max_id)
+        )
+        cambiadas = _leer_propiedades(
+            self._conn,
+            "WHERE id <= ? AND id IN (SELECT propiedad_id FROM historial_precios "
+            "WHERE id > ? AND id <= ?)",
+            (self._max_id, self._max_historial, max_historial),
+        )
+        if len(self.df) + len(nuevas) != total:
+            self._recargar(marcas)
+            return
+        if len(nuevas) or len(cambiadas):
+            sin_cambios = self.df[~self.df["id"].isin(cambiadas["id"])]
+            self.df = _concatenar([sin_cambios, cambiadas, nuevas])
+        self._max_id, self._max_historial = max_id, max_historial
+        self.anexadas += len(nuevas)
+        self.actualizadas += len(cambiadas)
+
+    def obtener(self):
+        """DataFrame al día con la base; el mismo objeto si nada cambió"""
+        with self._lock:
+            version = self._version_actual()
+            if self.df is not None and version == self.version:
+                return self.df
+            # Las marcas en una sola consulta: la misma foto de la base
+            marcas = self._marcas()
+            if self.df is None:
+                self._recargar(marcas)
+            else:
+                self._actualizar(marcas)
+            self.version = version
+            return self.df
+
+
 def get_properties_filtered(zona=None, ciudad=None, precio_min=None, precio_max=None):
     conn = sqlite3.connect(DB_PATH)
 
@@ -61,6 +260,274 @@ def get_properties_filtered(zona=None, ciudad=None, precio_min=None, precio_max=
     return df
 
 
+def get_price_changes():
+    """
+    Publicaciones que cambiaron de precio desde que se vieron por primera vez
+
+    Devuelve una fila por publicación con el precio inicial (primera fila de
+    historial_precios) y el actual. Si la base todavía no tiene historial
+    devuelve un DataFrame vacío.
+    """
+    conn = sqlite3.connect(DB_PATH)
+
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'historial_precios'"
+    ).fetchone()
+    if not existe:
+        conn.close()
+        return pd.DataFrame()
+
+    query = """
+        SELECT p.zona, p.ciudad, p.url, p.first_seen, p.last_seen,
+               (SELECT h.precio FROM historial_precios h
+                WHERE h.propiedad_id = p.id ORDER BY h.id LIMIT 1) AS precio_inicial,
+               p.precio AS precio_actual,
+               (SELECT COUNT(*) - 1 FROM historial_precios h
+                WHERE h.propiedad_id = p.id) AS cambios
+        FROM propiedades p
+        WHERE p.id IN (SELECT propiedad_id FROM historial_precios)
+    """
+    df = pd.read_sql_query(query, conn)
+    conn.close()
+
+    df = df[df["precio_inicial"] != df["precio_actual"]]
+    df["variacion"] = df["precio_actual"] - df["precio_inicial"]
+    df["variacion_pct"] = (df["variacion"] / df["precio_inicial"] * 100).round(1)
+    return df
+
+
+# Columnas que se pueden agregar o agrupar en SQL (van interpoladas)
+COLUMNAS_NUMERICAS = ["precio", "area", "precio_por_m2", "ambientes", "bathrooms"]
+COLUMNAS_GRUPO = ["zona", "ciudad"]
+
+
+def _validar(columna, permitidas):
+    if columna not in permitidas:
+        raise ValueError(f"Columna no permitida: {columna}")
+    return columna
+
+
+def get_histogram(columna="precio", bins=40):
+    """
+    Histograma calculado en SQLite: bins de igual ancho entre mínimo y máximo
+
+    Returns:
+        DataFrame con desde, hasta y cantidad por bin (los vacíos con 0)
+    """
+    _validar(columna, COLUMNAS_NUMERICAS)
+    conn = sqlite3.connect(DB_PATH)
+    minimo, maximo = conn.execute(
+        f"SELECT MIN({columna}), MAX({columna}) FROM propiedades"
+    ).fetchone()
+    if minimo is None:
+        conn.close()
+        return pd.DataFrame(columns=["desde", "hasta", "cantidad"])
+
+    ancho = (maximo - minimo) / bins or 1
+    # El máximo cae justo en el borde derecho: va al último bin
+    conteos = dict(
+        conn.execute(
+            f"""
+            SELECT MIN(CAST(({columna} - ?) / ? AS INTEGER), ?) AS bin, COUNT(*)
+            FROM propiedades WHERE {columna} IS NOT NULL
+            GROUP BY bin
+            """,
+            (minimo, ancho, bins - 1),
+        )
+    )
+    conn.close()
+    return pd.DataFrame(
+        {
+            "desde": [minimo + i * ancho for i in range(bins)],
+            "hasta": [minimo + (i + 1) * ancho for i in range(bins)],
+            "cantidad": [conteos.get(i, 0) for i in range(bins)],
+        }
+    )
+
+
+def get_group_stats(grupo="zona", columna="precio"):
+    """
+    Promedio y cantidad de `columna` por zona o ciudad, en SQLite
+
+    Returns:
+        DataFrame con grupo, promedio y cantidad, de mayor a menor promedio
+    """
+    _validar(grupo, COLUMNAS_GRUPO)
+    _validar(columna, COLUMNAS_NUMERICAS)
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(
+        f"""
+        SELECT {grupo}, AVG({columna}) AS promedio, COUNT(*) AS cantidad
+        FROM propiedades GROUP BY {grupo} ORDER BY promedio DESC
+        """,
+        conn,
+    )
+    conn.close()
+    return df
+
+
+# Cuartiles con interpolación lineal (como numpy y el quartilemethod por
+# defecto de plotly): el cuantil q está en la posición q * (n - 1) de los
+# valores ordenados de cada grupo
+SQL_CUARTILES = """
+    WITH ordenados AS (
+        SELECT {grupo} AS grupo, {columna} AS valor,
+            ROW_NUMBER() OVER (PARTITION BY {grupo} ORDER BY {columna}) - 1 AS i,
+            COUNT(*) OVER (PARTITION BY {grupo}) AS n
+        FROM propiedades WHERE {columna} IS NOT NULL
+    ),
+    cuantiles(q) AS (VALUES (0.25), (0.5), (0.75)),
+    posiciones AS (
+        SELECT o.grupo, c.q, o.i, o.valor,
+            c.q * (o.n - 1) - CAST(c.q * (o.n - 1) AS INTEGER) AS fraccion,
+            CAST(c.q * (o.n - 1) AS INTEGER) AS base
+        FROM ordenados o JOIN cuantiles c
+        WHERE o.i BETWEEN CAST(c.q * (o.n - 1) AS INTEGER)
+            AND CAST(c.q * (o.n - 1) AS INTEGER) + 1
+    )
+    SELECT grupo, q,
+        SUM(CASE WHEN i = base THEN valor * (1 - fraccion)
+                 ELSE valor * fraccion END)
+    FROM posiciones GROUP BY grupo, q
+"""
+
+
+def get_box_stats(grupo="zona", columna="precio_por_m2", max_atipicos=100):
+    """
+    Resumen de box plot por grupo, calculado en SQLite
+
+    Los bigotes llegan hasta el último valor dentro de 1.5 rangos
+    intercuartiles (como plotly); lo que queda afuera son atípicos. De esos
+    se devuelven a lo sumo `max_atipicos` por grupo, los más alejados de la
+    mediana, así lo que viaja al navegador no crece con la base.
+
+    Returns:
+        (resumen, atipicos): DataFrame con grupo, minimo, q1, mediana, q3,
+        maximo (bigotes) y cantidad; DataFrame con grupo y valor
+    """
+    _validar(grupo, COLUMNAS_GRUPO)
+    _validar(columna, COLUMNAS_NUMERICAS)
+    conn = sqlite3.connect(DB_PATH)
+    cuartiles = {}
+    for nombre, q, valor in conn.execute(
+        SQL_CUARTILES.format(grupo=grupo, columna=columna)
+    ):
+        cuartiles.setdefault(nombre, {})[q] = valor
+    if not cuartiles:
+        conn.close()
+        columnas = [grupo, "minimo", "q1", "mediana", "q3", "maximo", "cantidad"]
+        return pd.DataFrame(columns=columnas), pd.DataFrame(columns=[grupo, "valor"])
+
+    # Cercas de cada grupo como tabla en la consulta
+    limites = []
+    for nombre, q in cuartiles.items():
+        rango = q[0.75] - q[0.25]
+        limites.extend([nombre, q[0.25] - 1.5 * rango, q[0.75] + 1.5 * rango, q[0.5]])
+    valores = ", ".join(["(?, ?, ?, ?)"] * len(cuartiles))
+    cte = f"WITH limites(grupo, bajo, alto, mediana) AS (VALUES {valores})"
+
+    bigotes = conn.execute(
+        f"""
+        {cte}
+        SELECT l.grupo,
+            MIN(CASE WHEN p.{columna} >= l.bajo THEN p.{columna} END),
+            MAX(CASE WHEN p.{columna} <= l.alto THEN p.{columna} END),
+            COUNT(*)
+        FROM propiedades p JOIN limites l ON p.{grupo} = l.grupo
+        WHERE p.{columna} IS NOT NULL
+        GROUP BY l.grupo
+        """,
+        limites,
+    ).fetchall()
+    atipicos = pd.read_sql_query(
+        f"""
+        {cte}
+        SELECT grupo AS {grupo}, valor FROM (
+            SELECT l.grupo, p.{columna} AS valor,
+                ROW_NUMBER() OVER (
+                    PARTITION BY l.grupo ORDER BY ABS(p.{columna} - l.mediana) DESC
+                ) AS orden
+            FROM propiedades p JOIN limites l ON p.{grupo} = l.grupo
+            WHERE p.{columna} < l.bajo OR p.{columna} > l.alto
+        )
+        WHERE orden <= ?
+        """,
+        conn,
+        params=limites + [max_atipicos],
+    )
+    conn.close()
+
+    resumen = pd.DataFrame(
+        [
+            (
+                nombre,
+                minimo,
+                cuartiles[nombre][0.25],
+                cuartiles[nombre][0.5],
+                cuartiles[nombre][0.75],
+                maximo,
+                cantidad,
+            )
+            for nombre, minimo, maximo, cantidad in bigotes
+        ],
+        columns=[grupo, "minimo", "q1", "mediana", "q3", "maximo", "cantidad"],
+    )
+    return resumen.sort_values(grupo, ignore_index=True), atipicos
+
+
+def get_sample(n=1000, columnas=("area", "precio", "zona")):
+    """Muestra al azar de `n` propiedades, elegida en SQLite"""
+    for columna in columnas:
+        _validar(columna, COLUMNAS_NUMERICAS + COLUMNAS_GRUPO)
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(columnas)} FROM propiedades ORDER BY RANDOM() LIMIT ?",
+        conn,
+        params=(n,),
+    )
+    conn.close()
+    return df
+
+
+def get_summary(nivel="global"):
+    """
+    Estadísticas desde las tablas de resumen, sin recorrer propiedades
+
+    No modifica la base: si no tiene las tablas de resumen, las mismas
+    columnas se calculan con un GROUP BY sobre propiedades.
+
+    Args:
+        nivel: "global", "zona" o "ciudad"
+
+    Returns:
+        DataFrame con cantidad y, para precio, area y m2 (precio por m²):
+        n_, min_, max_, promedio_ y desvio_ de cada una
+    """
+    vistas = {
+        "global": ("resumen_global", None),
+        "zona": ("resumen_zonas", "zona"),
+        "ciudad": ("resumen_ciudades", "zona, ciudad"),
+    }
+    vista, agrupar = vistas[nivel]
+    conn = sqlite3.connect(DB_PATH)
+    # Solo los que escriben migran la base. Si todavía no tiene resúmenes
+    # (nadie escribió desde que existen) se agrupa propiedades directamente
+    hay_resumenes = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'resumen_ciudades'"
+    ).fetchone()
+    sql = f"SELECT * FROM {vista}" if hay_resumenes else agregados_propiedades(agrupar)
+    df = pd.read_sql_query(sql, conn)
+    conn.close()
+
+    for metrica, _ in METRICAS_RESUMEN:
+        n = df[f"n_{metrica}"].where(df[f"n_{metrica}"] > 0)
+        promedio = df[f"suma_{metrica}"] / n
+        varianza = (df[f"suma2_{metrica}"] / n - promedio**2).clip(lower=0)
+        df[f"promedio_{metrica}"] = promedio
+        df[f"desvio_{metrica}"] = varianza**0.5
+    return df
+
+
 def get_unique_zones():
     """Obtiene lista de zonas únicas"""
     conn = sqlite3.connect(DB_PATH)
@@ -115,3 +582,15 @@ if __name__ == "__main__":
         print(f"  - {zona}")
 
     print(f"\nTotal ciudades: {len(get_unique_cities())}")
+
+    # Memoria: SELECT * con los tipos por defecto vs el loader tipado
+    print("\n" + "=" * 60)
+    print("MEMORIA DEL DATAFRAME")
+    print("=" * 60)
+    conn = sqlite3.connect(DB_PATH)
+    antes = reporte_memoria(
+        pd.read_sql_query("SELECT * FROM propiedades", conn), "SELECT *"
+    )
+    conn.close()
+    despues = reporte_memoria(get_all_properties(), "\nget_all_properties")
+    print(f"\nReducción: {antes / despues:.1f}x")
@@ -1,14 +1,33 @@
 """
 Limpia la base de datos eliminando outliers y datos inválidos
+
+Los triggers de esquema_db descuentan cada fila borrada de las tablas de
+resumen, así que no hace falta recalcularlas después. El recálculo de
+precio_por_m2 no deja historial, así que incrementa la generación de los
+datos para que el dashboard recargue todo.
 """
 
 import sqlite3
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scraper.esquema_db import (
+    marcar_reescritura,
+    migrar_resumenes,
+    migrar_version_datos,
+)
 
 DB_PATH = "../propiedades.db"
 
 
 def limpiar_db():
     conn = sqlite3.connect(DB_PATH)
+    # Los resúmenes tienen que existir antes del DELETE para seguirlo
+    migrar_resumenes(conn)
+    migrar_version_datos(conn)
     cursor = conn.cursor()
 
     print("=" * 60)
@@ -59,6 +78,7 @@ def limpiar_db():
         SET precio_por_m2 = ROUND(CAST(precio AS REAL) / CAST(area AS REAL), 2)
         WHERE area > 0
     """)
+    marcar_reescritura(conn)
     print(f"✓ Precio por m² actualizado")
 
     conn.commit()
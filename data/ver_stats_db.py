@@ -1,15 +1,26 @@
 """
 Script para ver estadísticas de la base de datos
+
+Conteos, promedios y extremos salen de las tablas de resumen que mantienen
+los triggers de esquema_db; solo las fechas recorren propiedades.
 """
 
 import sqlite3
 import pandas as pd
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scraper.esquema_db import migrar_resumenes
 
 DB_PATH = "propiedades.db"
 
 
 def mostrar_stats():
     conn = sqlite3.connect(DB_PATH)
+    migrar_resumenes(conn)
     cursor = conn.cursor()
 
     print("=" * 60)
@@ -17,7 +28,7 @@ def mostrar_stats():
     print("=" * 60)
 
     # Total de propiedades
-    cursor.execute("SELECT COUNT(*) FROM propiedades")
+    cursor.execute("SELECT COALESCE(cantidad, 0) FROM resumen_global")
     total = cursor.fetchone()[0]
     print(f"\n📊 TOTAL DE PROPIEDADES: {total:,}")
 
@@ -26,9 +37,8 @@ def mostrar_stats():
     print("PROPIEDADES POR ZONA")
     print("=" * 60)
     cursor.execute("""
-        SELECT zona, COUNT(*) as cantidad 
-        FROM propiedades 
-        GROUP BY zona 
+        SELECT zona, cantidad
+        FROM resumen_zonas
         ORDER BY cantidad DESC
     """)
     for zona, cantidad in cursor.fetchall():
@@ -39,10 +49,9 @@ def mostrar_stats():
     print("TOP 10 CIUDADES")
     print("=" * 60)
     cursor.execute("""
-        SELECT ciudad, zona, COUNT(*) as cantidad 
-        FROM propiedades 
-        GROUP BY ciudad, zona 
-        ORDER BY cantidad DESC 
+        SELECT ciudad, zona, cantidad
+        FROM resumen_ciudades
+        ORDER BY cantidad DESC
         LIMIT 10
     """)
     for ciudad, zona, cantidad in cursor.fetchall():
@@ -53,11 +62,11 @@ def mostrar_stats():
     print("ESTADÍSTICAS DE PRECIO")
     print("=" * 60)
     cursor.execute("""
-        SELECT 
-            MIN(precio) as min_precio,
-            AVG(precio) as avg_precio,
-            MAX(precio) as max_precio
-        FROM propiedades
+        SELECT
+            CAST(min_precio AS INTEGER),
+            suma_precio / n_precio,
+            CAST(max_precio AS INTEGER)
+        FROM resumen_global
     """)
     min_p, avg_p, max_p = cursor.fetchone()
     print(f"Mínimo:   ${min_p:>12,}")
@@ -69,11 +78,8 @@ def mostrar_stats():
     print("ESTADÍSTICAS DE ÁREA")
     print("=" * 60)
     cursor.execute("""
-        SELECT 
-            MIN(area) as min_area,
-            AVG(area) as avg_area,
-            MAX(area) as max_area
-        FROM propiedades
+        SELECT min_area, suma_area / n_area, max_area
+        FROM resumen_global
     """)
     min_a, avg_a, max_a = cursor.fetchone()
     print(f"Mínimo:   {min_a:>8.0f} m²")
@@ -85,10 +91,9 @@ def mostrar_stats():
     print("PRECIO POR M² PROMEDIO POR ZONA")
     print("=" * 60)
     cursor.execute("""
-        SELECT zona, AVG(precio_por_m2) as avg_precio_m2
-        FROM propiedades
-        WHERE precio_por_m2 IS NOT NULL
-        GROUP BY zona
+        SELECT zona, suma_m2 / n_m2 as avg_precio_m2
+        FROM resumen_zonas
+        WHERE n_m2 > 0
         ORDER BY avg_precio_m2 DESC
     """)
     for zona, avg_pm2 in cursor.fetchall():
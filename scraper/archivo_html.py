@@ -0,0 +1,209 @@
+"""
+Archivo comprimido del HTML crudo descargado por los scrapers
+
+Cada página se guarda como un blob gzip direccionado por el sha256 de su
+contenido (páginas idénticas se guardan una sola vez) y se registra en un
+índice JSONL con la URL y la fecha de descarga. Con `--replay` los scrapers
+vuelven a parsear e insertar desde acá, sin tocar la red.
+
+Los totales del archivo (descargas, blobs y bytes) se llevan en
+totales.json al guardar cada página, así el resumen no recorre el índice ni
+los blobs: su costo no crece con las corridas acumuladas. Varios procesos
+(los workers) pueden guardar a la vez: el índice se escribe con un lock.
+"""
+
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import struct
+import time
+
+DIRECTORIO_ARCHIVO = "../data/archivo_html"
+
+
+class ArchivoHTML:
+    """
+    Blob store + índice de páginas descargadas
+
+    Estructura en disco:
+        <directorio>/indice.jsonl          una línea por descarga
+        <directorio>/totales.json          descargas, blobs y bytes acumulados
+        <directorio>/blobs/ab/abcdef....gz  HTML comprimido, nombre = sha256
+    """
+
+    def __init__(self, directorio=DIRECTORIO_ARCHIVO):
+        self.directorio = directorio
+        self.ruta_indice = os.path.join(directorio, "indice.jsonl")
+        self.ruta_totales = os.path.join(directorio, "totales.json")
+        self.directorio_blobs = os.path.join(directorio, "blobs")
+        self._ultima_por_url = None
+        self.descargas = 0  # De esta corrida
+        self.blobs_nuevos = 0
+
+    def _ruta_blob(self, sha):
+        return os.path.join(self.directorio_blobs, sha[:2], f"{sha}.gz")
+
+    def guardar(self, url, html, zona, ciudad, pagina, fecha):
+        """
+        Guarda el HTML de una descarga y la registra en el índice
+
+        Returns:
+            sha256 del contenido (la clave del blob)
+        """
+        contenido = html.encode("utf-8")
+        sha = hashlib.sha256(contenido).hexdigest()
+        ruta = self._ruta_blob(sha)
+        # Se comprime fuera del lock; si el blob ya estaba no hace falta
+        comprimido = None
+        if not os.path.exists(ruta):
+            comprimido = gzip.compress(contenido, compresslevel=6)
+
+        entrada = {
+            "url": url,
+            "fecha": fecha,
+            "zona": zona,
+            "ciudad": ciudad,
+            "pagina": pagina,
+            "sha256": sha,
+            "bytes": len(contenido),
+        }
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self.ruta_indice, "a", encoding="utf-8") as f:
+            # Con el lock tomado, el blob y los totales cambian juntos
+            fcntl.flock(f, fcntl.LOCK_EX)
+            totales = self._leer_totales()
+            # Dedup: si el contenido ya está archivado solo se agrega al índice
+            if not os.path.exists(ruta):
+                if comprimido is None:  # Desapareció entre el chequeo y el lock
+                    comprimido = gzip.compress(contenido, compresslevel=6)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                temporal = f"{ruta}.tmp"
+                with open(temporal, "wb") as blob:
+                    blob.write(comprimido)
+                os.replace(temporal, ruta)
+                totales["blobs"] += 1
+                totales["bytes_html"] += len(contenido)
+                totales["bytes_disco"] += len(comprimido)
+                self.blobs_nuevos += 1
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            f.flush()
+            totales["descargas"] += 1
+            self._escribir_totales(totales)
+        self.descargas += 1
+
+        if self._ultima_por_url is not None:
+            self._ultima_por_url[url] = entrada
+        return sha
+
+    def _leer_totales(self):
+        """Totales acumulados; un archivo anterior a totales.json se recuenta"""
+        if os.path.exists(self.ruta_totales):
+            with open(self.ruta_totales, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return self._recontar()
+
+    def _escribir_totales(self, totales):
+        temporal = f"{self.ruta_totales}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(totales, f)
+        os.replace(temporal, self.ruta_totales)
+
+    def _recontar(self):
+        """
+        Recorre el índice y los blobs una vez, sin guardar URLs ni hashes
+
+        El tamaño del HTML de cada blob sale de los últimos 4 bytes del gzip
+        (ISIZE), así no hace falta deduplicar las entradas del índice.
+        """
+        totales = {"descargas": 0, "blobs": 0, "bytes_html": 0, "bytes_disco": 0}
+        if os.path.exists(self.ruta_indice):
+            with open(self.ruta_indice, "rb") as f:
+                totales["descargas"] = sum(1 for linea in f if linea.strip())
+        for raiz, _, archivos in os.walk(self.directorio_blobs):
+            for nombre in archivos:
+                if not nombre.endswith(".gz"):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                with open(ruta, "rb") as f:
+                    f.seek(-4, os.SEEK_END)
+                    totales["bytes_html"] += struct.unpack("<I", f.read(4))[0]
+                totales["blobs"] += 1
+                totales["bytes_disco"] += os.path.getsize(ruta)
+        return totales
+
+    def leer(self, sha):
+        """Devuelve el HTML de un blob"""
+        with open(self._ruta_blob(sha), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def entradas(self):
+        """Itera todas las entradas del índice en orden de descarga"""
+        if not os.path.exists(self.ruta_indice):
+            return
+        with open(self.ruta_indice, "r", encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+    def ultima_version(self, url):
+        """Devuelve la entrada más reciente de una URL, o None si no está"""
+        if self._ultima_por_url is None:
+            self._ultima_por_url = {}
+            for entrada in self.entradas():
+                self._ultima_por_url[entrada["url"]] = entrada
+        return self._ultima_por_url.get(url)
+
+    def imprimir_resumen(self):
+        if not os.path.exists(self.directorio):
+            return
+        totales = self._leer_totales()
+        print("🗄️  Archivo HTML:")
+        print(
+            f"   {totales['descargas']:,} descargas | {totales['blobs']:,} blobs "
+            f"únicos ({self.descargas:,} y {self.blobs_nuevos:,} en esta corrida)"
+        )
+        print(
+            f"   {totales['bytes_html'] / 1e6:.1f} MB de HTML en "
+            f"{totales['bytes_disco'] / 1e6:.1f} MB en disco"
+        )
+
+
+class ReproductorArchivo:
+    """
+    Fuente de páginas que lee del archivo en lugar de la red
+
+    Tiene la misma interfaz `recorrer` que FetcherAsincrono, así el main de
+    cada scraper puede usar una u otra sin cambios.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.paginas = 0
+        self.duracion = 0.0
+
+    def recorrer(self, tareas, generar_url, procesar, al_terminar_ciudad=None):
+        inicio = time.perf_counter()
+
+        for zona, ciudad, paginas in tareas:
+            for pagina in paginas:
+                entrada = self.archivo.ultima_version(generar_url(zona, ciudad, pagina))
+                # Sin página archivada: la ciudad no se descargó más allá de acá
+                if entrada is None:
+                    break
+                html = self.archivo.leer(entrada["sha256"])
+                self.paginas += 1
+                if not procesar(zona, ciudad, pagina, html, entrada["fecha"]):
+                    break
+            if al_terminar_ciudad:
+                al_terminar_ciudad(zona, ciudad)
+
+        self.duracion += time.perf_counter() - inicio
+
+    def imprimir_resumen(self):
+        velocidad = self.paginas / self.duracion if self.duracion else 0
+        print(
+            f"⏪ Replay: {self.paginas:,} páginas en {self.duracion:.1f}s "
+            f"({velocidad:.1f} páginas/s)"
+        )
@@ -0,0 +1,282 @@
+"""
+Cola de trabajo en SQLite con leases, para scrapear con varios workers
+
+La tabla `trabajos` (esquema_db) tiene una fila por página a descargar.
+Un worker toma un lote con `tomar`: las filas pasan a "tomado" con su
+nombre y un lease que vence en LEASE_TRABAJO segundos. Mientras trabaja,
+un Latido renueva el lease en otro hilo; si el worker muere el lease vence
+y otro worker vuelve a tomar esas páginas. Una página que agota
+MAX_INTENTOS_TRABAJO queda "fallido" y no se vuelve a repartir. Las que el
+disyuntor del fetcher dejó sin pedir se devuelven sin gastar un intento.
+
+Completar una página se encola en el EscritorDB, así queda "hecho" en el
+mismo commit que sus propiedades. La página 1 de cada ciudad trae el total
+de resultados: al completarla se encolan las páginas 2..n de esa ciudad.
+
+Todos los workers tienen que correr en la misma máquina que la base: la
+conexión usa WAL (PRAGMAS de escritor_db), que coordina a lectores y
+escritores con memoria compartida (el archivo -shm) y no funciona sobre un
+sistema de archivos de red. Para repartir entre varias máquinas haría falta
+una base con servidor.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from config import LEASE_TRABAJO, MAX_INTENTOS_TRABAJO
+from escritor_db import PRAGMAS
+from esquema_db import migrar_trabajos
+
+Trabajo = namedtuple("Trabajo", ["id", "zona", "ciudad", "pagina"])
+
+SQL_COMPLETAR = """
+    UPDATE trabajos
+    SET estado = 'hecho', lease_hasta = NULL, propiedades = ?, actualizado = ?
+    WHERE id = ? AND worker = ? AND estado = 'tomado'
+"""
+
+SQL_ENCOLAR = """
+    INSERT OR IGNORE INTO trabajos (zona, ciudad, pagina, actualizado)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+def _ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ColaTrabajo:
+    """
+    Acceso a la tabla `trabajos`
+
+    Args:
+        db_path: Ruta a la base SQLite, local a esta máquina
+        lease: Segundos que dura un lease sin renovar
+        max_intentos: Tomas de una página antes de darla por fallida
+    """
+
+    def __init__(self, db_path, lease=LEASE_TRABAJO, max_intentos=MAX_INTENTOS_TRABAJO):
+        self.db_path = db_path
+        self.lease = lease
+        self.max_intentos = max_intentos
+        self.conn = sqlite3.connect(db_path)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        migrar_trabajos(self.conn)
+        self.recuperados = 0  # Páginas tomadas de un lease vencido
+
+    def sembrar(self, ciudades, reiniciar=False):
+        """
+        Encola la página 1 de cada ciudad
+
+        Args:
+            ciudades: Lista de (zona, ciudad)
+            reiniciar: Borrar antes lo hecho y lo fallido de una vuelta anterior
+
+        Returns:
+            Cantidad de páginas encoladas (las que ya estaban no se repiten)
+        """
+        with self.conn:
+            if reiniciar:
+                self.conn.execute(
+                    "DELETE FROM trabajos WHERE estado IN ('hecho', 'fallido')"
+                )
+            antes = self.conn.total_changes
+            fecha = _ahora()
+            self.conn.executemany(
+                SQL_ENCOLAR, [(zona, ciudad, 1, fecha) for zona, ciudad in ciudades]
+            )
+            return self.conn.total_changes - antes
+
+    def tomar(self, worker, cantidad):
+        """
+        Toma hasta `cantidad` páginas pendientes o con el lease vencido
+
+        Las páginas 1 van primero, así los planes de cada ciudad se conocen
+        cuanto antes. Todo ocurre en una transacción IMMEDIATE: dos workers
+        nunca toman la misma página.
+
+        Returns:
+            Lista de Trabajo
+        """
+        ahora = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            # Un lease vencido por última vez: el worker murió en cada intento
+            self.conn.execute(
+                """
+                UPDATE trabajos
+                SET estado = 'fallido', lease_hasta = NULL, actualizado = ?,
+                    error = COALESCE(error, 'lease vencido')
+                WHERE estado = 'tomado' AND lease_hasta < ? AND intentos >= ?
+                """,
+                (_ahora(), ahora, self.max_intentos),
+            )
+            filas = self.conn.execute(
+                """
+                SELECT id, zona, ciudad, pagina, estado FROM trabajos
+                WHERE estado = 'pendiente'
+                    OR (estado = 'tomado' AND lease_hasta < ?)
+                ORDER BY pagina, id
+                LIMIT ?
+                """,
+                (ahora, cantidad),
+            ).fetchall()
+            self.conn.executemany(
+                """
+                UPDATE trabajos
+                SET estado = 'tomado', worker = ?, lease_hasta = ?,
+                    intentos = intentos + 1, actualizado = ?
+                WHERE id = ?
+                """,
+                [(worker, ahora + self.lease, _ahora(), fila[0]) for fila in filas],
+            )
+        self.recuperados += sum(1 for fila in filas if fila[4] == "tomado")
+        return [Trabajo(*fila[:4]) for fila in filas]
+
+    def renovar(self, worker, ids):
+        """Extiende el lease de las páginas que el worker todavía tiene"""
+        if not ids:
+            return
+        lease_hasta = time.time() + self.lease
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE trabajos SET lease_hasta = ? "
+                "WHERE id = ? AND worker = ? AND estado = 'tomado'",
+                [(lease_hasta, id_, worker) for id_ in ids],
+            )
+
+    def completar(self, escritor, trabajo, worker, propiedades, siguientes=()):
+        """
+        Marca la página como hecha en el próximo commit del escritor
+
+        Si otro worker ya la recuperó (el lease venció) no se toca: las
+        propiedades igual se guardan, el upsert por URL es idempotente.
+
+        Args:
+            escritor: EscritorDB donde se encolaron las propiedades
+            trabajo: Trabajo tomado
+            worker: Nombre del worker
+            propiedades: Cantidad de propiedades de la página
+            siguientes: Páginas de la misma ciudad a encolar (tras la página 1)
+        """
+        fecha = _ahora()
+        escritor.en_mismo_commit(
+            SQL_COMPLETAR, (propiedades, fecha, trabajo.id, worker)
+        )
+        for pagina in siguientes:
+            escritor.en_mismo_commit(
+                SQL_ENCOLAR, (trabajo.zona, trabajo.ciudad, pagina, fecha)
+            )
+
+    def fallar(self, trabajo, worker, error):
+        """Devuelve la página a la cola, o la da por fallida si agotó intentos"""
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE trabajos
+                SET estado = CASE WHEN intentos >= ? THEN 'fallido'
+                                  ELSE 'pendiente' END,
+                    lease_hasta = NULL, error = ?, actualizado = ?
+                WHERE id = ? AND worker = ? AND estado = 'tomado'
+                """,
+                (self.max_intentos, error, _ahora(), trabajo.id, worker),
+            )
+
+    def devolver(self, trabajos, worker):
+        """
+        Devuelve a la cola páginas tomadas que no se llegaron a pedir
+
+        A diferencia de `fallar` no gastan un intento: el disyuntor las dejó
+        sin probar, así que se descuenta la toma que las trajo.
+        """
+        with self.conn:
+            self.conn.executemany(
+                """
+                UPDATE trabajos
+                SET estado = 'pendiente', lease_hasta = NULL,
+                    intentos = intentos - 1, actualizado = ?
+                WHERE id = ? AND worker = ? AND estado = 'tomado'
+                """,
+                [(_ahora(), trabajo.id, worker) for trabajo in trabajos],
+            )
+
+    def liberar(self, worker):
+        """Devuelve a la cola todo lo que el worker tiene tomado (al salir)"""
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE trabajos
+                SET estado = 'pendiente', lease_hasta = NULL,
+                    intentos = intentos - 1, actualizado = ?
+                WHERE worker = ? AND estado = 'tomado'
+                """,
+                (_ahora(), worker),
+            )
+
+    def contar(self):
+        """Dict estado -> cantidad de páginas"""
+        return dict(
+            self.conn.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado")
+        )
+
+    def imprimir_resumen(self):
+        conteo = self.contar()
+        estados = " | ".join(
+            f"{estado}: {conteo.get(estado, 0):,}"
+            for estado in ("pendiente", "tomado", "hecho", "fallido")
+        )
+        print(f"📋 Cola de trabajo: {estados}")
+        if self.recuperados:
+            print(f"   {self.recuperados} páginas recuperadas de leases vencidos")
+
+    def cerrar(self):
+        self.conn.close()
+
+
+class Latido(threading.Thread):
+    """
+    Hilo que renueva el lease de las páginas que el worker tiene tomadas
+
+    Usa su propia conexión (las de sqlite3 no se comparten entre hilos) y
+    renueva cada lease / 3 segundos, así un commit lento no hace vencer
+    páginas que se siguen procesando.
+    """
+
+    def __init__(self, db_path, worker, lease=LEASE_TRABAJO):
+        super().__init__(name="latido", daemon=True)
+        self.db_path = db_path
+        self.worker = worker
+        self.lease = lease
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def vigilar(self, trabajos):
+        with self._lock:
+            self._ids.update(trabajo.id for trabajo in trabajos)
+
+    def soltar(self, trabajos):
+        with self._lock:
+            self._ids.difference_update(trabajo.id for trabajo in trabajos)
+
+    def run(self):
+        cola = ColaTrabajo(self.db_path, self.lease)
+        try:
+            while not self._parar.wait(self.lease / 3):
+                with self._lock:
+                    ids = list(self._ids)
+                try:
+                    cola.renovar(self.worker, ids)
+                except sqlite3.OperationalError as e:
+                    # Base ocupada: se reintenta en el próximo latido
+                    print(f"⚠️  No se pudo renovar el lease: {e}")
+        finally:
+            cola.cerrar()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
@@ -2,7 +2,75 @@
 
 BASE_URL = "https://inmuebles.mercadolibre.com.ar/casas/venta"
 
+# MercadoLibre no pagina más allá de ~2000 resultados (42 páginas de 48)
 MAX_PAGINAS = 42
+RESULTADOS_POR_PAGINA = 48
+
+# Descarga concurrente
+CONCURRENCIA_MAXIMA = 4  # Ciudades (requests) en vuelo a la vez
+REQUESTS_POR_SEGUNDO = 0.25  # Tasa sostenida del token bucket de cada host
+RAFAGA_POR_HOST = 1  # Tokens que puede acumular un host sin uso
+
+# Control adaptativo de tasa (AIMD): sube de a poco, recorta a la mitad
+TASA_MINIMA = 0.05  # req/s (una request cada 20 s como mucho)
+TASA_MAXIMA = 2.0  # req/s
+INCREMENTO_TASA = 0.01  # req/s que se suman por cada respuesta 200 rápida
+FACTOR_RECORTE = 0.5  # Multiplicador ante 429/5xx, timeouts o picos de latencia
+LATENCIA_MAXIMA = 8.0  # Segundos; más que esto siempre cuenta como pico
+FACTOR_PICO_LATENCIA = 3.0  # Pico = latencia > factor * latencia media
+
+# Disyuntor (circuit breaker) por host y zona: si el sitio falla seguido se
+# deja de pedir por un tiempo que se duplica en cada apertura
+FALLOS_PARA_ABRIR = 5  # Requests fallidas seguidas que abren el disyuntor
+ENFRIAMIENTO_INICIAL = 30  # Segundos sin pedir nada tras la primera apertura
+ENFRIAMIENTO_MAXIMO = 900  # Tope del enfriamiento
+JITTER_ENFRIAMIENTO = 0.5  # Fracción del enfriamiento que se sortea
+# Veces que una ciudad vuelve a la cola por el disyuntor en un recorrido;
+# después sus páginas quedan pendientes para la próxima corrida
+MAX_REENCOLADAS_CIUDAD = 4
+
+# Modo "solo nuevas" del scraper incremental: dejar de paginar una ciudad
+# después de tantas páginas seguidas sin ninguna URL nueva
+PAGINAS_SIN_NOVEDADES = 3
+
+# Deduplicación de URLs al insertar: "exacto" (set en memoria) o "bloom"
+# (filtro de Bloom, mucho más chico; los posibles duplicados se confirman en DB)
+MODO_URLS_CONOCIDAS = "exacto"
+TASA_FALSOS_POSITIVOS_BLOOM = 0.001
+
+# Filas acumuladas antes de cada commit del escritor de la base
+TAMANO_LOTE_DB = 500
+
+# Extracción de las páginas de listado:
+#   "json"        estado JSON embebido en la página (si falta, DOM con lxml)
+#   "lxml"        DOM armando solo las tarjetas, con lxml
+#   "html.parser" DOM completo con el parser de Python (comportamiento original)
+PARSER_HTML = "json"
+
+# Respaldo CSV de cada corrida, escrito página por página
+RUTA_CSV = "./data/data.csv"
+COMPRIMIR_CSV = False  # True: data.csv.gz
+ROTAR_CSV_MB = None  # Empezar data-2.csv, data-3.csv... al pasar este tamaño
+
+# Copia en Parquet particionada por zona y fecha (solo si está pyarrow)
+GUARDAR_PARQUET = True
+RUTA_PARQUET = "./data/parquet/crudo"
+
+# Pipeline descarga → parseo → escritura
+PROCESOS_PARSEO = 2  # Procesos que parsean HTML en paralelo
+TAMANO_COLA_PIPELINE = 32  # Páginas en vuelo entre la descarga y la base
+
+# Cola de trabajo compartida (worker.py): varios procesos de la misma máquina
+# que usan la misma base se reparten las páginas
+LEASE_TRABAJO = 300  # Segundos que un worker retiene una página sin renovarla
+MAX_INTENTOS_TRABAJO = 3  # Después de tantos intentos la página queda "fallido"
+TRABAJOS_POR_LOTE = 16  # Páginas que toma un worker cada vez
+ESPERA_COLA_VACIA = 10  # Segundos entre consultas si solo quedan páginas tomadas
+
+# Planificador de recrawl por rotación (--presupuesto del incremental)
+SUAVIZADO_CHURN = 0.3  # Peso de la última visita en la media exponencial
+NUEVAS_MINIMAS_CHURN = 1.0  # Con menos nuevas esperadas la ciudad se posterga
+INTERVALO_MAXIMO_CHURN = 14  # Días sin visita tras los cuales se visita igual
 
 # Mapeo de zonas a sus slugs en la URL
 ZONAS_SLUGS = {
@@ -79,7 +147,7 @@ def generar_url(zona, ciudad, pagina=1):
     if pagina == 1:
         sufijo_paginacion = ""
     else:
-        offset = (pagina - 1) * 48 + 1
+        offset = (pagina - 1) * RESULTADOS_POR_PAGINA + 1
         sufijo_paginacion = f"_Desde_{offset}"
 
     # Buenos Aires Interior tiene una estructura diferente
@@ -89,6 +157,20 @@ def generar_url(zona, ciudad, pagina=1):
     return f"{BASE_URL}/{zona_slug}/{ciudad}/{sufijo_paginacion}"
 
 
+def calcular_paginas(total_resultados):
+    """
+    Cantidad exacta de páginas de una ciudad a partir de su total de resultados
+
+    Args:
+        total_resultados: Número que muestra la página 1 ("1.234 resultados")
+
+    Returns:
+        Páginas a recorrer, con tope en MAX_PAGINAS
+    """
+    paginas = -(-total_resultados // RESULTADOS_POR_PAGINA)  # Redondeo hacia arriba
+    return min(paginas, MAX_PAGINAS)
+
+
 def obtener_todas_las_urls():
     """Devuelve un diccionario con todas las URLs organizadas por zona"""
     urls = {}
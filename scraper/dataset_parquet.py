@@ -0,0 +1,274 @@
+"""
+Dataset de propiedades en Parquet, particionado por zona y fecha de scraping
+
+Las etapas del pipeline (scraper → análisis → limpieza → base) se pasaban
+los datos en CSV: cada una volvía a parsear texto y perdía los tipos (el
+precio llegaba como "120.000"). Acá los datos quedan en un directorio con
+particiones estilo Hive:
+
+    raiz/zona=GBA%20Norte/fecha=2026-01-15/parte-20260115-120000-4242-0000.parquet
+
+Las columnas de texto que se repiten (ciudad, moneda) van con encoding de
+diccionario y se leen como category. Al leer se puede pedir solo algunas
+columnas y filtrar por zona o fecha: las particiones que no coinciden ni se
+abren, y los demás filtros usan las estadísticas de cada row group.
+
+pyarrow es opcional: sin él HAY_PYARROW es False y el scraper y los
+scripts siguen con el CSV.
+"""
+
+import math
+import os
+import shutil
+import time
+from datetime import datetime
+from numbers import Number
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    HAY_PYARROW = True
+except ImportError:
+    HAY_PYARROW = False
+
+FILAS_POR_GRUPO = 2_000  # Filas por row group (y por flush del sink)
+SEGUNDOS_POR_ARCHIVO = 300  # Cada cuánto el sink cierra sus archivos
+COMPRESION = "zstd"
+
+# Columnas que se guardan dentro de cada archivo; zona y fecha van en la ruta
+COLUMNAS_ARCHIVO = (
+    "fecha_scraping",
+    "ciudad",
+    "precio",
+    "ambientes",
+    "bathrooms",
+    "area",
+    "url",
+    "moneda",
+    "titulo",
+    "ubicacion",
+)
+COLUMNAS_DICCIONARIO = ["ciudad", "moneda"]
+
+if HAY_PYARROW:
+    _TEXTO_REPETIDO = pa.dictionary(pa.int32(), pa.string())
+    ESQUEMA = pa.schema(
+        [
+            ("fecha_scraping", pa.timestamp("s")),
+            ("ciudad", _TEXTO_REPETIDO),
+            ("precio", pa.int64()),
+            ("ambientes", pa.int64()),
+            ("bathrooms", pa.int64()),
+            ("area", pa.float64()),
+            ("url", pa.string()),
+            ("moneda", _TEXTO_REPETIDO),
+            ("titulo", pa.string()),
+            ("ubicacion", pa.string()),
+        ]
+    )
+    PARTICIONES = ds.partitioning(
+        pa.schema([("zona", _TEXTO_REPETIDO), ("fecha", pa.date32())]),
+        flavor="hive",
+        dictionaries="infer",
+    )
+
+
+def _requerir_pyarrow():
+    if not HAY_PYARROW:
+        raise ImportError("Para leer o escribir Parquet hace falta pyarrow")
+
+
+def _precio_numerico(precio):
+    """'120.000' -> 120000; None, NaN o texto sin número -> None"""
+    if precio is None:
+        return None
+    if isinstance(precio, Number):
+        return None if math.isnan(precio) else int(precio)
+    digitos = str(precio).replace(".", "")
+    return int(digitos) if digitos.isdigit() else None
+
+
+def _fecha_scraping(valor):
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(valor)
+
+
+def _tabla(propiedades):
+    """Tabla con ESQUEMA a partir de dicts con el formato de extraer_data"""
+    columnas = {columna: [] for columna in COLUMNAS_ARCHIVO}
+    for prop in propiedades:
+        for columna in COLUMNAS_ARCHIVO:
+            columnas[columna].append(prop.get(columna))
+    columnas["precio"] = [_precio_numerico(p) for p in columnas["precio"]]
+    columnas["fecha_scraping"] = [
+        _fecha_scraping(f) for f in columnas["fecha_scraping"]
+    ]
+    return pa.table(columnas, schema=ESQUEMA)
+
+
+def ruta_particion(raiz, zona, fecha):
+    """Directorio de la partición, con los valores codificados como en pyarrow"""
+    return os.path.join(raiz, f"zona={quote(zona, safe='')}", f"fecha={fecha}")
+
+
+class RespaldoParquet:
+    """
+    Sink de propiedades a Parquet, con la misma interfaz que RespaldoCSV
+
+    Cada página pasa a tablas Arrow apenas llega (una por partición zona,
+    fecha) y se escribe un row group cada `filas_por_grupo` filas por un
+    ParquetWriter abierto, así la memoria no crece con la corrida. Mientras
+    se escriben, los archivos llevan un punto adelante (pyarrow los ignora
+    al leer). En cada checkpoint, cada `segundos_por_archivo` y al cerrar,
+    se cierran con su footer y se renombran; lo que sigue va a archivos
+    nuevos. Un corte pierde como mucho lo escrito desde el último
+    checkpoint, que igual queda en el CSV.
+
+    Args:
+        raiz: Directorio del dataset
+        filas_por_grupo: Filas a juntar por partición antes de escribir
+        segundos_por_archivo: Intervalo entre checkpoints automáticos
+    """
+
+    def __init__(
+        self,
+        raiz,
+        filas_por_grupo=FILAS_POR_GRUPO,
+        segundos_por_archivo=SEGUNDOS_POR_ARCHIVO,
+    ):
+        _requerir_pyarrow()
+        self.raiz = raiz
+        self.filas_por_grupo = filas_por_grupo
+        self.segundos_por_archivo = segundos_por_archivo
+        self.filas = 0
+        self.archivos = []  # Archivos terminados en esta corrida
+        self._prefijo = f"parte-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self._tramo = 0  # Se incrementa en cada checkpoint
+        self._pendientes = {}  # (zona, fecha) -> tablas Arrow sin escribir
+        self._escritores = {}  # (zona, fecha) -> (ParquetWriter, ruta temporal)
+        self._ultimo_checkpoint = time.monotonic()
+
+    def escribir(self, propiedades):
+        """Agrega las propiedades de una página a su partición"""
+        por_particion = {}
+        for prop in propiedades:
+            clave = (prop["zona"], str(prop["fecha_scraping"])[:10])
+            por_particion.setdefault(clave, []).append(prop)
+        for clave, filas in por_particion.items():
+            pendientes = self._pendientes.setdefault(clave, [])
+            pendientes.append(_tabla(filas))
+            if sum(len(tabla) for tabla in pendientes) >= self.filas_por_grupo:
+                self._volcar(clave)
+        self.filas += len(propiedades)
+        if time.monotonic() - self._ultimo_checkpoint >= self.segundos_por_archivo:
+            self.checkpoint()
+
+    def _volcar(self, clave):
+        tablas = self._pendientes.pop(clave, None)
+        if not tablas:
+            return
+        if clave not in self._escritores:
+            directorio = ruta_particion(self.raiz, *clave)
+            os.makedirs(directorio, exist_ok=True)
+            nombre = f"{self._prefijo}-{self._tramo:04d}.parquet"
+            temporal = os.path.join(directorio, "." + nombre)
+            escritor = pq.ParquetWriter(
+                temporal,
+                ESQUEMA,
+                compression=COMPRESION,
+                use_dictionary=COLUMNAS_DICCIONARIO,
+            )
+            self._escritores[clave] = (escritor, temporal)
+        self._escritores[clave][0].write_table(
+            pa.concat_tables(tablas), row_group_size=self.filas_por_grupo
+        )
+
+    def checkpoint(self):
+        """Escribe lo pendiente y deja terminados los archivos abiertos"""
+        for clave in list(self._pendientes):
+            self._volcar(clave)
+        for escritor, temporal in self._escritores.values():
+            escritor.close()
+            directorio, nombre = os.path.split(temporal)
+            ruta = os.path.join(directorio, nombre[1:])
+            os.replace(temporal, ruta)
+            self.archivos.append(ruta)
+        if self._escritores:
+            self._tramo += 1
+        self._escritores = {}
+        self._ultimo_checkpoint = time.monotonic()
+
+    def cerrar(self):
+        self.checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def particiones(self):
+        """Particiones con algún archivo terminado en esta corrida"""
+        return len({os.path.dirname(ruta) for ruta in self.archivos})
+
+    def imprimir_resumen(self):
+        if not self.archivos:
+            return
+        tamano = sum(os.path.getsize(ruta) for ruta in self.archivos)
+        print(
+            f"🧱 Parquet: {self.filas:,} filas en {len(self.archivos)} archivos, "
+            f"{self.particiones()} particiones ({tamano / 1024 / 1024:.1f} MB) "
+            f"en {self.raiz}"
+        )
+
+
+def escribir_dataset(df, raiz):
+    """
+    Reemplaza el dataset en `raiz` por el contenido de un DataFrame
+
+    El DataFrame necesita zona y fecha_scraping; las columnas de
+    COLUMNAS_ARCHIVO que falten quedan en nulo.
+    """
+    _requerir_pyarrow()
+    if os.path.exists(raiz):
+        shutil.rmtree(raiz)
+    # Los NaN de pandas pasan a nulos, así las columnas enteras siguen enteras
+    df = df.astype(object).where(df.notna(), None)
+    with RespaldoParquet(raiz, filas_por_grupo=max(len(df), 1)) as sink:
+        # Ordenado, así cada partición se escribe en un solo row group
+        sink.escribir(df.sort_values(["zona", "fecha_scraping"]).to_dict("records"))
+    return sink
+
+
+def existe_dataset(raiz):
+    """True si hay pyarrow y al menos un archivo terminado en `raiz`"""
+    if not HAY_PYARROW or not os.path.isdir(raiz):
+        return False
+    for _, _, archivos in os.walk(raiz):
+        if any(a.endswith(".parquet") and not a.startswith(".") for a in archivos):
+            return True
+    return False
+
+
+def leer_dataset(raiz, columnas=None, filtros=None):
+    """
+    Lee el dataset como DataFrame, con proyección y filtros empujados
+
+    Args:
+        raiz: Directorio del dataset
+        columnas: Columnas a leer (incluidas zona y fecha); None para todas
+        filtros: Lista de (columna, operador, valor) que deben cumplirse
+            todas, como en pandas.read_parquet: [("zona", "==", "GBA Norte"),
+            ("fecha", ">=", date(2026, 1, 1))]
+
+    Returns:
+        DataFrame; zona, ciudad y moneda como category
+    """
+    _requerir_pyarrow()
+    dataset = ds.dataset(raiz, format="parquet", partitioning=PARTICIONES)
+    filtro = pq.filters_to_expression(filtros) if filtros else None
+    return dataset.to_table(columns=columnas, filter=filtro).to_pandas()
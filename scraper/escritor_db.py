@@ -0,0 +1,320 @@
+"""
+Escritor de propiedades a SQLite por lotes
+
+Mantiene una sola conexión abierta toda la corrida, en modo WAL (el dashboard
+puede leer mientras se escribe), y escribe con executemany confirmando cada
+`tamano_lote` filas en lugar de cada página.
+
+Cada fila es un upsert sobre la URL: una publicación nueva se inserta con
+first_seen = last_seen; una ya conocida solo mueve last_seen y, si cambió
+precio/área/ambientes/baños, el trigger de esquema_db agrega la fila de
+historial.
+
+El progreso del recorrido (crawl_state / crawl_ciudades) se encola junto
+con las filas y se escribe en la misma transacción.
+"""
+
+import sqlite3
+
+from esquema_db import asegurar_esquema
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # Seguro en WAL; fsync solo en checkpoints
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # ~20 MB de cache de páginas
+    "PRAGMA busy_timeout=30000",  # Con varios workers el commit puede esperar
+]
+
+SQL_INSERT = """
+    INSERT OR IGNORE INTO propiedades
+    (fecha_scraping, zona, ciudad, precio, ambientes, bathrooms, area, url, precio_por_m2)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_MARCAR_PAGINA = """
+    INSERT OR REPLACE INTO crawl_state (zona, ciudad, pagina, propiedades, fecha)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+SQL_PLAN_CIUDAD = """
+    INSERT INTO crawl_ciudades (zona, ciudad, paginas_total) VALUES (?, ?, ?)
+    ON CONFLICT(zona, ciudad) DO UPDATE SET paginas_total = excluded.paginas_total
+"""
+
+SQL_TERMINAR_CIUDAD = """
+    INSERT INTO crawl_ciudades (zona, ciudad, terminada) VALUES (?, ?, 1)
+    ON CONFLICT(zona, ciudad) DO UPDATE SET terminada = 1
+"""
+
+# Si en la página nueva falta algún dato opcional se conserva el anterior.
+# El WHERE evita retroceder last_seen al hacer replay de páginas viejas.
+SQL_UPSERT = """
+    INSERT INTO propiedades
+    (fecha_scraping, zona, ciudad, precio, ambientes, bathrooms, area, url,
+     precio_por_m2, first_seen, last_seen)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?1, ?1)
+    ON CONFLICT(url) DO UPDATE SET
+        last_seen = excluded.last_seen,
+        precio = excluded.precio,
+        ambientes = COALESCE(excluded.ambientes, ambientes),
+        bathrooms = COALESCE(excluded.bathrooms, bathrooms),
+        area = COALESCE(excluded.area, area),
+        precio_por_m2 = CASE
+            WHEN COALESCE(excluded.area, area) > 0
+            THEN ROUND(CAST(excluded.precio AS REAL) / COALESCE(excluded.area, area), 2)
+        END
+    WHERE excluded.last_seen >= COALESCE(last_seen, '')
+"""
+
+
+def normalizar_propiedad(prop):
+    """
+    Valida y convierte un dict de extraer_data a la fila de la tabla
+
+    Returns:
+        Tupla en el orden de SQL_INSERT, o None si la propiedad no tiene
+        precio válido o URL
+    """
+    # Verificar que tenga al menos precio y url (mínimo indispensable)
+    precio = prop.get("precio")
+    url = prop.get("url")
+    if not precio or not url:
+        return None
+
+    # Verificar que el precio sea un número válido
+    try:
+        # Limpiar precio (quitar puntos de separador de miles argentinos)
+        precio_val = int(str(precio).replace(".", "").replace(",", "").strip())
+        if precio_val <= 0:
+            return None
+    except (ValueError, TypeError):
+        return None
+
+    # Convertir valores opcionales (pueden ser None)
+    ambientes = prop.get("ambientes")
+    bathrooms = prop.get("bathrooms")
+    area = prop.get("area")
+    try:
+        amb_val = int(ambientes) if ambientes else None
+        banos_val = int(bathrooms) if bathrooms else None
+        area_val = int(area) if area else None
+    except (ValueError, TypeError):
+        amb_val = None
+        banos_val = None
+        area_val = None
+
+    # Calcular precio_por_m2 solo si tenemos área
+    precio_por_m2 = None
+    if area_val and area_val > 0:
+        precio_por_m2 = round(precio_val / area_val, 2)
+
+    return (
+        prop.get("fecha_scraping"),
+        prop.get("zona"),
+        prop.get("ciudad"),
+        precio_val,
+        amb_val,
+        banos_val,
+        area_val,
+        url,
+        precio_por_m2,
+    )
+
+
+class EscritorDB:
+    """
+    Inserta propiedades por lotes con una conexión de larga vida
+
+    Args:
+        db_path: Ruta a la base SQLite
+        tamano_lote: Filas pendientes a partir de las cuales se hace commit
+        urls_conocidas: URLsConocidas opcional; si está, los duplicados se
+            descartan en memoria y los conteos por página son exactos sin
+            esperar al commit
+    """
+
+    def __init__(self, db_path, tamano_lote=500, urls_conocidas=None):
+        self.db_path = db_path
+        self.tamano_lote = tamano_lote
+        self.urls_conocidas = urls_conocidas
+        self.conn = sqlite3.connect(db_path)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        asegurar_esquema(self.conn)
+        self.snapshots = self._asegurar_url_unica()
+        self.sql = SQL_UPSERT if self.snapshots else SQL_INSERT
+
+        self.pendientes = []  # Filas sin insertar todavía
+        self.progreso = []  # (sql, params) a correr en el mismo commit
+        self.al_confirmar = []  # Callbacks a correr después del próximo commit
+        self.insertados = 0  # Publicaciones nuevas
+        self.vistas = 0  # Publicaciones ya conocidas vueltas a ver
+        self.cambios = 0  # Filas agregadas a historial_precios
+        self.commits = 0
+
+    def _asegurar_url_unica(self):
+        # El upsert necesita un índice UNIQUE sobre url; las bases creadas con
+        # data/crear_db.py no lo traen
+        try:
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_url_unica ON propiedades(url)"
+            )
+            return True
+        except sqlite3.IntegrityError:
+            print(
+                "⚠️  Hay URLs duplicadas en la base: no se pudo crear el índice "
+                "único. Se insertan solo URLs nuevas, sin historial de cambios"
+            )
+            return False
+
+    def agregar(self, propiedades, al_confirmar=None, pagina=None):
+        """
+        Encola las propiedades de una página
+
+        Args:
+            propiedades: Lista de dicts de extraer_data
+            al_confirmar: Callback opcional que se llama cuando estas filas
+                quedan confirmadas en la base
+            pagina: (zona, ciudad, pagina, fecha) opcional; si está, la página
+                se marca como hecha en crawl_state en el mismo commit
+
+        Returns:
+            (nuevas, omitidas). Sin urls_conocidas no se puede distinguir una
+            URL nueva de una conocida antes del commit, y se devuelven todas
+            las filas encoladas como nuevas.
+        """
+        nuevas = 0
+        omitidas = 0
+        vistas = 0
+        urls_conocidas = self.urls_conocidas
+        encolar = self.pendientes.append
+        # Un cursor por página, no por fila: solo el modo bloom lo usa
+        cursor = self.conn.cursor() if urls_conocidas is not None else None
+        for prop in propiedades:
+            fila = normalizar_propiedad(prop)
+            if fila is None:
+                omitidas += 1
+                continue
+            if urls_conocidas is not None:
+                url = fila[7]
+                if urls_conocidas.contiene(url, cursor):
+                    # Conocida: con snapshots igual se escribe para mover last_seen
+                    vistas += 1
+                    if self.snapshots:
+                        encolar(fila)
+                    continue
+                urls_conocidas.agregar(url)
+            encolar(fila)
+            nuevas += 1
+        self.vistas += vistas
+
+        if pagina is not None:
+            zona, ciudad, numero, fecha = pagina
+            self.en_mismo_commit(
+                SQL_MARCAR_PAGINA, (zona, ciudad, numero, len(propiedades), fecha)
+            )
+        if al_confirmar:
+            self.al_proximo_commit(al_confirmar)
+        if len(self.pendientes) >= self.tamano_lote:
+            self.confirmar()
+        return nuevas, omitidas
+
+    def en_mismo_commit(self, sql, params=()):
+        """Encola una sentencia para la transacción de lo encolado hasta ahora"""
+        self.progreso.append((sql, params))
+
+    def planificar_ciudad(self, zona, ciudad, paginas_total):
+        """Registra cuántas páginas tiene la ciudad (en el próximo commit)"""
+        self.en_mismo_commit(SQL_PLAN_CIUDAD, (zona, ciudad, paginas_total))
+
+    def terminar_ciudad(self, zona, ciudad):
+        """Marca la ciudad como recorrida (en el próximo commit)"""
+        self.en_mismo_commit(SQL_TERMINAR_CIUDAD, (zona, ciudad))
+
+    def estado_crawl(self):
+        """
+        Lee el progreso guardado de una corrida que no terminó
+
+        Returns:
+            (paginas_hechas, ciudades): dict (zona, ciudad) -> set de páginas
+            ya guardadas, y dict (zona, ciudad) -> (paginas_total, terminada)
+        """
+        paginas_hechas = {}
+        for zona, ciudad, pagina in self.conn.execute(
+            "SELECT zona, ciudad, pagina FROM crawl_state"
+        ):
+            paginas_hechas.setdefault((zona, ciudad), set()).add(pagina)
+        ciudades = {
+            (zona, ciudad): (paginas_total, bool(terminada))
+            for zona, ciudad, paginas_total, terminada in self.conn.execute(
+                "SELECT zona, ciudad, paginas_total, terminada FROM crawl_ciudades"
+            )
+        }
+        return paginas_hechas, ciudades
+
+    def borrar_estado_crawl(self):
+        """Olvida el progreso (la corrida terminó o se pidió --reset)"""
+        self.confirmar()
+        with self.conn:
+            self.conn.execute("DELETE FROM crawl_state")
+            self.conn.execute("DELETE FROM crawl_ciudades")
+
+    def al_proximo_commit(self, callback):
+        """Programa un callback para cuando se confirme lo encolado hasta ahora"""
+        self.al_confirmar.append(callback)
+
+    def confirmar(self):
+        """Inserta lo pendiente en una transacción y corre los callbacks"""
+        if self.pendientes or self.progreso:
+            try:
+                with self.conn:
+                    # Con el lock de escritura tomado desde el principio ningún
+                    # otro worker escribe en el medio: lo que se cuenta es del lote
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    ultimos = self._ultimos_ids()
+                    self.conn.executemany(self.sql, self.pendientes)
+                    for sql, params in self.progreso:
+                        self.conn.execute(sql, params)
+                    insertados, cambios = self._contar_nuevas(ultimos)
+            except sqlite3.Error:
+                if self.urls_conocidas is not None:
+                    self.urls_conocidas.descartar_pendientes()
+                raise
+            if self.urls_conocidas is not None:
+                self.urls_conocidas.confirmar_pendientes()
+            self.insertados += insertados
+            self.cambios += cambios
+            self.commits += 1
+            self.pendientes = []
+            self.progreso = []
+
+        callbacks, self.al_confirmar = self.al_confirmar, []
+        for callback in callbacks:
+            callback()
+
+    def _ultimos_ids(self):
+        # MAX(id) es una búsqueda en el índice, no un recorrido de la tabla
+        return self.conn.execute(
+            "SELECT (SELECT COALESCE(MAX(id), 0) FROM propiedades), "
+            "(SELECT COALESCE(MAX(id), 0) FROM historial_precios)"
+        ).fetchone()
+
+    def _contar_nuevas(self, ultimos):
+        # Se cuentan las filas y no la diferencia de ids: con AUTOINCREMENT
+        # los ids saltan si antes se borraron las últimas filas
+        return self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM propiedades WHERE id > ?), "
+            "(SELECT COUNT(*) FROM historial_precios WHERE id > ?)",
+            ultimos,
+        ).fetchone()
+
+    def cerrar(self):
+        self.confirmar()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,398 @@
+"""
+Esquema compartido de la base de propiedades y sus migraciones
+
+Solo usa la librería estándar para que lo puedan importar tanto los
+scrapers como los scripts de data/ y el dashboard.
+
+Modelo de snapshots: `propiedades` guarda el estado actual de cada
+publicación con first_seen/last_seen, y `historial_precios` recibe filas
+solo cuando cambia precio, área, ambientes o baños (lo hace un trigger).
+
+Progreso del scraper incremental: `crawl_state` tiene una fila por página
+ya guardada y `crawl_ciudades` el plan y el estado de cada ciudad. Se
+escriben en la misma transacción que las propiedades de la página, así un
+corte nunca deja el progreso adelantado ni atrasado respecto de los datos.
+
+Cola de trabajo de worker.py: `trabajos` tiene una fila por página a
+descargar, con el worker que la tomó y hasta cuándo vale su lease.
+
+Rotación por ciudad: `churn_ciudades` guarda cuántas publicaciones nuevas
+rindió cada ciudad en sus visitas (ver planificador_churn.py).
+
+Resúmenes: `resumen_ciudades` tiene por ciudad la cantidad de propiedades y,
+para precio, área y precio por m², cantidad de valores, suma, suma de
+cuadrados, mínimo y máximo. Lo mantienen triggers en cada INSERT, UPDATE y
+DELETE de propiedades; al borrar o cambiar el valor que era el mínimo o el
+máximo se recalcula solo ese extremo, para esa ciudad. Las vistas
+`resumen_zonas` y `resumen_global` suman las ciudades, así las métricas del
+dashboard cuestan O(ciudades) y no O(filas).
+
+Generación de los datos: `version_datos` tiene un contador que incrementa
+todo lo que reescribe filas sin pasar por el upsert (limpiar_db). El cache
+del dashboard solo sigue altas y cambios con historial, y cuando cambia la
+generación recarga todo.
+"""
+
+SQL_HISTORIAL = """
+    CREATE TABLE IF NOT EXISTS historial_precios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        propiedad_id INTEGER NOT NULL,
+        fecha TEXT NOT NULL,
+        precio INTEGER,
+        area INTEGER,
+        ambientes INTEGER,
+        bathrooms INTEGER
+    )
+"""
+
+# Al primer cambio se guarda también el estado con el que se vio la
+# publicación por primera vez, así la serie queda completa
+SQL_TRIGGER_HISTORIAL = """
+    CREATE TRIGGER IF NOT EXISTS trg_historial_precios
+    AFTER UPDATE OF precio, area, ambientes, bathrooms ON propiedades
+    WHEN OLD.precio IS NOT NEW.precio
+        OR OLD.area IS NOT NEW.area
+        OR OLD.ambientes IS NOT NEW.ambientes
+        OR OLD.bathrooms IS NOT NEW.bathrooms
+    BEGIN
+        INSERT INTO historial_precios
+            (propiedad_id, fecha, precio, area, ambientes, bathrooms)
+        SELECT OLD.id, COALESCE(OLD.first_seen, OLD.fecha_scraping),
+               OLD.precio, OLD.area, OLD.ambientes, OLD.bathrooms
+        WHERE NOT EXISTS (
+            SELECT 1 FROM historial_precios WHERE propiedad_id = OLD.id
+        );
+
+        INSERT INTO historial_precios
+            (propiedad_id, fecha, precio, area, ambientes, bathrooms)
+        VALUES (NEW.id, NEW.last_seen, NEW.precio, NEW.area,
+                NEW.ambientes, NEW.bathrooms);
+    END
+"""
+
+
+SQL_CRAWL_STATE = """
+    CREATE TABLE IF NOT EXISTS crawl_state (
+        zona TEXT NOT NULL,
+        ciudad TEXT NOT NULL,
+        pagina INTEGER NOT NULL,
+        propiedades INTEGER NOT NULL,
+        fecha TEXT NOT NULL,
+        PRIMARY KEY (zona, ciudad, pagina)
+    ) WITHOUT ROWID
+"""
+
+# paginas_total es NULL si la página 1 no traía el contador de resultados
+SQL_CRAWL_CIUDADES = """
+    CREATE TABLE IF NOT EXISTS crawl_ciudades (
+        zona TEXT NOT NULL,
+        ciudad TEXT NOT NULL,
+        paginas_total INTEGER,
+        terminada INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (zona, ciudad)
+    ) WITHOUT ROWID
+"""
+
+SQL_VERSION_DATOS = """
+    CREATE TABLE IF NOT EXISTS version_datos (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generacion INTEGER NOT NULL
+    )
+"""
+
+
+# estado: pendiente -> tomado -> hecho, o fallido tras MAX_INTENTOS_TRABAJO.
+# lease_hasta es epoch en segundos; un "tomado" vencido se puede volver a tomar
+SQL_TRABAJOS = """
+    CREATE TABLE IF NOT EXISTS trabajos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        zona TEXT NOT NULL,
+        ciudad TEXT NOT NULL,
+        pagina INTEGER NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'pendiente',
+        worker TEXT,
+        lease_hasta REAL,
+        intentos INTEGER NOT NULL DEFAULT 0,
+        propiedades INTEGER,
+        error TEXT,
+        actualizado TEXT,
+        UNIQUE (zona, ciudad, pagina)
+    )
+"""
+
+
+SQL_CHURN_CIUDADES = """
+    CREATE TABLE IF NOT EXISTS churn_ciudades (
+        zona TEXT NOT NULL,
+        ciudad TEXT NOT NULL,
+        ultima_visita TEXT NOT NULL,
+        visitas INTEGER NOT NULL,
+        paginas INTEGER,
+        nuevas_por_dia REAL,
+        nuevas_por_pagina REAL,
+        inicio_ventana TEXT,
+        nuevas_ventana INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (zona, ciudad)
+    ) WITHOUT ROWID
+"""
+
+
+# (métrica en el resumen, columna de propiedades)
+METRICAS_RESUMEN = (("precio", "precio"), ("area", "area"), ("m2", "precio_por_m2"))
+
+SQL_RESUMEN_CIUDADES = (
+    """
+    CREATE TABLE IF NOT EXISTS resumen_ciudades (
+        zona TEXT NOT NULL,
+        ciudad TEXT NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+"""
+    + "".join(f"""        n_{m} INTEGER NOT NULL DEFAULT 0,
+        suma_{m} REAL NOT NULL DEFAULT 0,
+        suma2_{m} REAL NOT NULL DEFAULT 0,
+        min_{m} REAL,
+        max_{m} REAL,
+""" for m, _ in METRICAS_RESUMEN)
+    + """        PRIMARY KEY (zona, ciudad)
+    ) WITHOUT ROWID
+"""
+)
+
+
+def _agregados_resumen(desde, agrupar):
+    """SELECT de cantidad y métricas sobre `desde` (propiedades o el resumen)"""
+    if desde == "propiedades":
+        # TOTAL y no SUM: una ciudad sin ningún valor suma 0, no NULL
+        partes = [
+            f"COUNT({c}) AS n_{m}, TOTAL({c}) AS suma_{m}, "
+            f"TOTAL({c} * CAST({c} AS REAL)) AS suma2_{m}, "
+            f"MIN({c}) AS min_{m}, MAX({c}) AS max_{m}"
+            for m, c in METRICAS_RESUMEN
+        ]
+        cantidad = "COUNT(*) AS cantidad"
+    else:
+        partes = [
+            f"SUM(n_{m}) AS n_{m}, SUM(suma_{m}) AS suma_{m}, "
+            f"SUM(suma2_{m}) AS suma2_{m}, MIN(min_{m}) AS min_{m}, "
+            f"MAX(max_{m}) AS max_{m}"
+            for m, _ in METRICAS_RESUMEN
+        ]
+        cantidad = "SUM(cantidad) AS cantidad"
+    grupo = f"{agrupar}, " if agrupar else ""
+    agrupado = f" GROUP BY {agrupar}" if agrupar else ""
+    return f"SELECT {grupo}{cantidad}, {', '.join(partes)} FROM {desde}{agrupado}"
+
+
+def _sumar_fila(fila):
+    """SET que agrega los valores de NEW u OLD a la ciudad"""
+    partes = []
+    for m, c in METRICAS_RESUMEN:
+        v = f"{fila}.{c}"
+        partes.append(
+            f"n_{m} = n_{m} + ({v} IS NOT NULL), "
+            f"suma_{m} = suma_{m} + COALESCE({v}, 0), "
+            f"suma2_{m} = suma2_{m} + COALESCE({v} * CAST({v} AS REAL), 0), "
+            f"min_{m} = COALESCE(MIN(min_{m}, {v}), min_{m}, {v}), "
+            f"max_{m} = COALESCE(MAX(max_{m}, {v}), max_{m}, {v})"
+        )
+    return "cantidad = cantidad + 1, " + ", ".join(partes)
+
+
+def _restar_fila(fila):
+    """SET que quita los valores de OLD; un extremo que se va se recalcula"""
+    partes = []
+    for m, c in METRICAS_RESUMEN:
+        v = f"{fila}.{c}"
+        ciudad = f"zona = {fila}.zona AND ciudad = {fila}.ciudad"
+        partes.append(
+            f"n_{m} = n_{m} - ({v} IS NOT NULL), "
+            f"suma_{m} = suma_{m} - COALESCE({v}, 0), "
+            f"suma2_{m} = suma2_{m} - COALESCE({v} * CAST({v} AS REAL), 0), "
+            f"min_{m} = CASE WHEN {v} <= min_{m} "
+            f"THEN (SELECT MIN({c}) FROM propiedades WHERE {ciudad}) "
+            f"ELSE min_{m} END, "
+            f"max_{m} = CASE WHEN {v} >= max_{m} "
+            f"THEN (SELECT MAX({c}) FROM propiedades WHERE {ciudad}) "
+            f"ELSE max_{m} END"
+        )
+    return "cantidad = cantidad - 1, " + ", ".join(partes)
+
+
+def _sql_sumar(fila):
+    # Sin OR IGNORE: dentro de un trigger manda el conflicto de la sentencia
+    # de afuera, y el upsert de EscritorDB lo convertiría en error
+    return f"""
+        INSERT INTO resumen_ciudades (zona, ciudad)
+        SELECT {fila}.zona, {fila}.ciudad
+        WHERE NOT EXISTS (
+            SELECT 1 FROM resumen_ciudades
+            WHERE zona = {fila}.zona AND ciudad = {fila}.ciudad
+        );
+        UPDATE resumen_ciudades SET {_sumar_fila(fila)}
+        WHERE zona = {fila}.zona AND ciudad = {fila}.ciudad;
+    """
+
+
+def _sql_restar(fila):
+    return f"""
+        UPDATE resumen_ciudades SET {_restar_fila(fila)}
+        WHERE zona = {fila}.zona AND ciudad = {fila}.ciudad;
+        DELETE FROM resumen_ciudades
+        WHERE zona = {fila}.zona AND ciudad = {fila}.ciudad AND cantidad <= 0;
+    """
+
+
+# Los extremos se recalculan en AFTER: la fila ya no está (DELETE) o ya
+# tiene el valor nuevo (UPDATE), que después se vuelve a sumar
+SQL_TRIGGERS_RESUMEN = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumen_insert AFTER INSERT ON propiedades
+    BEGIN {_sql_sumar("NEW")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumen_delete AFTER DELETE ON propiedades
+    BEGIN {_sql_restar("OLD")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumen_update
+    AFTER UPDATE OF zona, ciudad, {", ".join(c for _, c in METRICAS_RESUMEN)}
+    ON propiedades
+    WHEN OLD.zona IS NOT NEW.zona OR OLD.ciudad IS NOT NEW.ciudad
+        OR {" OR ".join(f"OLD.{c} IS NOT NEW.{c}" for _, c in METRICAS_RESUMEN)}
+    BEGIN {_sql_restar("OLD")} {_sql_sumar("NEW")} END
+    """,
+]
+
+SQL_VISTAS_RESUMEN = [
+    "CREATE VIEW IF NOT EXISTS resumen_zonas AS "
+    + _agregados_resumen("resumen_ciudades", "zona"),
+    "CREATE VIEW IF NOT EXISTS resumen_global AS "
+    + _agregados_resumen("resumen_ciudades", None),
+]
+
+
+def columnas(conn, tabla):
+    """Devuelve el set de columnas de una tabla"""
+    return {fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")}
+
+
+def migrar_snapshots(conn):
+    """
+    Agrega first_seen/last_seen a propiedades y crea historial_precios
+
+    Es idempotente: se puede llamar en cada arranque.
+    """
+    existentes = columnas(conn, "propiedades")
+    with conn:
+        for columna in ("first_seen", "last_seen"):
+            if columna not in existentes:
+                conn.execute(f"ALTER TABLE propiedades ADD COLUMN {columna} TEXT")
+                conn.execute(
+                    f"UPDATE propiedades SET {columna} = fecha_scraping "
+                    f"WHERE {columna} IS NULL"
+                )
+
+        conn.execute(SQL_HISTORIAL)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_historial_propiedad "
+            "ON historial_precios(propiedad_id)"
+        )
+        conn.execute(SQL_TRIGGER_HISTORIAL)
+
+
+def migrar_crawl_state(conn):
+    """Crea las tablas de progreso del scraper (idempotente)"""
+    with conn:
+        conn.execute(SQL_CRAWL_STATE)
+        conn.execute(SQL_CRAWL_CIUDADES)
+
+
+def migrar_trabajos(conn):
+    """Crea la tabla de la cola de trabajo (idempotente)"""
+    with conn:
+        conn.execute(SQL_TRABAJOS)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_trabajos_estado "
+            "ON trabajos(estado, pagina)"
+        )
+
+
+def migrar_churn(conn):
+    """Crea la tabla de rotación por ciudad (idempotente)"""
+    with conn:
+        conn.execute(SQL_CHURN_CIUDADES)
+        existentes = columnas(conn, "churn_ciudades")
+        if "inicio_ventana" not in existentes:
+            conn.execute("ALTER TABLE churn_ciudades ADD COLUMN inicio_ventana TEXT")
+        if "nuevas_ventana" not in existentes:
+            conn.execute(
+                "ALTER TABLE churn_ciudades "
+                "ADD COLUMN nuevas_ventana INTEGER NOT NULL DEFAULT 0"
+            )
+
+
+def migrar_version_datos(conn):
+    """Crea la tabla de generación de los datos (idempotente)"""
+    with conn:
+        conn.execute(SQL_VERSION_DATOS)
+        conn.execute(
+            "INSERT OR IGNORE INTO version_datos (id, generacion) VALUES (1, 0)"
+        )
+
+
+def marcar_reescritura(conn):
+    """Incrementa la generación, en la transacción abierta de la reescritura"""
+    conn.execute("UPDATE version_datos SET generacion = generacion + 1 WHERE id = 1")
+
+
+def agregados_propiedades(agrupar):
+    """
+    SELECT con las mismas columnas que el resumen, calculado sobre propiedades
+
+    Para leer una base que todavía no tiene las tablas de resumen sin
+    migrarla. `agrupar` es None, "zona" o "zona, ciudad".
+    """
+    return _agregados_resumen("propiedades", agrupar)
+
+
+def recalcular_resumenes(conn):
+    """Rearma resumen_ciudades desde cero con una pasada por propiedades"""
+    with conn:
+        conn.execute("DELETE FROM resumen_ciudades")
+        conn.execute(
+            "INSERT INTO resumen_ciudades "
+            + _agregados_resumen("propiedades", "zona, ciudad")
+        )
+
+
+def migrar_resumenes(conn):
+    """
+    Crea resumen_ciudades, sus triggers y vistas (idempotente)
+
+    La primera vez se llena con lo que ya hay en propiedades.
+    """
+    nueva = "resumen_ciudades" not in {
+        fila[0]
+        for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    with conn:
+        conn.execute(SQL_RESUMEN_CIUDADES)
+        # Para recalcular un extremo se recorre solo la ciudad
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_propiedades_zona_ciudad "
+            "ON propiedades(zona, ciudad)"
+        )
+        for sql in SQL_TRIGGERS_RESUMEN + SQL_VISTAS_RESUMEN:
+            conn.execute(sql)
+    if nueva:
+        recalcular_resumenes(conn)
+
+
+def asegurar_esquema(conn):
+    """Aplica todas las migraciones sobre una base que ya tiene propiedades"""
+    migrar_snapshots(conn)
+    migrar_crawl_state(conn)
+    migrar_trabajos(conn)
+    migrar_churn(conn)
+    migrar_resumenes(conn)
+    migrar_version_datos(conn)
@@ -0,0 +1,417 @@
+"""
+Motor de descarga asíncrono para los scrapers
+
+Mantiene varias requests en vuelo a la vez (una por ciudad) y regula el ritmo
+con un token bucket por host, en lugar de dormir un tiempo fijo antes de cada
+request. Si una zona empieza a fallar seguido, su disyuntor deja de pedirle
+páginas por un rato y las que quedaron sin pedir vuelven al final de la cola.
+Una ciudad vuelve a la cola como mucho MAX_REENCOLADAS_CIUDAD veces por
+recorrido; si el host sigue bloqueado, sus páginas quedan pendientes.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+
+from config import (
+    CONCURRENCIA_MAXIMA,
+    MAX_PAGINAS,
+    MAX_REENCOLADAS_CIUDAD,
+    RAFAGA_POR_HOST,
+    REQUESTS_POR_SEGUNDO,
+    calcular_paginas,
+)
+from http_client import TIMEOUT, descargar
+from processing import extraer_total_resultados
+from throttle import STATUS_FALLO, ControladorAIMD, Disyuntor, leer_retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket para limitar la tasa de requests contra un host
+
+    Se recargan `tasa` tokens por segundo hasta un máximo de `capacidad`.
+    Cada request consume un token; si no hay, se espera lo justo hasta
+    que se recargue uno.
+    """
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = capacidad
+        self.ultima_recarga = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    def ajustar_tasa(self, nueva):
+        """Cambia la tasa, contando lo ya recargado con la tasa anterior"""
+        self._recargar()
+        self.tasa = nueva
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        transcurrido = ahora - self.ultima_recarga
+        self.tokens = min(self.capacidad, self.tokens + transcurrido * self.tasa)
+        self.ultima_recarga = ahora
+
+    async def adquirir(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        # Cada recorrer() corre en su propio event loop (asyncio.run) y el
+        # Lock queda atado al loop en el que se usó por primera vez
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            while True:
+                self._recargar()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.tasa)
+
+
+class FetcherAsincrono:
+    """
+    Descarga páginas de varias ciudades en paralelo
+
+    Cada ciudad se recorre página por página (para poder cortar cuando una
+    página viene vacía), pero hasta `concurrencia` ciudades avanzan a la vez.
+    El ritmo contra cada host lo marca su token bucket, cuya tasa ajusta un
+    ControladorAIMD según los status y latencias observados. Cada (host, zona)
+    tiene además un Disyuntor: mientras está abierto no se le piden páginas y
+    las pendientes de sus ciudades se reencolan, hasta `max_reencoladas`
+    veces por ciudad. Después la ciudad se deja sin terminar y sus páginas
+    quedan en `pendientes`.
+    """
+
+    def __init__(
+        self,
+        concurrencia=CONCURRENCIA_MAXIMA,
+        tasa_por_host=REQUESTS_POR_SEGUNDO,
+        rafaga=RAFAGA_POR_HOST,
+        max_reintentos=3,
+        timeout=TIMEOUT,
+        archivo=None,
+        max_reencoladas=MAX_REENCOLADAS_CIUDAD,
+    ):
+        self.concurrencia = concurrencia
+        self.tasa_por_host = tasa_por_host
+        self.rafaga = rafaga
+        self.max_reintentos = max_reintentos
+        self.timeout = timeout
+        self.archivo = archivo  # ArchivoHTML opcional donde guardar cada página
+        self.max_reencoladas = max_reencoladas
+        self.hosts = {}  # host -> (TokenBucket, ControladorAIMD)
+        self.disyuntores = {}  # (host, zona) -> Disyuntor
+        self.reencoladas = 0  # Páginas devueltas a la cola por un disyuntor
+        self.veces_reencolada = {}  # (zona, ciudad) -> veces en este recorrido
+        self.pendientes = {}  # (zona, ciudad) -> páginas que no se pudieron pedir
+        self._executor = None
+
+    def tasa_actual(self):
+        """Requests por segundo que se están haciendo (suma de todos los hosts)"""
+        if not self.hosts:
+            return self.tasa_por_host
+        return sum(controlador.tasa for _, controlador in self.hosts.values())
+
+    def _host(self, url):
+        """Devuelve (creándolos si hace falta) el bucket y el controlador del host"""
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            bucket = TokenBucket(self.tasa_por_host, self.rafaga)
+            controlador = ControladorAIMD(
+                host, self.tasa_por_host, al_cambiar_tasa=bucket.ajustar_tasa
+            )
+            self.hosts[host] = (bucket, controlador)
+        return self.hosts[host]
+
+    def _disyuntor(self, url, zona=None):
+        clave = (urlparse(url).netloc, zona)
+        if clave not in self.disyuntores:
+            nombre = f"{clave[0]} {zona}" if zona else clave[0]
+            self.disyuntores[clave] = Disyuntor(nombre)
+        return self.disyuntores[clave]
+
+    async def obtener(self, url, zona=None):
+        """
+        Descarga una URL con reintentos, respetando el token bucket del host
+
+        No hay esperas fijas entre reintentos: cada fallo recorta la tasa del
+        host, y el bucket se encarga de espaciar el próximo intento. Si el
+        disyuntor de (host, zona) está abierto no se pide nada.
+
+        Returns:
+            HTML de la página o None si fallaron todos los intentos o el
+            disyuntor no dejó pedirla
+        """
+        loop = asyncio.get_running_loop()
+        bucket, controlador = self._host(url)
+        disyuntor = self._disyuntor(url, zona)
+
+        for intento in range(1, self.max_reintentos + 1):
+            if not disyuntor.permitir():
+                return None
+            pausa = controlador.pausa_hasta - time.monotonic()
+            if pausa > 0:
+                await asyncio.sleep(pausa)
+            await bucket.adquirir()
+
+            inicio = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(
+                    self._executor, descargar, url, self.timeout
+                )
+                controlador.registrar_respuesta(
+                    response.status_code,
+                    time.perf_counter() - inicio,
+                    leer_retry_after(response),
+                )
+
+                if response.status_code in STATUS_FALLO:
+                    disyuntor.registrar_fallo()
+                else:
+                    disyuntor.registrar_exito()  # El sitio respondió
+                if response.status_code == 200:
+                    return response.text
+
+                print(
+                    f"✗ Status {response.status_code} en {url} "
+                    f"(intento {intento}/{self.max_reintentos})"
+                )
+
+            except requests.exceptions.Timeout as e:
+                controlador.registrar_fallo("timeout")
+                disyuntor.registrar_fallo()
+                print(
+                    f"✗ Timeout en {url} (intento {intento}/{self.max_reintentos}): {e}"
+                )
+
+            except requests.exceptions.RequestException as e:
+                controlador.registrar_fallo("error de red")
+                disyuntor.registrar_fallo()
+                print(
+                    f"✗ Error de red en {url} (intento {intento}/{self.max_reintentos}): {e}"
+                )
+
+        print(f"✗ FALLÓ después de {self.max_reintentos} intentos: {url}")
+        return None
+
+    async def _recorrer_ciudad(
+        self, cola, zona, ciudad, paginas, generar_url, procesar
+    ):
+        """Devuelve False si la ciudad quedó reencolada a mitad de camino"""
+        paginas = list(paginas)
+        for i, pagina in enumerate(paginas):
+            url = generar_url(zona, ciudad, pagina)
+            html = await self.obtener(url, zona)
+            if html is None and self._disyuntor(url, zona).abierto():
+                veces = self.veces_reencolada.get((zona, ciudad), 0)
+                if veces >= self.max_reencoladas:
+                    # El host sigue bloqueado: no esperar más por esta ciudad
+                    print(
+                        f"    [{ciudad}] ⛔ Disyuntor abierto tras {veces} "
+                        f"reencoladas: {len(paginas) - i} páginas quedan pendientes"
+                    )
+                    self.pendientes.setdefault((zona, ciudad), []).extend(
+                        paginas[i:]
+                    )
+                    return False
+                self.veces_reencolada[(zona, ciudad)] = veces + 1
+                # La página no se perdió: vuelve a la cola con las que siguen
+                print(
+                    f"    [{ciudad}] ⏸️  Disyuntor abierto: {len(paginas) - i} "
+                    f"páginas vuelven a la cola"
+                )
+                cola.put_nowait((zona, ciudad, paginas[i:]))
+                self.reencoladas += len(paginas) - i
+                return False
+            fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if html is not None and self.archivo is not None:
+                self.archivo.guardar(url, html, zona, ciudad, pagina, fecha)
+            if not procesar(zona, ciudad, pagina, html, fecha):
+                break
+        return True
+
+    async def _siguiente(self, cola, generar_url):
+        """
+        Próxima tarea cuyo disyuntor deja pedir, o None si la cola está vacía
+
+        Las tareas de zonas con el disyuntor abierto se pasan al final; si
+        todas están frenadas se espera a la que se libere primero.
+        """
+        frenadas = []
+        while True:
+            try:
+                tarea = cola.get_nowait()
+            except asyncio.QueueEmpty:
+                tarea = None
+            if tarea is not None:
+                zona, ciudad, paginas = tarea
+                url = generar_url(zona, ciudad, next(iter(paginas), 1))
+                espera = self._disyuntor(url, zona).espera()
+                if espera <= 0:
+                    break
+                frenadas.append((espera, tarea))
+                continue
+            if not frenadas:
+                return None
+            # Todas frenadas: devolverlas y esperar la que se libera antes
+            for _, frenada in frenadas:
+                cola.put_nowait(frenada)
+            await asyncio.sleep(min(espera for espera, _ in frenadas))
+            frenadas = []
+        for _, frenada in frenadas:
+            cola.put_nowait(frenada)
+        return tarea
+
+    async def _worker(self, cola, generar_url, procesar, al_terminar_ciudad):
+        while True:
+            tarea = await self._siguiente(cola, generar_url)
+            if tarea is None:
+                return
+            zona, ciudad, paginas = tarea
+            terminada = await self._recorrer_ciudad(
+                cola, zona, ciudad, paginas, generar_url, procesar
+            )
+            if terminada and al_terminar_ciudad:
+                al_terminar_ciudad(zona, ciudad)
+
+    async def _recorrer(self, tareas, generar_url, procesar, al_terminar_ciudad):
+        self.veces_reencolada = {}
+        cola = asyncio.Queue()
+        for tarea in tareas:
+            cola.put_nowait(tarea)
+
+        workers = [
+            self._worker(cola, generar_url, procesar, al_terminar_ciudad)
+            for _ in range(min(self.concurrencia, len(tareas)))
+        ]
+        await asyncio.gather(*workers)
+
+    def recorrer(self, tareas, generar_url, procesar, al_terminar_ciudad=None):
+        """
+        Recorre todas las ciudades con hasta `concurrencia` requests en vuelo
+
+        Args:
+            tareas: Lista de (zona, ciudad, paginas) en orden de prioridad
+            generar_url: Función (zona, ciudad, pagina) -> URL
+            procesar: Callback (zona, ciudad, pagina, html, fecha) -> bool.
+                Recibe html=None si la descarga falló y la fecha de descarga
+                como texto. Si devuelve False se deja de paginar esa ciudad.
+            al_terminar_ciudad: Callback opcional (zona, ciudad) que se llama
+                cuando una ciudad termina de recorrerse. No se llama para las
+                ciudades que quedan en `pendientes`
+        """
+        if not tareas:
+            return
+
+        # Lo que quedó pendiente de un recorrido anterior se conserva, salvo
+        # las ciudades que se vuelven a recorrer ahora: si el disyuntor las
+        # frena otra vez, vuelven a entrar con las páginas que falten
+        for zona, ciudad, _ in tareas:
+            self.pendientes.pop((zona, ciudad), None)
+
+        with ThreadPoolExecutor(max_workers=self.concurrencia) as executor:
+            self._executor = executor
+            try:
+                asyncio.run(
+                    self._recorrer(tareas, generar_url, procesar, al_terminar_ciudad)
+                )
+            finally:
+                self._executor = None
+
+    def imprimir_resumen(self):
+        print("🚦 Control de tasa:")
+        for _, controlador in self.hosts.values():
+            controlador.imprimir_estado()
+        if any(d.total_aperturas for d in self.disyuntores.values()):
+            pendientes = sum(len(paginas) for paginas in self.pendientes.values())
+            print(
+                f"🔌 Disyuntores ({self.reencoladas} páginas reencoladas, "
+                f"{pendientes} pendientes):"
+            )
+            for disyuntor in self.disyuntores.values():
+                if disyuntor.total_aperturas:
+                    disyuntor.imprimir_estado()
+
+
+def planificar_recorrido(
+    fuente, ciudades, generar_url, procesar, leer_total=extraer_total_resultados
+):
+    """
+    Descarga la página 1 de cada ciudad y arma el plan exacto del resto
+
+    La página 1 trae el total de resultados, así que se sabe de antemano
+    cuántas páginas tiene cada ciudad en lugar de probar hasta MAX_PAGINAS.
+    Las páginas 1 se procesan con `procesar` como cualquier otra. Si el
+    disyuntor dejó la página 1 de una ciudad sin pedir (queda en los
+    `pendientes` de la fuente), la ciudad no entra en el plan: sin la página 1
+    no hay contador ni filas, y no se la puede dar por terminada.
+
+    Args:
+        fuente: FetcherAsincrono, ReproductorArchivo o PipelineScraping
+        ciudades: Lista de (zona, ciudad)
+        generar_url: Función (zona, ciudad, pagina) -> URL
+        procesar: El mismo callback que recibe `recorrer`
+        leer_total: Función que saca el total de resultados de lo que recibe
+            `procesar` (el HTML, o la PaginaParseada si la fuente es un
+            PipelineScraping)
+
+    Returns:
+        (tareas, paginas_por_ciudad): las tareas de la página 2 en adelante
+        para `recorrer`, y un dict (zona, ciudad) -> páginas totales (None si
+        no se pudo leer el contador; esas ciudades se recorren probando).
+        Las ciudades cuya página 1 no llegó a `procesar` no aparecen en
+        ninguno de los dos
+    """
+    paginas_por_ciudad = {}
+    continuar = {}
+
+    def procesar_primera(zona, ciudad, pagina, contenido, fecha):
+        total = leer_total(contenido) if contenido is not None else None
+        paginas_por_ciudad[(zona, ciudad)] = (
+            calcular_paginas(total) if total is not None else None
+        )
+        continuar[(zona, ciudad)] = procesar(zona, ciudad, pagina, contenido, fecha)
+        return continuar[(zona, ciudad)]
+
+    fuente.recorrer(
+        [(zona, ciudad, range(1, 2)) for zona, ciudad in ciudades],
+        generar_url,
+        procesar_primera,
+    )
+
+    tareas = []
+    for zona, ciudad in ciudades:
+        if (zona, ciudad) not in continuar:
+            continue  # Página 1 pendiente: se retoma en la próxima corrida
+        if not continuar[(zona, ciudad)]:
+            paginas = range(2, 2)  # La página 1 ya vino vacía
+        elif paginas_por_ciudad.get((zona, ciudad)) is None:
+            paginas = range(2, MAX_PAGINAS + 1)
+        else:
+            paginas = range(2, paginas_por_ciudad[(zona, ciudad)] + 1)
+        tareas.append((zona, ciudad, paginas))
+
+    return tareas, paginas_por_ciudad
+
+
+def imprimir_plan(tareas, paginas_por_ciudad, fuente):
+    """Muestra cuántas requests quedan, cuántas se evitan y el ETA"""
+    pendientes = sum(len(paginas) for _, _, paginas in tareas)
+    sin_contador = sum(1 for total in paginas_por_ciudad.values() if total is None)
+    a_ciegas = len(tareas) * (MAX_PAGINAS - 1)
+
+    print(f"\n🗺️  Plan: {pendientes:,} páginas más en {len(tareas)} ciudades")
+    print(
+        f"   (probando hasta la página {MAX_PAGINAS} serían hasta {a_ciegas:,}; "
+        f"{sin_contador} ciudades sin contador de resultados)"
+    )
+    if hasattr(fuente, "tasa_actual"):
+        tasa = fuente.tasa_actual()
+        print(f"   ETA: ~{pendientes / tasa / 60:.0f} min a {tasa:.2f} req/s\n")
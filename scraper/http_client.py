@@ -0,0 +1,169 @@
+"""
+Cliente HTTP compartido por los scrapers
+
+Una única sesión de requests con pool de conexiones keep-alive (se reutiliza
+la conexión TCP+TLS entre páginas), compresión gzip/brotli negociada y
+contabilidad de bytes y latencia por request.
+"""
+
+import math
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import CONCURRENCIA_MAXIMA
+
+try:
+    import brotli  # noqa: F401  (urllib3 lo usa para decodificar "br")
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+HEADERS = {
+    "User-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Mobile Safari/537.36",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+TIMEOUT = 15  # Segundos
+
+# Histograma de latencias en escala logarítmica, de 1 ms a ~2 min en cubetas
+# de 5%: los percentiles salen con ese error y la memoria no crece con la
+# cantidad de requests
+LATENCIA_MINIMA = 0.001
+FACTOR_CUBETA = 1.05
+CUBETAS_LATENCIA = 240
+
+
+class EstadisticasHTTP:
+    """Acumula bytes y latencias de todas las requests hechas con el cliente"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errores = 0
+        self.bytes_red = 0  # Bytes recibidos por la red (comprimidos)
+        self.bytes_html = 0  # Bytes ya descomprimidos
+        self.latencia_total = 0.0  # Segundos sumando todas las requests
+        self.latencia_maxima = 0.0
+        self.cubetas = [0] * CUBETAS_LATENCIA  # Requests por rango de latencia
+
+    @staticmethod
+    def _cubeta(latencia):
+        """Cubeta i: latencias hasta LATENCIA_MINIMA * FACTOR_CUBETA**i"""
+        if latencia <= LATENCIA_MINIMA:
+            return 0
+        i = math.ceil(math.log(latencia / LATENCIA_MINIMA, FACTOR_CUBETA))
+        return min(i, CUBETAS_LATENCIA - 1)
+
+    def registrar(self, bytes_red, bytes_html, latencia):
+        with self._lock:
+            self.requests += 1
+            self.bytes_red += bytes_red
+            self.bytes_html += bytes_html
+            self.latencia_total += latencia
+            self.latencia_maxima = max(self.latencia_maxima, latencia)
+            self.cubetas[self._cubeta(latencia)] += 1
+
+    def _percentil(self, fraccion):
+        """Límite superior de la cubeta del percentil (con el lock tomado)"""
+        posicion = int(self.requests * fraccion)
+        acumuladas = 0
+        for i, cantidad in enumerate(self.cubetas):
+            acumuladas += cantidad
+            if acumuladas > posicion:
+                return min(LATENCIA_MINIMA * FACTOR_CUBETA**i, self.latencia_maxima)
+        return self.latencia_maxima
+
+    def registrar_error(self):
+        with self._lock:
+            self.errores += 1
+
+    def resumen(self):
+        """Devuelve un dict con los totales y percentiles de latencia"""
+        with self._lock:
+            resumen = {
+                "requests": self.requests,
+                "errores": self.errores,
+                "bytes_red": self.bytes_red,
+                "bytes_html": self.bytes_html,
+                "latencia_media": 0.0,
+                "latencia_p50": 0.0,
+                "latencia_p95": 0.0,
+            }
+            if self.requests:
+                resumen["latencia_media"] = self.latencia_total / self.requests
+                resumen["latencia_p50"] = self._percentil(0.5)
+                resumen["latencia_p95"] = self._percentil(0.95)
+        return resumen
+
+    def imprimir_resumen(self):
+        r = self.resumen()
+        print("📡 Tráfico HTTP:")
+        print(f"   Requests: {r['requests']:,} ({r['errores']} errores de red)")
+        if r["requests"] == 0:
+            return
+        ratio = r["bytes_html"] / r["bytes_red"] if r["bytes_red"] else 0
+        print(
+            f"   Descargado: {r['bytes_red'] / 1e6:.1f} MB por la red, "
+            f"{r['bytes_html'] / 1e6:.1f} MB de HTML (compresión {ratio:.1f}x)"
+        )
+        print(
+            f"   Latencia: media {r['latencia_media']:.2f}s | "
+            f"p50 {r['latencia_p50']:.2f}s | p95 {r['latencia_p95']:.2f}s"
+        )
+
+
+ESTADISTICAS = EstadisticasHTTP()
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def crear_sesion(tamano_pool=CONCURRENCIA_MAXIMA):
+    """Crea una sesión con pool keep-alive de `tamano_pool` conexiones por host"""
+    sesion = requests.Session()
+    sesion.headers.update(HEADERS)
+    adaptador = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+
+def obtener_sesion():
+    """Devuelve la sesión compartida, creándola la primera vez"""
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            _sesion = crear_sesion()
+        return _sesion
+
+
+def descargar(url, timeout=TIMEOUT):
+    """
+    Hace un GET con la sesión compartida y registra bytes y latencia
+
+    Returns:
+        El objeto Response de requests (con el contenido ya leído)
+
+    Raises:
+        requests.exceptions.RequestException si falla la conexión
+    """
+    inicio = time.perf_counter()
+    try:
+        response = obtener_sesion().get(url, timeout=timeout)
+    except requests.exceptions.RequestException:
+        ESTADISTICAS.registrar_error()
+        raise
+    latencia = time.perf_counter() - inicio
+
+    # raw.tell() cuenta los bytes leídos del socket, antes de descomprimir
+    bytes_red = response.raw.tell() if response.raw is not None else 0
+    ESTADISTICAS.registrar(
+        bytes_red or len(response.content), len(response.content), latencia
+    )
+    return response
+
@@ -0,0 +1,293 @@
+"""
+Parseo de las páginas de listado
+
+Cada página trae los resultados dos veces: como HTML (las tarjetas
+`div.poly-card__content`) y como el estado JSON con el que el front
+hidrata la página (`__PRELOADED_STATE__`). Hay tres backends:
+
+    json:        lee el estado JSON una sola vez y mapea cada resultado,
+                 sin recorrer el DOM; trae además moneda, título y
+                 ubicación. Si la página no lo tiene, cae al DOM con lxml
+    lxml:        lxml + SoupStrainer que solo arma las tarjetas
+    html.parser: el árbol completo con el parser de Python, como antes
+
+Todos devuelven lo mismo por tarjeta: precio (texto, "120.000"), lista de
+características crudas ("3 dormitorios", ...) y URL.
+"""
+
+import json
+import re
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import PARSER_HTML
+
+try:
+    import lxml  # noqa: F401
+
+    HAY_LXML = True
+except ImportError:
+    HAY_LXML = False
+
+BACKENDS = ("json", "lxml", "html.parser")
+BACKEND_DOM = "lxml" if HAY_LXML else "html.parser"
+BACKEND_POR_DEFECTO = BACKEND_DOM if PARSER_HTML == "lxml" else PARSER_HTML
+
+CLASE_TARJETA = "poly-card__content"
+SOLO_TARJETAS = SoupStrainer("div", class_=CLASE_TARJETA)
+
+# El estado viene como <script id="__PRELOADED_STATE__">{...}</script> o
+# como asignación `window.__PRELOADED_STATE__ = {...};` según la versión
+PATRON_ESTADO = re.compile(
+    r'id="__PRELOADED_STATE__"[^>]*>|__PRELOADED_STATE__\s*=\s*(?=\{)'
+)
+RUTAS_RESULTADOS = [
+    ("pageState", "initialState", "results"),
+    ("initialState", "results"),
+]
+
+
+class EstadisticasParseo:
+    """Acumula el tiempo de parseo por página y qué backend resolvió cada una"""
+
+    def __init__(self):
+        self.paginas = 0
+        self.tarjetas = 0
+        self.segundos = 0.0
+        self.por_backend = {}
+
+    def registrar(self, backend, tarjetas, segundos):
+        self.paginas += 1
+        self.tarjetas += tarjetas
+        self.segundos += segundos
+        self.por_backend[backend] = self.por_backend.get(backend, 0) + 1
+
+    def vaciar(self):
+        """Devuelve lo acumulado hasta ahora y empieza de cero"""
+        acumulado = (self.paginas, self.tarjetas, self.segundos, self.por_backend)
+        self.__init__()
+        return acumulado
+
+    def combinar(self, acumulado):
+        """Suma lo que devolvió `vaciar` en otro proceso"""
+        paginas, tarjetas, segundos, por_backend = acumulado
+        self.paginas += paginas
+        self.tarjetas += tarjetas
+        self.segundos += segundos
+        for backend, n in por_backend.items():
+            self.por_backend[backend] = self.por_backend.get(backend, 0) + n
+
+    def imprimir_resumen(self):
+        if not self.paginas:
+            return
+        backends = ", ".join(f"{b}: {n:,}" for b, n in self.por_backend.items())
+        print(
+            f"🧩 Parseo: {self.paginas:,} páginas, {self.tarjetas:,} tarjetas | "
+            f"{1000 * self.segundos / self.paginas:.1f} ms/página ({backends})"
+        )
+
+
+ESTADISTICAS_PARSEO = EstadisticasParseo()
+
+
+# --- Backend DOM ---
+
+
+def extraer_precio(element):
+    # Obteniendo precio
+    try:
+        contenedor_precio = element.find("div", class_="poly-price__current")
+        if contenedor_precio:
+            link = contenedor_precio.find("span", class_="andes-money-amount__fraction")
+            if link:
+                return link.get_text()
+        return None
+    except Exception as e:
+        print(f"Error extrayendo precio: {e}")
+        return None
+
+
+def extraer_caracteristicas(element):
+    # Obteniendo ambientes, baños y area
+    try:
+        contenedor_caracteristicas = element.find("ul", class_="poly-attributes_list")
+        caracteristicas = contenedor_caracteristicas.find_all("li")
+        array_caracteristicas = []
+        for item in caracteristicas:
+            array_caracteristicas.append(item.get_text())
+        return array_caracteristicas
+
+    except Exception as e:
+        print(f"Error extrayendo caracteristicas: {e}")
+        return None
+
+
+def extraer_url(element):
+    """Extrae la URL de la publicación"""
+    try:
+        link = element.find("a", href=True)
+        if link:
+            return link["href"]
+        return None
+    except Exception as e:
+        print(f"Error extrayendo URL: {e}")
+        return None
+
+
+def buscar_tarjetas(html, backend=BACKEND_DOM):
+    """
+    Parsea una página y devuelve sus tarjetas de publicación
+
+    Args:
+        html: Texto de la página
+        backend: "lxml" o "html.parser"
+
+    Returns:
+        Lista de Tags `div.poly-card__content`, en orden de aparición
+    """
+    if backend == "lxml":
+        soup = BeautifulSoup(html, "lxml", parse_only=SOLO_TARJETAS)
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+    return soup.find_all("div", class_=CLASE_TARJETA)
+
+
+def tarjetas_desde_dom(html, backend=BACKEND_DOM):
+    return [
+        {
+            "precio": extraer_precio(element),
+            "caracteristicas": extraer_caracteristicas(element),
+            "url": extraer_url(element),
+        }
+        for element in buscar_tarjetas(html, backend)
+    ]
+
+
+# --- Backend JSON embebido ---
+
+
+def extraer_estado(html):
+    """
+    Devuelve el estado JSON embebido en la página, o None si no está
+
+    Solo decodifica el objeto a partir de la marca, sin parsear el HTML.
+    """
+    match = PATRON_ESTADO.search(html)
+    if not match:
+        return None
+    inicio = html.find("{", match.end())
+    if inicio < 0:
+        return None
+    try:
+        estado, _ = json.JSONDecoder().raw_decode(html, inicio)
+    except ValueError:
+        return None
+    return estado if isinstance(estado, dict) else None
+
+
+def _resultados(estado):
+    for ruta in RUTAS_RESULTADOS:
+        nodo = estado
+        for clave in ruta:
+            nodo = nodo.get(clave) if isinstance(nodo, dict) else None
+        if isinstance(nodo, list):
+            return nodo
+    return None
+
+
+def _formatear_precio(valor):
+    # Mismo texto que muestra la tarjeta: separador de miles "."
+    if valor is None:
+        return None
+    return f"{int(valor):,}".replace(",", ".")
+
+
+def _url_polycard(metadata):
+    url = metadata.get("url")
+    if not url:
+        return None
+    if not url.startswith("http"):
+        url = f"https://{url}"
+    # El href de la tarjeta es la URL + parámetros + fragmento de tracking
+    return (
+        url + (metadata.get("url_params") or "") + (metadata.get("url_fragments") or "")
+    )
+
+
+def tarjeta_desde_resultado(resultado):
+    """Mapea un resultado del estado JSON al mismo dict que el backend DOM"""
+    polycard = resultado.get("polycard")
+    if not isinstance(polycard, dict):
+        return None
+
+    tarjeta = {
+        "precio": None,
+        "caracteristicas": None,
+        "url": _url_polycard(polycard.get("metadata") or {}),
+    }
+    for componente in polycard.get("components") or []:
+        tipo = componente.get("type")
+        if tipo == "price":
+            actual = (componente.get("price") or {}).get("current_price") or {}
+            tarjeta["precio"] = _formatear_precio(actual.get("value"))
+            tarjeta["moneda"] = actual.get("currency")
+        elif tipo == "attributes_list":
+            textos = (componente.get("attributes_list") or {}).get("texts")
+            tarjeta["caracteristicas"] = list(textos) if textos is not None else None
+        elif tipo == "title":
+            tarjeta["titulo"] = (componente.get("title") or {}).get("text")
+        elif tipo == "location":
+            tarjeta["ubicacion"] = (componente.get("location") or {}).get("text")
+    return tarjeta
+
+
+def tarjetas_desde_json(html):
+    """
+    Tarjetas leídas del estado JSON embebido
+
+    Returns:
+        Lista de dicts, o None si la página no trae el estado (hay que usar
+        el DOM)
+    """
+    estado = extraer_estado(html)
+    if estado is None:
+        return None
+    resultados = _resultados(estado)
+    if resultados is None:
+        return None
+    tarjetas = []
+    for resultado in resultados:
+        if isinstance(resultado, dict):
+            tarjeta = tarjeta_desde_resultado(resultado)
+            if tarjeta is not None:
+                tarjetas.append(tarjeta)
+    return tarjetas
+
+
+def extraer_tarjetas(html, backend=None):
+    """
+    Extrae precio, características y URL de cada publicación de una página
+
+    Args:
+        html: Texto de la página
+        backend: "json", "lxml" o "html.parser"; por defecto PARSER_HTML
+
+    Returns:
+        Lista de dicts con "precio", "caracteristicas" y "url" (el backend
+        json agrega "moneda", "titulo" y "ubicacion")
+    """
+    backend = backend or BACKEND_POR_DEFECTO
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de parseo inválido: {backend}")
+
+    inicio = time.perf_counter()
+    tarjetas = None
+    if backend == "json":
+        tarjetas = tarjetas_desde_json(html)
+        if tarjetas is None:
+            backend = BACKEND_DOM  # Página sin estado embebido
+    if tarjetas is None:
+        tarjetas = tarjetas_desde_dom(html, backend)
+    ESTADISTICAS_PARSEO.registrar(backend, len(tarjetas), time.perf_counter() - inicio)
+    return tarjetas
@@ -0,0 +1,247 @@
+"""
+Pipeline descarga → parseo → escritura
+
+Las tres etapas corren a la vez en lugar de una después de la otra:
+
+    descarga:  la fuente (FetcherAsincrono o ReproductorArchivo) en un hilo
+    parseo:    un ProcessPoolExecutor corre la función de parseo sobre el
+               HTML, así usa más de un núcleo y no frena las descargas
+    escritura: el hilo principal consume los resultados en orden y llama al
+               callback de la corrida (un único escritor de la base)
+
+Entre descarga y escritura hay una cola acotada: si el parseo o la base no
+dan abasto la cola se llena y la descarga se frena (contrapresión), en vez
+de acumular páginas en memoria. Al final se informa la profundidad de cada
+etapa y en qué se le fue el tiempo al escritor (esperando descargas,
+esperando parseos o escribiendo), que marca el cuello de botella.
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from config import PROCESOS_PARSEO, TAMANO_COLA_PIPELINE
+from parseo import ESTADISTICAS_PARSEO
+from processing import extraer_total_resultados
+
+# Lo que recibe el callback en lugar del HTML
+PaginaParseada = namedtuple("PaginaParseada", ["propiedades", "total_resultados"])
+
+_FIN = object()  # Marca de fin de la descarga
+
+
+def _parsear_en_proceso(parsear, html, zona, ciudad, fecha):
+    # Corre en el proceso hijo: devuelve también su tiempo de parseo, que
+    # de otro modo quedaría en las estadísticas del hijo
+    pagina = PaginaParseada(
+        parsear(html, zona, ciudad, fecha), extraer_total_resultados(html)
+    )
+    return pagina, ESTADISTICAS_PARSEO.vaciar()
+
+
+def leer_total(pagina):
+    """Total de resultados de una PaginaParseada (para planificar_recorrido)"""
+    return pagina.total_resultados
+
+
+class EstadisticasPipeline:
+    """
+    Profundidad de cada etapa, muestreada en cada página que entra o sale,
+    y reparto del tiempo del escritor
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enviadas = 0  # Páginas mandadas a parsear
+        self.parseadas = 0  # Páginas con el parseo terminado
+        self.escritas = 0  # Páginas que ya pasaron por el escritor
+        self.muestras = 0
+        self.suma_en_parseo = 0
+        self.suma_por_escribir = 0
+        self.max_en_parseo = 0
+        self.max_por_escribir = 0
+        self.segundos_descarga_frenada = 0.0  # Descarga esperando lugar en la cola
+        # Tiempo del escritor: la etapa donde más espera es el cuello de botella
+        self.segundos_escritor = {"descarga": 0.0, "parseo": 0.0, "escritura": 0.0}
+
+    def _muestrear(self):
+        en_parseo = self.enviadas - self.parseadas
+        por_escribir = self.parseadas - self.escritas
+        self.muestras += 1
+        self.suma_en_parseo += en_parseo
+        self.suma_por_escribir += por_escribir
+        self.max_en_parseo = max(self.max_en_parseo, en_parseo)
+        self.max_por_escribir = max(self.max_por_escribir, por_escribir)
+
+    def registrar_envio(self):
+        with self._lock:
+            self.enviadas += 1
+            self._muestrear()
+
+    def registrar_parseo(self, _futuro=None):
+        with self._lock:
+            self.parseadas += 1
+
+    def registrar_escritura(self):
+        with self._lock:
+            self.escritas += 1
+            self._muestrear()
+
+    def medir(self, etapa, inicio):
+        """Suma al escritor el tiempo desde `inicio` en la etapa dada"""
+        self.segundos_escritor[etapa] += time.perf_counter() - inicio
+
+    def cuello_de_botella(self):
+        return max(self.segundos_escritor, key=self.segundos_escritor.get)
+
+    def imprimir_resumen(self, procesos, tamano_cola):
+        print(f"🧵 Pipeline ({procesos} procesos de parseo, cola de {tamano_cola}):")
+        if not self.muestras:
+            print("   Sin páginas")
+            return
+        print(
+            f"   En parseo:    media {self.suma_en_parseo / self.muestras:.1f} | "
+            f"máx {self.max_en_parseo}"
+        )
+        print(
+            f"   Por escribir: media {self.suma_por_escribir / self.muestras:.1f} | "
+            f"máx {self.max_por_escribir}"
+        )
+        tiempos = self.segundos_escritor
+        print(
+            f"   Escritor: {tiempos['descarga']:.1f}s esperando descargas | "
+            f"{tiempos['parseo']:.1f}s esperando parseos | "
+            f"{tiempos['escritura']:.1f}s escribiendo"
+        )
+        print(
+            f"   Descarga frenada por contrapresión: "
+            f"{self.segundos_descarga_frenada:.1f}s"
+        )
+        print(f"   Cuello de botella: {self.cuello_de_botella()}")
+
+
+class PipelineScraping:
+    """
+    Envuelve una fuente de páginas y parsea en paralelo lo que descarga
+
+    Tiene la misma interfaz `recorrer` que las fuentes, pero el callback
+    `procesar` recibe una PaginaParseada (o None si la descarga falló) en
+    lugar del HTML, y siempre se llama desde el hilo que llamó a `recorrer`
+    y en el orden en que se descargaron las páginas.
+
+    Args:
+        fuente: FetcherAsincrono o ReproductorArchivo
+        parsear: Función (html, zona, ciudad, fecha) -> propiedades. Tiene que
+            estar definida a nivel de módulo para poder mandarla a otro proceso
+        procesos: Procesos de parseo
+        tamano_cola: Páginas que pueden estar entre la descarga y la escritura
+    """
+
+    def __init__(
+        self,
+        fuente,
+        parsear,
+        procesos=PROCESOS_PARSEO,
+        tamano_cola=TAMANO_COLA_PIPELINE,
+    ):
+        self.fuente = fuente
+        self.parsear = parsear
+        self.procesos = procesos
+        self.tamano_cola = tamano_cola
+        self.estadisticas = EstadisticasPipeline()
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.procesos)
+        # Levantar los procesos ya, antes de que la descarga arranque sus hilos
+        self._pool.submit(int).result()
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(cancel_futures=True)
+        self._pool = None
+
+    def recorrer(self, tareas, generar_url, procesar, al_terminar_ciudad=None):
+        """
+        Recorre las tareas con descarga, parseo y escritura en paralelo
+
+        Si `procesar` devuelve False se deja de descargar esa ciudad; las
+        páginas que ya estaban en vuelo igual se procesan.
+        """
+        if not tareas:
+            return
+
+        cola = queue.Queue(maxsize=self.tamano_cola)
+        detenidas = set()
+        errores = []
+
+        def poner(item):
+            inicio = time.perf_counter()
+            cola.put(item)
+            self.estadisticas.segundos_descarga_frenada += time.perf_counter() - inicio
+
+        def encolar(zona, ciudad, pagina, html, fecha):
+            futuro = None
+            if html is not None:
+                futuro = self._pool.submit(
+                    _parsear_en_proceso, self.parsear, html, zona, ciudad, fecha
+                )
+                self.estadisticas.registrar_envio()
+                futuro.add_done_callback(self.estadisticas.registrar_parseo)
+            poner(("pagina", zona, ciudad, pagina, futuro, fecha))
+            return (zona, ciudad) not in detenidas
+
+        def fin_de_ciudad(zona, ciudad):
+            poner(("ciudad", zona, ciudad))
+
+        def descargar():
+            try:
+                self.fuente.recorrer(tareas, generar_url, encolar, fin_de_ciudad)
+            except BaseException as e:  # Se relanza en el hilo principal
+                errores.append(e)
+            finally:
+                cola.put(_FIN)
+
+        hilo = threading.Thread(target=descargar, name="descarga", daemon=True)
+        hilo.start()
+
+        medir = self.estadisticas.medir
+        while True:
+            inicio = time.perf_counter()
+            item = cola.get()
+            medir("descarga", inicio)
+            if item is _FIN:
+                break
+
+            inicio = time.perf_counter()
+            if item[0] == "ciudad":
+                if al_terminar_ciudad:
+                    al_terminar_ciudad(item[1], item[2])
+                medir("escritura", inicio)
+                continue
+
+            _, zona, ciudad, pagina, futuro, fecha = item
+            parseada = None
+            if futuro is not None:
+                try:
+                    parseada, estadisticas = futuro.result()
+                    ESTADISTICAS_PARSEO.combinar(estadisticas)
+                except Exception as e:
+                    print(f"    [{ciudad}] Página {pagina} ✗ Error al parsear: {e}")
+                medir("parseo", inicio)
+
+            inicio = time.perf_counter()
+            if not procesar(zona, ciudad, pagina, parseada, fecha):
+                detenidas.add((zona, ciudad))
+            medir("escritura", inicio)
+            if futuro is not None:
+                self.estadisticas.registrar_escritura()
+
+        hilo.join()
+        if errores:
+            raise errores[0]
+
+    def imprimir_resumen(self):
+        self.estadisticas.imprimir_resumen(self.procesos, self.tamano_cola)
@@ -0,0 +1,290 @@
+"""
+Planificador de recrawl según la rotación (churn) de cada ciudad
+
+Algunas ciudades publican cientos de casas nuevas por día y otras casi
+ninguna. Por cada ciudad se guarda en `churn_ciudades` (esquema_db) lo que
+dejaron las visitas anteriores, suavizado con una media exponencial:
+
+    nuevas_por_dia:    publicaciones nuevas por día entre visitas
+    nuevas_por_pagina: publicaciones nuevas por request en la última visita
+    paginas:           requests que hizo la última visita
+
+nuevas_por_dia se mide sobre ventanas de al menos DIAS_MINIMOS_TASA: si dos
+visitas están más cerca, sus nuevas se acumulan (inicio_ventana y
+nuevas_ventana) hasta completar la ventana. Dividir por una fracción de día
+inflaría la tasa cientos de veces.
+
+Con eso, si la ciudad se visita ahora se esperan
+E = nuevas_por_dia * días desde la última visita, y harían falta
+R = min(paginas, E / nuevas_por_pagina) requests para encontrarlas. Con un
+presupuesto de requests se eligen las ciudades de mayor E / R (nuevas por
+request) hasta gastarlo. Una ciudad con E < NUEVAS_MINIMAS_CHURN se
+posterga, así las de poca rotación se visitan cada más días, salvo que
+pasen INTERVALO_MAXIMO_CHURN días sin visita. Las ciudades sin historial
+van primero: hasta no visitarlas dos veces no se sabe su tasa.
+
+Si la ciudad nunca pasó por el planificador pero ya tiene propiedades en la
+base, la tasa inicial sale de first_seen/last_seen. Esa consulta recorre
+toda la tabla, así que se hace recién al repartir un presupuesto: una
+corrida sin presupuesto solo registra las visitas.
+"""
+
+import math
+from collections import namedtuple
+from datetime import datetime
+
+from config import (
+    INTERVALO_MAXIMO_CHURN,
+    MAX_PAGINAS,
+    NUEVAS_MINIMAS_CHURN,
+    SUAVIZADO_CHURN,
+)
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+# Días mínimos sobre los que se mide una tasa de nuevas por día
+DIAS_MINIMOS_TASA = 1
+
+Tasa = namedtuple(
+    "Tasa",
+    [
+        "ultima_visita",
+        "visitas",
+        "paginas",
+        "nuevas_por_dia",
+        "nuevas_por_pagina",
+        "inicio_ventana",
+        "nuevas_ventana",
+    ],
+    defaults=(None, 0),
+)
+
+# Una ciudad a visitar: nuevas esperadas, requests asignadas y prioridad
+Eleccion = namedtuple("Eleccion", ["nuevas", "paginas", "prioridad"])
+
+SQL_GUARDAR_CHURN = """
+    INSERT OR REPLACE INTO churn_ciudades
+    (zona, ciudad, ultima_visita, visitas, paginas, nuevas_por_dia,
+     nuevas_por_pagina, inicio_ventana, nuevas_ventana)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Tasa inicial de las ciudades que ya están en la base: las publicaciones
+# vistas por primera vez después del primer día de la ciudad, por día
+SQL_TASAS_DESDE_PROPIEDADES = """
+    WITH por_ciudad AS (
+        SELECT zona, ciudad, MIN(first_seen) AS primera, MAX(last_seen) AS ultima
+        FROM propiedades GROUP BY zona, ciudad
+    )
+    SELECT c.zona, c.ciudad, c.primera, c.ultima,
+        SUM(julianday(p.first_seen) > julianday(c.primera) + 1)
+    FROM por_ciudad c JOIN propiedades p USING (zona, ciudad)
+    GROUP BY c.zona, c.ciudad
+"""
+
+
+def _dias_entre(desde, hasta):
+    return (hasta - desde).total_seconds() / 86400
+
+
+def _suavizar(anterior, nuevo):
+    if anterior is None:
+        return nuevo
+    return SUAVIZADO_CHURN * nuevo + (1 - SUAVIZADO_CHURN) * anterior
+
+
+class PlanificadorChurn:
+    """
+    Reparte un presupuesto de requests entre ciudades según su rotación
+
+    Args:
+        conn: Conexión a la base (la del EscritorDB)
+        ahora: datetime de referencia; por defecto el momento de crearlo
+    """
+
+    def __init__(self, conn, ahora=None):
+        self.ahora = ahora or datetime.now()
+        self.conn = conn
+        self.semillas = None  # Tasas iniciales desde propiedades, al estimar
+        self.tasas = {}
+        for fila in conn.execute(
+            "SELECT zona, ciudad, ultima_visita, visitas, paginas, "
+            "nuevas_por_dia, nuevas_por_pagina, inicio_ventana, nuevas_ventana "
+            "FROM churn_ciudades"
+        ):
+            self.tasas[(fila[0], fila[1])] = Tasa(
+                datetime.fromisoformat(fila[2]),
+                *fila[3:7],
+                datetime.fromisoformat(fila[7]) if fila[7] else None,
+                fila[8],
+            )
+        self.requests = 0  # De esta corrida, para el resumen
+        self.nuevas = 0
+
+    @staticmethod
+    def _tasas_desde_propiedades(conn):
+        tasas = {}
+        for zona, ciudad, primera, ultima, nuevas in conn.execute(
+            SQL_TASAS_DESDE_PROPIEDADES
+        ):
+            if not primera or not ultima:
+                continue
+            primera = datetime.fromisoformat(primera)
+            ultima = datetime.fromisoformat(ultima)
+            dias = _dias_entre(primera, ultima)
+            tasas[(zona, ciudad)] = Tasa(
+                ultima,
+                0,
+                None,
+                nuevas / dias if dias >= DIAS_MINIMOS_TASA else None,
+                None,
+            )
+        return tasas
+
+    def _tasa(self, zona, ciudad):
+        """Tasa guardada de la ciudad, completada con la inicial si hace falta"""
+        tasa = self.tasas.get((zona, ciudad))
+        semilla = (self.semillas or {}).get((zona, ciudad))
+        if tasa is None:
+            return semilla
+        if tasa.nuevas_por_dia is None and semilla is not None:
+            # Visitada una sola vez en corridas sin presupuesto
+            return tasa._replace(nuevas_por_dia=semilla.nuevas_por_dia)
+        return tasa
+
+    def estimar(self, zona, ciudad):
+        """
+        Nuevas esperadas y requests necesarias si se visita ahora
+
+        Returns:
+            Eleccion; sin historial suficiente la prioridad es infinita y se
+            asigna el recorrido completo
+        """
+        if self.semillas is None:
+            self.semillas = self._tasas_desde_propiedades(self.conn)
+        tasa = self._tasa(zona, ciudad)
+        if tasa is None or tasa.nuevas_por_dia is None:
+            return Eleccion(None, MAX_PAGINAS, math.inf)
+
+        dias = _dias_entre(tasa.ultima_visita, self.ahora)
+        nuevas = tasa.nuevas_por_dia * dias
+        paginas = tasa.paginas or MAX_PAGINAS
+        if tasa.nuevas_por_pagina:
+            paginas = min(paginas, math.ceil(nuevas / tasa.nuevas_por_pagina))
+        paginas = max(paginas, 1)
+        prioridad = nuevas / paginas
+        if dias >= INTERVALO_MAXIMO_CHURN:
+            prioridad = math.inf  # Demasiado tiempo sin mirarla
+        elif nuevas < NUEVAS_MINIMAS_CHURN:
+            prioridad = 0.0  # Todavía no vale la pena volver
+        return Eleccion(nuevas, paginas, prioridad)
+
+    def elegir(self, ciudades, presupuesto):
+        """
+        Elige qué ciudades visitar y cuántas páginas pedir de cada una
+
+        Args:
+            ciudades: Lista de (zona, ciudad)
+            presupuesto: Requests disponibles para la corrida
+
+        Returns:
+            (elegidas, postergadas): dict (zona, ciudad) -> Eleccion, en orden
+            de prioridad, y lista de (zona, ciudad) que quedan para otra vez
+        """
+        estimaciones = {ciudad: self.estimar(*ciudad) for ciudad in ciudades}
+        orden = sorted(ciudades, key=lambda c: -estimaciones[c].prioridad)
+
+        elegidas = {}
+        postergadas = []
+        restante = presupuesto
+        for ciudad in orden:
+            estimacion = estimaciones[ciudad]
+            if restante <= 0 or estimacion.prioridad <= 0:
+                postergadas.append(ciudad)
+                continue
+            # Si no alcanza para todo, lo que queda igual rinde en las primeras
+            paginas = min(estimacion.paginas, restante)
+            elegidas[ciudad] = estimacion._replace(paginas=paginas)
+            restante -= paginas
+        return elegidas, postergadas
+
+    def registrar(self, escritor, zona, ciudad, paginas, nuevas):
+        """
+        Actualiza la tasa de la ciudad con la visita que acaba de terminar
+
+        Se escribe en el próximo commit del escritor, junto con las
+        propiedades de la visita.
+        """
+        if paginas == 0:
+            return
+        self.requests += paginas
+        self.nuevas += nuevas
+        fecha = datetime.now().replace(microsecond=0)
+        anterior = self._tasa(zona, ciudad)
+
+        # La primera visita abre la ventana: lo que encuentra es el stock
+        # acumulado, no lo publicado desde una visita anterior
+        nuevas_por_dia = None
+        visitas = 1
+        nuevas_por_pagina = nuevas / paginas
+        inicio_ventana, nuevas_ventana = fecha, 0
+        if anterior is not None:
+            visitas = anterior.visitas + 1
+            inicio_ventana = anterior.inicio_ventana or anterior.ultima_visita
+            nuevas_ventana = anterior.nuevas_ventana + nuevas
+            dias = _dias_entre(inicio_ventana, fecha)
+            nuevas_por_dia = anterior.nuevas_por_dia
+            if dias >= DIAS_MINIMOS_TASA:
+                nuevas_por_dia = _suavizar(nuevas_por_dia, nuevas_ventana / dias)
+                inicio_ventana, nuevas_ventana = fecha, 0
+            if anterior.visitas:
+                nuevas_por_pagina = _suavizar(
+                    anterior.nuevas_por_pagina, nuevas_por_pagina
+                )
+
+        tasa = Tasa(
+            fecha,
+            visitas,
+            paginas,
+            nuevas_por_dia,
+            nuevas_por_pagina,
+            inicio_ventana,
+            nuevas_ventana,
+        )
+        self.tasas[(zona, ciudad)] = tasa
+        escritor.en_mismo_commit(
+            SQL_GUARDAR_CHURN,
+            (
+                zona,
+                ciudad,
+                fecha.strftime(FORMATO_FECHA),
+                *tasa[1:5],
+                inicio_ventana.strftime(FORMATO_FECHA),
+                nuevas_ventana,
+            ),
+        )
+
+    def imprimir_eleccion(self, elegidas, postergadas, presupuesto):
+        asignadas = sum(e.paginas for e in elegidas.values())
+        print(
+            f"📊 Presupuesto: {asignadas}/{presupuesto} requests en "
+            f"{len(elegidas)} ciudades ({len(postergadas)} postergadas)"
+        )
+        for (zona, ciudad), eleccion in elegidas.items():
+            if eleccion.nuevas is None:
+                detalle = "sin historial"
+            else:
+                detalle = (
+                    f"~{eleccion.nuevas:.0f} nuevas esperadas, "
+                    f"{eleccion.nuevas / eleccion.paginas:.1f}/request"
+                )
+            print(f"   {ciudad} ({zona}): {eleccion.paginas} páginas | {detalle}")
+        print()
+
+    def imprimir_resumen(self):
+        if not self.requests:
+            return
+        print(
+            f"📈 Rendimiento: {self.nuevas} nuevas en {self.requests} requests "
+            f"({self.nuevas / self.requests:.2f} nuevas/request)"
+        )
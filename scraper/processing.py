@@ -1,37 +1,169 @@
 import re
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
 import pandas as pd
 
+# Primer número del texto, con separador de miles "." y decimales ","
+# ("1.200 m² totales", "85,5 m² cubiertos")
+PATRON_NUMERO = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Campos en los que se puede clasificar un atributo. Para m2 se prefiere la
+# superficie cubierta; la total (que incluye el terreno) solo si no hay otra
+CAMPOS = ("amb", "banos", "m2_totales", "m2", "m2_cubiertos")
+PRIORIDAD_M2 = ("m2_totales", "m2", "m2_cubiertos")  # De menor a mayor
+
+
+def convertir_numero(texto):
+    """'1.200' -> 1200, '85,5' -> 85.5, '1.200,50' -> 1200.5"""
+    if "," in texto:
+        entero, _, decimales = texto.rpartition(",")
+        return float(f"{entero.replace('.', '')}.{decimales}")
+    return int(texto.replace(".", ""))
+
+
+@lru_cache(maxsize=65536)
+def clasificar_caracteristica(item):
+    """
+    Clasifica un atributo de tarjeta ('3 dormitorios', '120 m² cubiertos')
+
+    Los textos se repiten muchísimo entre tarjetas, así que el resultado se
+    cachea por texto.
+
+    Returns:
+        (campo, valor) con campo en CAMPOS, o (None, None) si no se reconoce
+    """
+    match = PATRON_NUMERO.search(item)
+    if not match:
+        return None, None
+
+    texto_lower = item.lower()
+    if "dorm" in texto_lower or "amb" in texto_lower:
+        campo = "amb"
+    elif "baño" in texto_lower:
+        campo = "banos"
+    elif "m²" in texto_lower or "m2" in texto_lower:
+        if "cubierto" in texto_lower:
+            campo = "m2_cubiertos"
+        elif "total" in texto_lower:
+            campo = "m2_totales"
+        else:
+            campo = "m2"
+    else:
+        return None, None
+
+    valor = convertir_numero(match.group())
+    if campo in ("amb", "banos"):
+        valor = int(valor)
+    return campo, valor
+
 
 def procesar_caracteristicas(caracteristicas_raw):
     """
     Convierte ['9 dormitorios', '6 baños', '400 m² cubiertos']
-    a {'dormitorios': 9, 'banos': 6, 'm2': 400}
+    a {'amb': 9, 'banos': 6, 'm2': 400}
+
+    Para una página o el archivo entero conviene procesar_caracteristicas_lote.
     """
     resultado = {"amb": None, "banos": None, "m2": None}
 
     if not caracteristicas_raw:
         return resultado
 
+    superficies = {}
     for item in caracteristicas_raw:
-        # Extraer el número (uno o más dígitos)
-        numeros = re.findall(r"\d+", item)
-        if not numeros:
-            continue
-
-        numero = int(numeros[0])
-        texto_lower = item.lower()
-
-        # Identificar qué tipo de dato es
-        if "dorm" in texto_lower or "amb" in texto_lower:
-            resultado["amb"] = numero
-        elif "baño" in texto_lower:
-            resultado["banos"] = numero
-        elif "m²" in texto_lower or "m2" in texto_lower:
-            resultado["m2"] = numero
+        campo, valor = clasificar_caracteristica(item)
+        if campo in ("amb", "banos"):
+            resultado[campo] = valor
+        elif campo is not None:
+            superficies[campo] = valor
+
+    for campo in PRIORIDAD_M2:
+        if campo in superficies:
+            resultado["m2"] = superficies[campo]
 
     return resultado
 
 
+def procesar_caracteristicas_lote(listas):
+    """
+    procesar_caracteristicas para muchas tarjetas de una vez
+
+    Aplana todos los atributos, clasifica cada texto distinto una sola vez
+    (pd.factorize) y reparte los valores por tarjeta con numpy. Rinde con
+    miles de tarjetas (el archivo entero); para una sola página el costo
+    fijo de numpy/pandas pesa más y alcanza con procesar_caracteristicas.
+
+    Args:
+        listas: Una lista de atributos por tarjeta (None o [] si no tiene)
+
+    Returns:
+        Dict con arrays columnares de largo len(listas): "amb" y "banos"
+        (Int64) y "m2" (Float64), con <NA> donde falta el dato
+    """
+    tarjetas = len(listas)
+    longitudes = [len(lista) if lista else 0 for lista in listas]
+    items = list(chain.from_iterable(filter(None, listas)))
+
+    # Una fila por campo de CAMPOS, una columna por tarjeta
+    columnas = np.full((len(CAMPOS), tarjetas), np.nan)
+    if items:
+        posiciones = np.repeat(np.arange(tarjetas), longitudes)
+        codigos, unicos = pd.factorize(np.array(items, dtype=object))
+        clasificados = [clasificar_caracteristica(item) for item in unicos]
+        campo_por_unico = np.array(
+            [CAMPOS.index(c) if c else len(CAMPOS) for c, _ in clasificados]
+        )
+        valor_por_unico = np.array(
+            [np.nan if v is None else v for _, v in clasificados], dtype=float
+        )
+        campos = campo_por_unico[codigos]
+        reconocidos = campos < len(CAMPOS)
+        # Con (campo, tarjeta) repetidos numpy deja el último valor, igual
+        # que el loop de procesar_caracteristicas
+        columnas[campos[reconocidos], posiciones[reconocidos]] = valor_por_unico[
+            codigos
+        ][reconocidos]
+
+    m2 = columnas[CAMPOS.index(PRIORIDAD_M2[0])]
+    for campo in PRIORIDAD_M2[1:]:
+        fila = columnas[CAMPOS.index(campo)]
+        m2 = np.where(np.isnan(fila), m2, fila)
+
+    return {
+        "amb": pd.array(columnas[CAMPOS.index("amb")], dtype="Int64"),
+        "banos": pd.array(columnas[CAMPOS.index("banos")], dtype="Int64"),
+        "m2": pd.array(m2, dtype="Float64"),
+    }
+
+
+def columna_a_lista(columna):
+    """Array de procesar_caracteristicas_lote a lista de Python (None si falta)"""
+    return [
+        None if valor is pd.NA else (int(valor) if valor == int(valor) else valor)
+        for valor in columna.tolist()
+    ]
+
+
+def extraer_total_resultados(html):
+    """
+    Lee el contador de resultados de una página de listado
+
+    Busca '<span class="ui-search-search-result__quantity-results">1.234
+    resultados</span>' directamente en el texto, sin armar el árbol HTML.
+
+    Returns:
+        Total de resultados como int, o None si la página no lo trae
+    """
+    match = re.search(
+        r"ui-search-search-result__quantity-results[^>]*>\s*([\d.,]+)", html
+    )
+    if not match:
+        return None
+    return int(match.group(1).replace(".", "").replace(",", ""))
+
+
 def leer_datos(filename):
     """Lee el CSV y retorna un DataFrame"""
     return pd.read_csv(filename)
@@ -0,0 +1,157 @@
+"""
+Respaldo CSV que se escribe a medida que llegan las páginas
+
+Antes cada guardado armaba un DataFrame con todo lo acumulado y reescribía
+el CSV entero (O(n²) en la corrida). Acá cada página se agrega al final del
+archivo y se hace flush, así un corte pierde como mucho la página en curso
+y el costo por página no depende de cuántas propiedades van.
+
+Opcionalmente el archivo va comprimido con gzip y se rota al pasar un
+tamaño: data.csv, data-2.csv, data-3.csv... cada uno con encabezado. Con
+gzip, un flush vacía el compresor pero no cierra el miembro gzip (no escribe
+el CRC ni el largo final): si el proceso muere, lo escrito hasta el último
+flush se recupera con `gzip -dc` (que avisa que el archivo está truncado),
+pero gzip.open y pandas fallan al llegar al final. Por eso al anexar con
+gzip se empieza otra parte en lugar de seguir detrás de un miembro que pudo
+quedar cortado.
+
+El respaldo escribe lo que recibe: para que al retomar no se repitan filas,
+el scraper incremental le pasa cada página recién cuando quedó confirmada en
+la base.
+"""
+
+import csv
+import gzip
+import io
+import os
+
+from config import COMPRIMIR_CSV, ROTAR_CSV_MB, RUTA_CSV
+
+# Las columnas de extraer_data, en el orden en que las escribía pandas
+COLUMNAS = (
+    "fecha_scraping",
+    "zona",
+    "ciudad",
+    "precio",
+    "ambientes",
+    "bathrooms",
+    "area",
+    "url",
+    "moneda",
+    "titulo",
+    "ubicacion",
+)
+
+
+class RespaldoCSV:
+    """
+    Sink de propiedades a CSV, append-only
+
+    Args:
+        ruta: Archivo de destino (con comprimir se le agrega ".gz")
+        comprimir: Escribir con gzip
+        rotar_mb: Tamaño en MB a partir del cual se empieza otro archivo;
+            None para uno solo
+        anexar: Seguir el archivo existente en lugar de empezarlo de cero
+            (p. ej. al retomar una corrida). Con gzip se sigue en una parte
+            nueva
+    """
+
+    def __init__(
+        self,
+        ruta=RUTA_CSV,
+        comprimir=COMPRIMIR_CSV,
+        rotar_mb=ROTAR_CSV_MB,
+        anexar=False,
+    ):
+        self.ruta = ruta
+        self.comprimir = comprimir
+        self.rotar_bytes = rotar_mb * 1024 * 1024 if rotar_mb else None
+        self.filas = 0
+        self.archivos = []  # Rutas escritas en esta corrida
+        self._parte = 1
+        self._archivo = None
+        self._crudo = None  # Archivo en disco, para medir lo escrito con gzip
+        self._escritor = None
+
+        if not anexar:
+            for ruta_vieja in self._partes_existentes():
+                os.remove(ruta_vieja)
+        else:
+            # Retomar en la última parte que haya
+            while os.path.exists(self._ruta_parte(self._parte + 1)):
+                self._parte += 1
+            # Con gzip la última parte pudo quedar cortada sin cerrar su
+            # miembro: lo que siga va en otra, que se puede leer completa
+            if self.comprimir and os.path.exists(self._ruta_parte(self._parte)):
+                self._parte += 1
+        self._abrir()
+
+    def _ruta_parte(self, parte):
+        base, extension = os.path.splitext(self.ruta)
+        ruta = self.ruta if parte == 1 else f"{base}-{parte}{extension}"
+        return ruta + ".gz" if self.comprimir else ruta
+
+    def _partes_existentes(self):
+        parte = 1
+        while os.path.exists(self._ruta_parte(parte)):
+            yield self._ruta_parte(parte)
+            parte += 1
+
+    def _abrir(self):
+        ruta = self._ruta_parte(self._parte)
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) == 0
+
+        self._crudo = open(ruta, "ab")
+        if self.comprimir:
+            binario = gzip.GzipFile(fileobj=self._crudo, mode="ab")
+        else:
+            binario = self._crudo
+        self._archivo = io.TextIOWrapper(binario, encoding="utf-8", newline="")
+        self._escritor = csv.DictWriter(
+            self._archivo, fieldnames=COLUMNAS, restval="", extrasaction="ignore"
+        )
+        if nuevo:
+            self._escritor.writeheader()
+        if ruta not in self.archivos:
+            self.archivos.append(ruta)
+
+    def escribir(self, propiedades):
+        """Agrega las propiedades de una página y hace flush"""
+        if not propiedades:
+            return
+        self._escritor.writerows(propiedades)
+        self.filas += len(propiedades)
+        self._archivo.flush()
+        if self.rotar_bytes and self._crudo.tell() >= self.rotar_bytes:
+            self._cerrar_archivo()
+            self._parte += 1
+            self._abrir()
+
+    def _cerrar_archivo(self):
+        if self._archivo is not None:
+            # Con gzip, cerrar el texto cierra el GzipFile pero no el archivo
+            self._archivo.close()
+            if not self._crudo.closed:
+                self._crudo.close()
+            self._archivo = None
+            self._crudo = None
+
+    def cerrar(self):
+        self._cerrar_archivo()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def imprimir_resumen(self):
+        if not self.filas:
+            print("⚠️  No se obtuvieron propiedades para el respaldo CSV")
+            return
+        archivos = ", ".join(os.path.basename(ruta) for ruta in self.archivos)
+        print(f"📁 Respaldo CSV: {self.filas:,} filas en {archivos}")
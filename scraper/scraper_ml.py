@@ -1,115 +1,34 @@
-import requests
-from bs4 import BeautifulSoup
-from config import CIUDADES_POR_ZONA, generar_url
+from config import CIUDADES_POR_ZONA, GUARDAR_PARQUET, RUTA_PARQUET, generar_url
+from archivo_html import DIRECTORIO_ARCHIVO, ArchivoHTML, ReproductorArchivo
+from dataset_parquet import HAY_PYARROW, RespaldoParquet
+from fetcher import FetcherAsincrono, imprimir_plan, planificar_recorrido
+from http_client import ESTADISTICAS
+from parseo import ESTADISTICAS_PARSEO, extraer_tarjetas
+from pipeline import PipelineScraping, leer_total
 from processing import procesar_caracteristicas
-import time
-import pandas as pd
+from respaldo_csv import RespaldoCSV
 from datetime import datetime
-import random
+import sys
 
-headers = {
-    "User-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Mobile Safari/537.36"
-}
 
-
-def conectar_a_web(url, max_reintentos=3):
-    """
-    Se conecta a una URL con reintentos automáticos
-
-    Args:
-        url: URL a scrapear
-        max_reintentos: Número de intentos antes de rendirse
-
-    Returns:
-        HTML de la página o None si falla
-    """
-    for intento in range(1, max_reintentos + 1):
-        try:
-            time.sleep(random.randint(7, 10))
-            response = requests.get(url, headers=headers, timeout=15)
-
-            if response.status_code == 200:
-                if intento > 1:
-                    print(f"✓ Conectado (intento {intento})")
-                return response.text
-            else:
-                print(
-                    f"✗ Status {response.status_code} (intento {intento}/{max_reintentos})"
-                )
-                if intento < max_reintentos:
-                    time.sleep(10)  # Esperar más antes de reintentar
-
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error de red (intento {intento}/{max_reintentos}): {e}")
-            if intento < max_reintentos:
-                print(" Reintentando en 10 segundos...")
-                time.sleep(10)
-
-    # Si llegamos acá, fallaron todos los intentos
-    print(f"✗ FALLÓ después de {max_reintentos} intentos. Continuando con siguiente...")
-    return None
-
-
-def extraer_precio(element):
-    # Obteniendo precio
-    try:
-        contenedor_precio = element.find("div", class_="poly-price__current")
-        if contenedor_precio:
-            link = contenedor_precio.find("span", class_="andes-money-amount__fraction")
-            if link:
-                return link.get_text()
-        return None
-    except Exception as e:
-        print(f"Error extrayendo precio: {e}")
-        return None
-
-
-def extraer_caracteristicas(element):
-    # Obteniendo ambientes, baños y area
-    try:
-        contenedor_caracteristicas = element.find("ul", class_="poly-attributes_list")
-        caracteristicas = contenedor_caracteristicas.find_all("li")
-        array_caracteristicas = []
-        for item in caracteristicas:
-            array_caracteristicas.append(item.get_text())
-        return array_caracteristicas
-
-    except Exception as e:
-        print(f"Error extrayendo caracteristicas: {e}")
-        return None
-
-
-def extraer_url(element):
-    """Extrae la URL de la publicación"""
-    try:
-        link = element.find("a", href=True)
-        if link:
-            return link["href"]
-        return None
-    except Exception as e:
-        print(f"Error extrayendo URL: {e}")
-        return None
-
-
-def extraer_data(html, zona, ciudad):
-    soup = BeautifulSoup(html, "html.parser")
+def extraer_data(html, zona, ciudad, fecha_scraping=None):
+    if fecha_scraping is None:
+        fecha_scraping = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     df_data = []
     try:
         # Bloque de casas
-        casas_individuales = soup.find_all("div", class_="poly-card__content")
+        casas_individuales = extraer_tarjetas(html)
 
     except Exception as e:
         print(f"Error al procesar el bloque de casas: {e}")
         exit()
 
-    for element in casas_individuales:
-        precio = extraer_precio(element)
-        caracteristicas_raw = extraer_caracteristicas(element)
-        caracteristicas = procesar_caracteristicas(caracteristicas_raw)
+    for tarjeta in casas_individuales:
+        precio = tarjeta["precio"]
+        caracteristicas = procesar_caracteristicas(tarjeta["caracteristicas"])
         # Verificar que hay al menos 3 características
         if caracteristicas and len(caracteristicas) >= 3:
-            url_publicacion = extraer_url(element)
-            fecha_scraping = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            url_publicacion = tarjeta["url"]
             df_data.append(
                 {
                     "fecha_scraping": fecha_scraping,
@@ -120,6 +39,10 @@ def extraer_data(html, zona, ciudad):
                     "bathrooms": caracteristicas["banos"],
                     "area": caracteristicas["m2"],
                     "url": url_publicacion,
+                    # Solo el backend json los trae; con el DOM quedan en None
+                    "moneda": tarjeta.get("moneda"),
+                    "titulo": tarjeta.get("titulo"),
+                    "ubicacion": tarjeta.get("ubicacion"),
                 }
             )
         else:
@@ -135,89 +58,103 @@ def extraer_data(html, zona, ciudad):
     return df_data
 
 
-def guardar_en_csv(df, mostrar_mensaje=True):
-    df_raw = pd.DataFrame(df)
-    df_raw.to_csv("./data/data.csv", index=False)
-    if mostrar_mensaje:
-        print("DataFrame guardado correctamente en: data.csv")
-
-
 def main():
-    todas_las_propiedades = []  # Acumular TODAS las propiedades
+    # --replay: re-parsear desde el archivo HTML, sin red
+    replay = "--replay" in sys.argv[1:]
+
+    propiedades_por_ciudad = {}  # Contador por ciudad
+    # El CSV se va escribiendo página por página, no reescrito por ciudad
+    respaldo = RespaldoCSV()
+    parquet = RespaldoParquet(RUTA_PARQUET) if GUARDAR_PARQUET and HAY_PYARROW else None
 
     # Importar MAX_PAGINAS desde config
     from config import MAX_PAGINAS
 
     print(f"\n{'=' * 60}")
-    print(f"INICIANDO SCRAPING - Máximo {MAX_PAGINAS} páginas por ciudad")
+    if replay:
+        print(f"REPLAY desde el archivo HTML ({DIRECTORIO_ARCHIVO})")
+    else:
+        print(f"INICIANDO SCRAPING - Máximo {MAX_PAGINAS} páginas por ciudad")
     print(f"{'=' * 60}\n")
 
-    # Loop por cada zona
-    for zona, ciudades in CIUDADES_POR_ZONA.items():
-        print(f"\n=== ZONA: {zona} ===")
-
-        # Loop por cada ciudad de la zona
-        for ciudad in ciudades:
-            print(f"\n  → Ciudad: {ciudad}")
-            propiedades_ciudad = 0  # Contador para esta ciudad
-
-            # Loop por cada página
-            for pagina in range(1, MAX_PAGINAS + 1):
-                print(f"    Página {pagina}/{MAX_PAGINAS}...", end=" ")
-
-                # Generar URL con paginación
-                url = generar_url(zona, ciudad, pagina)
-
-                # Scrapear
-                try:
-                    html = conectar_a_web(url)
-
-                    # Si falló la conexión, saltar esta página
-                    if html is None:
-                        print("✗ Saltando esta página")
-                        continue
-
-                    propiedades = extraer_data(html, zona, ciudad)
+    def procesar_pagina(zona, ciudad, pagina, parseada, fecha):
+        prefijo = f"    [{ciudad}] Página {pagina}/{MAX_PAGINAS}..."
 
-                    # Si no hay propiedades, probablemente llegamos al final
-                    if len(propiedades) == 0:
-                        print("Sin resultados (fin de páginas)")
-                        break
+        # Si falló la conexión (o el parseo), saltar esta página
+        if parseada is None:
+            print(f"{prefijo} ✗ Saltando esta página")
+            return True
 
-                    # Acumular
-                    todas_las_propiedades.extend(propiedades)
-                    propiedades_ciudad += len(propiedades)
-
-                    print(f"✓ {len(propiedades)} propiedades")
-
-                except Exception as e:
-                    print(f"✗ Error: {e}")
-                    # Continuar con la siguiente página
-                    continue
-
-            print(f"    TOTAL {ciudad}: {propiedades_ciudad} propiedades")
-
-            # Guardar progreso después de cada ciudad
-            if len(todas_las_propiedades) > 0:
-                guardar_en_csv(todas_las_propiedades)
-                print(
-                    f"Progreso guardado ({len(todas_las_propiedades)} propiedades totales)"
-                )
+        try:
+            propiedades = parseada.propiedades
+
+            # Si no hay propiedades, probablemente llegamos al final
+            if len(propiedades) == 0:
+                print(f"{prefijo} Sin resultados (fin de páginas)")
+                return False
+
+            # Contar y respaldar
+            propiedades_por_ciudad[ciudad] = propiedades_por_ciudad.get(
+                ciudad, 0
+            ) + len(propiedades)
+            respaldo.escribir(propiedades)
+            if parquet:
+                parquet.escribir(propiedades)
+
+            print(f"{prefijo} ✓ {len(propiedades)} propiedades")
+
+        except Exception as e:
+            print(f"{prefijo} ✗ Error: {e}")
+
+        # Continuar con la siguiente página
+        return True
+
+    def al_terminar_ciudad(zona, ciudad):
+        print(
+            f"    TOTAL {ciudad} ({zona}): "
+            f"{propiedades_por_ciudad.get(ciudad, 0)} propiedades "
+            f"({respaldo.filas} en el CSV)"
+        )
+
+    # Todas las ciudades de todas las zonas, en orden
+    ciudades = [
+        (zona, ciudad)
+        for zona, ciudades_zona in CIUDADES_POR_ZONA.items()
+        for ciudad in ciudades_zona
+    ]
+
+    archivo = ArchivoHTML()
+    if replay:
+        fuente = ReproductorArchivo(archivo)
+    else:
+        fuente = FetcherAsincrono(archivo=archivo)
+
+    # Página 1 de cada ciudad primero: con el total de resultados se sabe
+    # exactamente cuántas páginas pedir después. El parseo corre en otros
+    # procesos mientras se sigue descargando
+    with PipelineScraping(fuente, extraer_data) as pipeline:
+        tareas, paginas_por_ciudad = planificar_recorrido(
+            pipeline, ciudades, generar_url, procesar_pagina, leer_total
+        )
+        imprimir_plan(tareas, paginas_por_ciudad, fuente)
+        pipeline.recorrer(tareas, generar_url, procesar_pagina, al_terminar_ciudad)
+    respaldo.cerrar()
+    if parquet:
+        parquet.cerrar()
 
     print(f"\n{'=' * 60}")
     print("SCRAPING COMPLETADO")
-    print(f"TOTAL GENERAL: {len(todas_las_propiedades)} propiedades")
+    print(f"TOTAL GENERAL: {respaldo.filas} propiedades")
+    fuente.imprimir_resumen()
+    pipeline.imprimir_resumen()
+    ESTADISTICAS.imprimir_resumen()
+    ESTADISTICAS_PARSEO.imprimir_resumen()
+    archivo.imprimir_resumen()
+    respaldo.imprimir_resumen()
+    if parquet:
+        parquet.imprimir_resumen()
     print(f"{'=' * 60}\n")
 
-    # Guardar versión final
-    if len(todas_las_propiedades) > 0:
-        guardar_en_csv(todas_las_propiedades, mostrar_mensaje=True)
-    else:
-        print("No se obtuvieron propiedades")
-
-    # Guardar todo en CSV
-    guardar_en_csv(todas_las_propiedades, mostrar_mensaje=False)
-
 
 if __name__ == "__main__":
     main()
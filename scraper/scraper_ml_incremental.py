@@ -1,21 +1,32 @@
-import requests
-from bs4 import BeautifulSoup
-from config import CIUDADES_POR_ZONA, generar_url
+from config import (
+    CIUDADES_POR_ZONA,
+    GUARDAR_PARQUET,
+    MODO_URLS_CONOCIDAS,
+    PAGINAS_SIN_NOVEDADES,
+    RUTA_PARQUET,
+    TAMANO_LOTE_DB,
+    TASA_FALSOS_POSITIVOS_BLOOM,
+    calcular_paginas,
+    generar_url,
+)
+from archivo_html import DIRECTORIO_ARCHIVO, ArchivoHTML, ReproductorArchivo
+from dataset_parquet import HAY_PYARROW, RespaldoParquet
+from escritor_db import EscritorDB, normalizar_propiedad
+from fetcher import FetcherAsincrono, imprimir_plan, planificar_recorrido
+from http_client import ESTADISTICAS
+from parseo import ESTADISTICAS_PARSEO, extraer_tarjetas
+from pipeline import PipelineScraping, leer_total
+from planificador_churn import PlanificadorChurn
 from processing import procesar_caracteristicas
-import time
-import pandas as pd
+from respaldo_csv import RespaldoCSV
+from urls_conocidas import cargar_urls_conocidas
 from datetime import datetime
-import random
-import json
 import os
+import resource
 import sys
 
 import sqlite3
 
-headers = {
-    "User-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Mobile Safari/537.36"
-}
-
 
 def crear_tabla_si_no_existe(db_path="../propiedades.db"):
     """
@@ -50,11 +61,15 @@ def crear_tabla_si_no_existe(db_path="../propiedades.db"):
     print("Tabla 'propiedades' verificada/creada")
 
 
-def guardar_en_db(propiedades, db_path="../propiedades.db"):
+def guardar_en_db(propiedades, db_path="../propiedades.db", urls_conocidas=None):
     """
     Inserta propiedades en la base de datos de forma incremental
     Evita duplicados basándose en la URL
     Guarda propiedades incluso con datos parciales (como el scraper original)
+
+    Si se pasa `urls_conocidas` (un URLsConocidas ya cargado) los duplicados se
+    detectan en memoria y las URLs insertadas se le agregan después del
+    commit; si no, se consulta la base por cada fila.
     """
     if not propiedades:
         return 0, 0
@@ -66,45 +81,19 @@ def guardar_en_db(propiedades, db_path="../propiedades.db"):
     omitidos = 0
 
     for prop in propiedades:
-        # Verificar que tenga al menos precio y url (mínimo indispensable)
-        if not prop.get("precio") or not prop.get("url"):
-            omitidos += 1
-            continue
-
-        # Verificar que el precio sea un número válido
-        try:
-            # Limpiar precio (quitar puntos de separador de miles argentinos)
-            precio_limpio = (
-                str(prop["precio"]).replace(".", "").replace(",", "").strip()
-            )
-            precio_val = int(precio_limpio)
-            if precio_val <= 0:
-                omitidos += 1
-                continue
-        except (ValueError, TypeError):
+        fila = normalizar_propiedad(prop)
+        if fila is None:
             omitidos += 1
             continue
 
-        # Convertir valores opcionales (pueden ser None)
-        try:
-            amb_val = int(prop["ambientes"]) if prop.get("ambientes") else None
-            banos_val = int(prop["bathrooms"]) if prop.get("bathrooms") else None
-            area_val = int(prop["area"]) if prop.get("area") else None
-        except (ValueError, TypeError):
-            amb_val = None
-            banos_val = None
-            area_val = None
-
         # Verificar si ya existe (por URL)
-        cursor.execute("SELECT id FROM propiedades WHERE url = ?", (prop.get("url"),))
-        existe = cursor.fetchone()
+        if urls_conocidas is not None:
+            existe = urls_conocidas.contiene(prop["url"], cursor)
+        else:
+            cursor.execute("SELECT id FROM propiedades WHERE url = ?", (prop["url"],))
+            existe = cursor.fetchone()
 
         if not existe:
-            # Calcular precio_por_m2 solo si tenemos área
-            precio_por_m2 = None
-            if area_val and area_val > 0:
-                precio_por_m2 = round(precio_val / area_val, 2)
-
             try:
                 # Insertar
                 cursor.execute(
@@ -113,182 +102,91 @@ def guardar_en_db(propiedades, db_path="../propiedades.db"):
                     (fecha_scraping, zona, ciudad, precio, ambientes, bathrooms, area, url, precio_por_m2)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                    (
-                        prop.get("fecha_scraping"),
-                        prop.get("zona"),
-                        prop.get("ciudad"),
-                        precio_val,
-                        amb_val,
-                        banos_val,
-                        area_val,
-                        prop.get("url"),
-                        precio_por_m2,
-                    ),
+                    fila,
                 )
                 insertados += 1
+                if urls_conocidas is not None:
+                    urls_conocidas.agregar(prop["url"])
             except sqlite3.IntegrityError:
                 # URL duplicada (aunque ya verificamos arriba, por si acaso)
                 omitidos += 1
 
-    conn.commit()
-    conn.close()
+    try:
+        conn.commit()
+    except sqlite3.Error:
+        if urls_conocidas is not None:
+            urls_conocidas.descartar_pendientes()
+        raise
+    finally:
+        conn.close()
+    if urls_conocidas is not None:
+        urls_conocidas.confirmar_pendientes()
 
     return insertados, omitidos
 
 
-def guardar_checkpoint(zona, ciudad, pagina, db_path="../propiedades.db"):
+def cargar_checkpoint(escritor):
     """
-    Guarda el progreso actual en un archivo de checkpoint
-    Permite reanudar el scraping desde donde se quedó
-    """
-    checkpoint_file = db_path.replace(".db", "_checkpoint.json")
-    checkpoint = {
-        "zona": zona,
-        "ciudad": ciudad,
-        "pagina": pagina,
-        "ultima_actualizacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
-    with open(checkpoint_file, "w") as f:
-        json.dump(checkpoint, f)
-
-
-def cargar_checkpoint(db_path="../propiedades.db"):
-    """
-    Carga el checkpoint guardado si existe
-    Retorna (zona, ciudad, pagina) o (None, None, 1) si no hay checkpoint
+    Lee de la base el progreso de una corrida que no terminó
+
+    Returns:
+        (paginas_hechas, ciudades) como EscritorDB.estado_crawl; ambos
+        vacíos si no hay nada que retomar
     """
-    checkpoint_file = db_path.replace(".db", "_checkpoint.json")
-    if os.path.exists(checkpoint_file):
-        with open(checkpoint_file, "r") as f:
-            checkpoint = json.load(f)
+    paginas_hechas, ciudades = escritor.estado_crawl()
+    if paginas_hechas or ciudades:
+        terminadas = sum(1 for _, terminada in ciudades.values() if terminada)
+        paginas = sum(len(hechas) for hechas in paginas_hechas.values())
         print(
-            f"📍 Checkpoint encontrado: {checkpoint['zona']} - {checkpoint['ciudad']} - Página {checkpoint['pagina']}"
+            f"📍 Checkpoint encontrado: {terminadas} ciudades completas, "
+            f"{paginas} páginas guardadas"
         )
-        print(f"   Última actualización: {checkpoint['ultima_actualizacion']}")
-        return checkpoint["zona"], checkpoint["ciudad"], checkpoint["pagina"]
-    return None, None, 1
+    return paginas_hechas, ciudades
 
 
-def borrar_checkpoint(db_path="../propiedades.db"):
-    """Elimina el archivo de checkpoint cuando el scraping termina"""
-    checkpoint_file = db_path.replace(".db", "_checkpoint.json")
-    if os.path.exists(checkpoint_file):
-        os.remove(checkpoint_file)
-        print("🗑️  Checkpoint eliminado")
+def borrar_checkpoint(escritor):
+    """Olvida el progreso guardado cuando el scraping termina"""
+    escritor.borrar_estado_crawl()
+    print("🗑️  Checkpoint eliminado")
 
 
 def reset_scraping(db_path="../propiedades.db"):
     """
     Resetea el scraping eliminando el checkpoint
-    Pregunta al usuario antes de borrar la base de datos
+    No toca las propiedades ya guardadas
     """
     print("\n" + "=" * 60)
     print("🔄 REINICIANDO SCRAPING")
     print("=" * 60 + "\n")
 
-    # Borrar checkpoint
-    borrar_checkpoint(db_path)
+    # Borrar checkpoint (y el JSON que usaban las versiones anteriores)
+    crear_tabla_si_no_existe(db_path)
+    with EscritorDB(db_path) as escritor:
+        borrar_checkpoint(escritor)
+    checkpoint_json = db_path.replace(".db", "_checkpoint.json")
+    if os.path.exists(checkpoint_json):
+        os.remove(checkpoint_json)
 
     print("✓ Checkpoint eliminado")
     print("El scraping comenzará desde el principio.\n")
 
 
-def conectar_a_web(url, max_reintentos=3):
-    """
-    Se conecta a una URL con reintentos automáticos
-
-    Args:
-        url: URL a scrapear
-        max_reintentos: Número de intentos antes de rendirse
-
-    Returns:
-        HTML de la página o None si falla
-    """
-    for intento in range(1, max_reintentos + 1):
-        try:
-            time.sleep(random.randint(7, 10))
-            response = requests.get(url, headers=headers, timeout=15)
-
-            if response.status_code == 200:
-                if intento > 1:
-                    print(f"✓ Conectado (intento {intento})")
-                return response.text
-            else:
-                print(
-                    f"✗ Status {response.status_code} (intento {intento}/{max_reintentos})"
-                )
-                if intento < max_reintentos:
-                    time.sleep(10)  # Esperar más antes de reintentar
-
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Error de red (intento {intento}/{max_reintentos}): {e}")
-            if intento < max_reintentos:
-                print(" Reintentando en 10 segundos...")
-                time.sleep(10)
-
-    # Si llegamos acá, fallaron todos los intentos
-    print(f"✗ FALLÓ después de {max_reintentos} intentos. Continuando con siguiente...")
-    return None
-
-
-def extraer_precio(element):
-    # Obteniendo precio
-    try:
-        contenedor_precio = element.find("div", class_="poly-price__current")
-        if contenedor_precio:
-            link = contenedor_precio.find("span", class_="andes-money-amount__fraction")
-            if link:
-                return link.get_text()
-        return None
-    except Exception as e:
-        print(f"Error extrayendo precio: {e}")
-        return None
-
-
-def extraer_caracteristicas(element):
-    # Obteniendo ambientes, baños y area
-    try:
-        contenedor_caracteristicas = element.find("ul", class_="poly-attributes_list")
-        caracteristicas = contenedor_caracteristicas.find_all("li")
-        array_caracteristicas = []
-        for item in caracteristicas:
-            array_caracteristicas.append(item.get_text())
-        return array_caracteristicas
-
-    except Exception as e:
-        print(f"Error extrayendo caracteristicas: {e}")
-        return None
-
-
-def extraer_url(element):
-    """Extrae la URL de la publicación"""
-    try:
-        link = element.find("a", href=True)
-        if link:
-            return link["href"]
-        return None
-    except Exception as e:
-        print(f"Error extrayendo URL: {e}")
-        return None
-
-
-def extraer_data(html, zona, ciudad):
-    soup = BeautifulSoup(html, "html.parser")
+def extraer_data(html, zona, ciudad, fecha_scraping=None):
+    if fecha_scraping is None:
+        fecha_scraping = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     df_data = []
     try:
         # Bloque de casas
-        casas_individuales = soup.find_all("div", class_="poly-card__content")
+        casas_individuales = extraer_tarjetas(html)
 
     except Exception as e:
         print(f"Error al procesar el bloque de casas: {e}")
         exit()
 
-    for element in casas_individuales:
-        precio = extraer_precio(element)
-        caracteristicas_raw = extraer_caracteristicas(element)
-        caracteristicas = procesar_caracteristicas(caracteristicas_raw)
-        url_publicacion = extraer_url(element)
-        fecha_scraping = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for tarjeta in casas_individuales:
+        precio = tarjeta["precio"]
+        caracteristicas = procesar_caracteristicas(tarjeta["caracteristicas"])
+        url_publicacion = tarjeta["url"]
 
         # Agregar propiedad incluso con datos parciales (igual que scraper_ml.py)
         df_data.append(
@@ -301,17 +199,21 @@ def extraer_data(html, zona, ciudad):
                 "bathrooms": caracteristicas.get("banos") if caracteristicas else None,
                 "area": caracteristicas.get("m2") if caracteristicas else None,
                 "url": url_publicacion,
+                # Solo el backend json los trae; con el DOM quedan en None
+                "moneda": tarjeta.get("moneda"),
+                "titulo": tarjeta.get("titulo"),
+                "ubicacion": tarjeta.get("ubicacion"),
             }
         )
 
     return df_data
 
 
-def guardar_en_csv(df, mostrar_mensaje=True):
-    df_raw = pd.DataFrame(df)
-    df_raw.to_csv("./data/data.csv", index=False)
-    if mostrar_mensaje:
-        print("DataFrame guardado correctamente en: data.csv")
+def pico_memoria_mb(quien=resource.RUSAGE_SELF):
+    """Pico de memoria residente (RSS) en MB, del proceso o de sus hijos"""
+    pico = resource.getrusage(quien).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
 
 
 def main():
@@ -320,18 +222,61 @@ def main():
         reset_scraping()
         return
 
-    todas_las_propiedades = []  # Acumular TODAS las propiedades
-    total_insertados_db = 0
-    total_omitidos = 0
+    # --replay: re-parsear e insertar desde el archivo HTML, sin red
+    replay = "--replay" in sys.argv[1:]
+
+    # --solo-nuevas[=N]: cortar cada ciudad tras N páginas seguidas sin URLs nuevas
+    umbral_sin_novedades = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--solo-nuevas"):
+            _, _, valor = arg.partition("=")
+            umbral_sin_novedades = int(valor) if valor else PAGINAS_SIN_NOVEDADES
+
+    # --presupuesto=N: gastar como mucho N requests, en las ciudades que más
+    # publicaciones nuevas suelen dar por request
+    presupuesto = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--presupuesto="):
+            presupuesto = int(arg.partition("=")[2])
+
+    # Nada de la corrida queda en memoria: cada página va a la base y al
+    # respaldo CSV apenas se parsea, y acá solo quedan contadores
+    totales = {"propiedades": 0, "omitidos": 0}
+    propiedades_por_ciudad = {}  # Contador por ciudad
+    paginas_sin_novedades = {}  # Páginas seguidas sin URLs nuevas, por ciudad
+    paginas_por_ciudad = {}  # (zona, ciudad) -> páginas según el contador
+    cortadas = set()  # (zona, ciudad) cortadas por el modo solo nuevas
+    paginas_planeadas = {}  # (zona, ciudad) -> páginas a pedir en esta corrida
+    visitas = {}  # (zona, ciudad) -> [requests, nuevas] de esta corrida
+    cupos = {}  # (zona, ciudad) -> páginas asignadas por el presupuesto
 
     # Importar MAX_PAGINAS desde config
     from config import MAX_PAGINAS
 
-    # Cargar checkpoint si existe
-    checkpoint_zona, checkpoint_ciudad, checkpoint_pagina = cargar_checkpoint()
-    reanudando = checkpoint_zona is not None
+    # Asegurar que la tabla exista antes de empezar
+    crear_tabla_si_no_existe()
+
+    # Cargar una sola vez las URLs ya guardadas para deduplicar en memoria
+    urls_conocidas = cargar_urls_conocidas(
+        "../propiedades.db", MODO_URLS_CONOCIDAS, TASA_FALSOS_POSITIVOS_BLOOM
+    )
+    urls_conocidas.imprimir_resumen()
+
+    # Una sola conexión en WAL para toda la corrida, con commits por lotes
+    escritor = EscritorDB("../propiedades.db", TAMANO_LOTE_DB, urls_conocidas)
+
+    # Cargar checkpoint si existe (el replay siempre recorre todo el archivo)
+    if replay:
+        paginas_hechas, ciudades_guardadas = {}, {}
+    else:
+        paginas_hechas, ciudades_guardadas = cargar_checkpoint(escritor)
+    reanudando = bool(paginas_hechas or ciudades_guardadas)
 
-    if reanudando:
+    if replay:
+        print(f"\n{'=' * 60}")
+        print(f"⏪ REPLAY desde el archivo HTML ({DIRECTORIO_ARCHIVO})")
+        print(f"{'=' * 60}\n")
+    elif reanudando:
         print(f"\n{'=' * 60}")
         print(f"🔄 REANUDANDO SCRAPING desde el checkpoint")
         print(f"{'=' * 60}\n")
@@ -340,111 +285,248 @@ def main():
         print(f"🚀 INICIANDO SCRAPING - Máximo {MAX_PAGINAS} páginas por ciudad")
         print(f"{'=' * 60}\n")
 
-    # Asegurar que la tabla exista antes de empezar
-    crear_tabla_si_no_existe()
+    if umbral_sin_novedades:
+        print(
+            f"⏩ Modo solo nuevas: se corta cada ciudad tras "
+            f"{umbral_sin_novedades} páginas seguidas sin URLs nuevas\n"
+        )
 
-    # Loop por cada zona
+    # Armar la lista de ciudades a recorrer, salteando lo ya completado. Cada
+    # ciudad retoma sus propias páginas, aunque varias hayan quedado a medias
+    por_planificar = []  # Ciudades sin la página 1 guardada
+    reanudadas = []  # Ciudades con el plan ya en la base
     for zona, ciudades in CIUDADES_POR_ZONA.items():
-        # Si estamos reanudando y esta zona ya pasó, saltear
-        if reanudando and zona != checkpoint_zona:
-            if list(CIUDADES_POR_ZONA.keys()).index(zona) < list(
-                CIUDADES_POR_ZONA.keys()
-            ).index(checkpoint_zona):
-                print(f"⏭️  ZONA: {zona} (ya completada)")
+        for ciudad in ciudades:
+            hechas = paginas_hechas.get((zona, ciudad), set())
+            paginas_total, terminada = ciudades_guardadas.get(
+                (zona, ciudad), (None, False)
+            )
+            if terminada:
+                print(f"  ⏭️  Ciudad: {ciudad} ({zona}) (ya completada)")
+                continue
+            if 1 not in hechas:
+                por_planificar.append((zona, ciudad))
                 continue
+            paginas_por_ciudad[(zona, ciudad)] = paginas_total
+            paginas = [
+                pagina
+                for pagina in range(2, (paginas_total or MAX_PAGINAS) + 1)
+                if pagina not in hechas
+            ]
+            print(
+                f"  ⏭️  Ciudad: {ciudad} ({zona}) - "
+                f"{len(hechas)}/{paginas_total or MAX_PAGINAS} páginas ya completadas"
+            )
+            reanudadas.append((zona, ciudad, paginas))
+    retomadas = {(zona, ciudad) for zona, ciudad, _ in reanudadas}
+
+    # Rotación por ciudad: con presupuesto, elegir qué ciudades nuevas visitar
+    planificador = PlanificadorChurn(escritor.conn)
+    if presupuesto is not None and not replay:
+        # Si se retoma, lo ya pedido y lo que falta de las retomadas se descuenta
+        restante = presupuesto - sum(len(h) for h in paginas_hechas.values())
+        restante -= sum(len(paginas) for _, _, paginas in reanudadas)
+        elegidas, postergadas = planificador.elegir(por_planificar, restante)
+        planificador.imprimir_eleccion(elegidas, postergadas, restante)
+        cupos = {ciudad: eleccion.paginas for ciudad, eleccion in elegidas.items()}
+        por_planificar = list(elegidas)
+        # Las postergadas cuentan como terminadas si hay que retomar la corrida
+        for zona, ciudad in postergadas:
+            escritor.terminar_ciudad(zona, ciudad)
+        escritor.confirmar()
+
+    def procesar_pagina(zona, ciudad, pagina, parseada, fecha):
+        prefijo = f"    [{ciudad}] Página {pagina}/{MAX_PAGINAS}..."
+
+        visita = visitas.setdefault((zona, ciudad), [0, 0])
+        visita[0] += 1
+
+        # Si falló la conexión (o el parseo), saltar esta página
+        if parseada is None:
+            print(f"{prefijo} ✗ Saltando esta página")
+            return True
 
-        print(f"\n=== ZONA: {zona} ===")
+        try:
+            propiedades = parseada.propiedades
+
+            # Si no hay propiedades, probablemente llegamos al final
+            if len(propiedades) == 0:
+                print(f"{prefijo} Sin resultados (fin de páginas)")
+                return False
+
+            # Contar y respaldar. El CSV recibe la página recién cuando sus
+            # filas (y su marca en crawl_state) quedan confirmadas: al retomar
+            # se vuelve a pedir lo no confirmado y no se escribe dos veces
+            totales["propiedades"] += len(propiedades)
+            if parquet:
+                parquet.escribir(propiedades)
+            propiedades_por_ciudad[ciudad] = propiedades_por_ciudad.get(
+                ciudad, 0
+            ) + len(propiedades)
+
+            # Encolar en la base; la página queda marcada como hecha en el
+            # mismo commit que sus filas (el replay no toca el checkpoint)
+            if pagina == 1 and not replay:
+                total = parseada.total_resultados
+                paginas_total = calcular_paginas(total) if total else None
+                if (zona, ciudad) in cupos:
+                    paginas_total = min(
+                        paginas_total or MAX_PAGINAS, cupos[(zona, ciudad)]
+                    )
+                escritor.planificar_ciudad(zona, ciudad, paginas_total)
+            insertados, omitidos = escritor.agregar(
+                propiedades,
+                al_confirmar=lambda: respaldo.escribir(propiedades),
+                pagina=None if replay else (zona, ciudad, pagina, fecha),
+            )
+            totales["omitidos"] += omitidos
+            visita[1] += insertados
+
+            mensaje = f"{prefijo} ✓ {len(propiedades)} propiedades"
+            if insertados > 0:
+                mensaje += f" ({insertados} nuevas en DB)"
+            if omitidos > 0:
+                mensaje += f" [{omitidos} omitidas]"
+            print(mensaje)
+
+            # Modo solo nuevas: si ya no aparecen URLs nuevas, cortar la ciudad.
+            # Las páginas que ya estaban en vuelo al cortar igual llegan acá
+            if umbral_sin_novedades and (zona, ciudad) not in cortadas:
+                if insertados > 0:
+                    paginas_sin_novedades[ciudad] = 0
+                else:
+                    paginas_sin_novedades[ciudad] = (
+                        paginas_sin_novedades.get(ciudad, 0) + 1
+                    )
+                if paginas_sin_novedades[ciudad] >= umbral_sin_novedades:
+                    cortadas.add((zona, ciudad))
+                    print(
+                        f"    [{ciudad}] ⏹️  {umbral_sin_novedades} páginas sin "
+                        f"novedades, se corta en la página {pagina}"
+                    )
+                    return False
+
+        except Exception as e:
+            print(f"{prefijo} ✗ Error: {e}")
+
+        # Continuar con la siguiente página
+        return True
+
+    def al_terminar_ciudad(zona, ciudad):
+        print(
+            f"    TOTAL {ciudad} ({zona}): "
+            f"{propiedades_por_ciudad.get(ciudad, 0)} propiedades"
+        )
+        if not replay:
+            escritor.terminar_ciudad(zona, ciudad)
+            # Una ciudad retomada solo vio parte de la visita: no cuenta
+            if (zona, ciudad) not in retomadas:
+                requests, nuevas = visitas.get((zona, ciudad), (0, 0))
+                planificador.registrar(escritor, zona, ciudad, requests, nuevas)
+
+    # Al retomar, el CSV sigue el de la corrida cortada (solo tiene páginas
+    # confirmadas en la base, las mismas que crawl_state da por hechas)
+    respaldo = RespaldoCSV(anexar=reanudando)
+    # El Parquet no se anexa: cada corrida (o tramo retomado) agrega archivos
+    parquet = RespaldoParquet(RUTA_PARQUET) if GUARDAR_PARQUET and HAY_PYARROW else None
+
+    archivo = ArchivoHTML()
+    if replay:
+        fuente = ReproductorArchivo(archivo)
+    else:
+        fuente = FetcherAsincrono(archivo=archivo)
+
+    # Página 1 de cada ciudad primero: con el total de resultados se sabe
+    # exactamente cuántas páginas pedir después. Las ciudades retomadas ya
+    # tienen el plan guardado y solo piden las páginas que faltan.
+    # El parseo corre en otros procesos y este hilo es el único que escribe
+    with PipelineScraping(fuente, extraer_data) as pipeline:
+        plan, paginas_por_ciudad_plan = planificar_recorrido(
+            pipeline, por_planificar, generar_url, procesar_pagina, leer_total
+        )
+        paginas_por_ciudad.update(paginas_por_ciudad_plan)
+        # Una ciudad puede tener páginas guardadas aunque su página 1 haya
+        # fallado, y el presupuesto puede recortar las páginas de cada ciudad
+        plan = [
+            (
+                zona,
+                ciudad,
+                [
+                    p
+                    for p in paginas
+                    if p not in paginas_hechas.get((zona, ciudad), ())
+                    and p <= cupos.get((zona, ciudad), MAX_PAGINAS)
+                ],
+            )
+            for zona, ciudad, paginas in plan
+        ]
+        imprimir_plan(reanudadas + plan, paginas_por_ciudad, fuente)
+        for zona, ciudad, paginas in reanudadas + plan:
+            paginas_planeadas[(zona, ciudad)] = len(paginas)
+        for zona, ciudad in por_planificar:  # Más la página 1
+            paginas_planeadas[(zona, ciudad)] = (
+                paginas_planeadas.get((zona, ciudad), 0) + 1
+            )
 
-        # Loop por cada ciudad de la zona
-        for ciudad in ciudades:
-            # Si estamos reanudando y esta ciudad ya pasó, saltear
-            if reanudando and zona == checkpoint_zona and ciudad != checkpoint_ciudad:
-                if ciudades.index(ciudad) < ciudades.index(checkpoint_ciudad):
-                    print(f"  ⏭️  Ciudad: {ciudad} (ya completada)")
-                    continue
-
-            print(f"\n  → Ciudad: {ciudad}")
-            propiedades_ciudad = 0  # Contador para esta ciudad
-
-            # Loop por cada página
-            for pagina in range(1, MAX_PAGINAS + 1):
-                # Si estamos reanudando, saltear páginas ya completadas
-                if (
-                    reanudando
-                    and zona == checkpoint_zona
-                    and ciudad == checkpoint_ciudad
-                ):
-                    if pagina <= checkpoint_pagina:
-                        print(f"    ⏭️  Página {pagina}/{MAX_PAGINAS} (ya completada)")
-                        continue
-                    else:
-                        # Ya pasamos el checkpoint, continuar normalmente
-                        reanudando = False
-
-                print(f"    Página {pagina}/{MAX_PAGINAS}...", end=" ")
-
-                # Generar URL con paginación
-                url = generar_url(zona, ciudad, pagina)
-
-                # Scrapear
-                try:
-                    html = conectar_a_web(url)
-
-                    # Si falló la conexión, saltar esta página
-                    if html is None:
-                        print("✗ Saltando esta página")
-                        continue
-
-                    propiedades = extraer_data(html, zona, ciudad)
-
-                    # Si no hay propiedades, probablemente llegamos al final
-                    if len(propiedades) == 0:
-                        print("Sin resultados (fin de páginas)")
-                        break
-
-                    # Acumular
-                    todas_las_propiedades.extend(propiedades)
-                    propiedades_ciudad += len(propiedades)
-
-                    # Guardar en base de datos inmediatamente
-                    insertados, omitidos = guardar_en_db(propiedades)
-                    total_insertados_db += insertados
-                    total_omitidos += omitidos
-
-                    mensaje = f"✓ {len(propiedades)} propiedades"
-                    if insertados > 0:
-                        mensaje += f" ({insertados} nuevas en DB)"
-                    if omitidos > 0:
-                        mensaje += f" [{omitidos} omitidas]"
-                    print(mensaje)
-
-                    # Guardar checkpoint después de cada página exitosa
-                    guardar_checkpoint(zona, ciudad, pagina)
-
-                except Exception as e:
-                    print(f"✗ Error: {e}")
-                    # Continuar con la siguiente página
-                    continue
-
-            print(f"    TOTAL {ciudad}: {propiedades_ciudad} propiedades")
+        pipeline.recorrer(
+            reanudadas + plan, generar_url, procesar_pagina, al_terminar_ciudad
+        )
+    # Borrar checkpoint al finalizar exitosamente. Si el disyuntor dejó
+    # ciudades sin terminar, sus páginas siguen pendientes en crawl_state
+    # (no están hechas y la ciudad no está terminada) para la próxima corrida
+    pendientes = getattr(fuente, "pendientes", {})
+    if pendientes:
+        print(
+            f"\n⏸️  {sum(len(p) for p in pendientes.values())} páginas de "
+            f"{len(pendientes)} ciudades quedaron pendientes por el disyuntor: "
+            f"se conserva el checkpoint para retomarlas"
+        )
+    elif not replay:
+        borrar_checkpoint(escritor)
+    escritor.cerrar()
+    respaldo.cerrar()
+    if parquet:
+        parquet.cerrar()
+    # Antes de los resúmenes, para que el pico sea el de la corrida. Los
+    # procesos de parseo ya terminaron al salir del pipeline
+    pico_mb = pico_memoria_mb()
+    pico_hijos_mb = pico_memoria_mb(resource.RUSAGE_CHILDREN)
 
     print(f"\n{'=' * 60}")
     print("✅ SCRAPING COMPLETADO")
-    print(f"TOTAL GENERAL: {len(todas_las_propiedades)} propiedades encontradas")
-    print(f"INSERTADAS EN DB: {total_insertados_db}")
-    print(f"OMITIDAS: {total_omitidos}")
+    print(f"TOTAL GENERAL: {totales['propiedades']} propiedades encontradas")
+    print(f"INSERTADAS EN DB: {escritor.insertados} ({escritor.commits} commits)")
+    print(f"YA CONOCIDAS (last_seen actualizado): {escritor.vistas}")
+    print(f"CAMBIOS REGISTRADOS EN HISTORIAL: {escritor.cambios}")
+    print(f"OMITIDAS: {totales['omitidos']}")
+    if umbral_sin_novedades:
+        # Solo cuentan las páginas del plan que nunca se pidieron; las que se
+        # descargaron después del corte (en vuelo o en cola) no se ahorraron
+        requests_ahorradas = sum(
+            max(paginas_planeadas.get(clave, 0) - visitas[clave][0], 0)
+            for clave in cortadas
+        )
+        print(
+            f"⏩ SOLO NUEVAS: {len(cortadas)} ciudades cortadas antes, "
+            f"{requests_ahorradas} requests ahorradas "
+            f"(vs recorrer todas las páginas del plan)"
+        )
+    planificador.imprimir_resumen()
+    urls_conocidas.imprimir_resumen()
+    fuente.imprimir_resumen()
+    pipeline.imprimir_resumen()
+    ESTADISTICAS.imprimir_resumen()
+    ESTADISTICAS_PARSEO.imprimir_resumen()
+    archivo.imprimir_resumen()
+    respaldo.imprimir_resumen()
+    if parquet:
+        parquet.imprimir_resumen()
+    print(
+        f"🧠 Pico de memoria: {pico_mb:.0f} MB "
+        f"(proceso de parseo más grande: {pico_hijos_mb:.0f} MB)"
+    )
     print(f"{'=' * 60}\n")
 
-    # Borrar checkpoint al finalizar exitosamente
-    borrar_checkpoint()
-
-    # Guardar versión final en CSV como backup
-    if len(todas_las_propiedades) > 0:
-        guardar_en_csv(todas_las_propiedades, mostrar_mensaje=True)
-        print("📁 Backup CSV guardado")
-    else:
-        print("⚠️  No se obtuvieron nuevas propiedades")
-
 
 if __name__ == "__main__":
     main()
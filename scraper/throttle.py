@@ -0,0 +1,278 @@
+"""
+Control adaptativo de la tasa de requests (AIMD) y disyuntor
+
+Mientras las respuestas llegan rápido y con 200, la tasa sube de a poco
+(incremento aditivo). Ante un 429/5xx, un timeout o un pico de latencia se
+recorta a la mitad (decremento multiplicativo). Es el mismo esquema que usa
+TCP para no saturar la red.
+
+El AIMD solo espacia las requests; si el sitio directamente no responde,
+el Disyuntor (circuit breaker) corta: tras varios fallos seguidos no deja
+pedir nada durante un enfriamiento y después prueba con una sola request.
+"""
+
+import random
+import time
+
+from config import (
+    ENFRIAMIENTO_INICIAL,
+    ENFRIAMIENTO_MAXIMO,
+    FACTOR_PICO_LATENCIA,
+    FACTOR_RECORTE,
+    FALLOS_PARA_ABRIR,
+    INCREMENTO_TASA,
+    JITTER_ENFRIAMIENTO,
+    LATENCIA_MAXIMA,
+    TASA_MAXIMA,
+    TASA_MINIMA,
+)
+
+STATUS_SOBRECARGA = {429, 500, 502, 503, 504}
+# Status que cuentan como fallo para el disyuntor (403: nos bloquearon)
+STATUS_FALLO = STATUS_SOBRECARGA | {403}
+LOG_CADA_INCREMENTOS = 10  # Loguear la tasa cada tantos incrementos seguidos
+LATENCIA_PICO_MINIMA = 1.0  # Segundos; por debajo de esto nunca es un pico
+
+
+class ControladorAIMD:
+    """
+    Ajusta la tasa de un host según lo que va respondiendo
+
+    Args:
+        nombre: Identificador para los logs (normalmente el host)
+        tasa_inicial: Requests por segundo al arrancar
+        al_cambiar_tasa: Callback (nueva_tasa) que se llama en cada ajuste
+    """
+
+    def __init__(
+        self,
+        nombre,
+        tasa_inicial,
+        al_cambiar_tasa=None,
+        tasa_minima=TASA_MINIMA,
+        tasa_maxima=TASA_MAXIMA,
+        incremento=INCREMENTO_TASA,
+        factor_recorte=FACTOR_RECORTE,
+    ):
+        self.nombre = nombre
+        self.tasa = tasa_inicial
+        self.al_cambiar_tasa = al_cambiar_tasa
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.incremento = incremento
+        self.factor_recorte = factor_recorte
+
+        self.latencia_media = None  # EWMA de la latencia de respuestas sanas
+        self.incrementos_seguidos = 0
+        self.recortes_seguidos = 0
+        self.total_incrementos = 0
+        self.total_recortes = 0
+        self.pausa_hasta = 0.0  # time.monotonic() hasta el que no se pide nada
+
+    def _fijar_tasa(self, nueva):
+        self.tasa = min(self.tasa_maxima, max(self.tasa_minima, nueva))
+        if self.al_cambiar_tasa:
+            self.al_cambiar_tasa(self.tasa)
+
+    def _es_pico(self, latencia):
+        if latencia > LATENCIA_MAXIMA:
+            return True
+        return (
+            self.latencia_media is not None
+            and latencia > LATENCIA_PICO_MINIMA
+            and latencia > FACTOR_PICO_LATENCIA * self.latencia_media
+        )
+
+    def registrar_respuesta(self, status, latencia, retry_after=None):
+        """Actualiza la tasa a partir del status y la latencia de una respuesta"""
+        if status in STATUS_SOBRECARGA:
+            self.recortar(f"status {status}", retry_after)
+        elif status == 200 and self._es_pico(latencia):
+            self.recortar(f"pico de latencia {latencia:.1f}s")
+        elif status == 200:
+            self._actualizar_latencia(latencia)
+            self.aumentar()
+
+    def registrar_fallo(self, motivo):
+        """Timeout o error de red: se trata como sobrecarga"""
+        self.recortar(motivo)
+
+    def _actualizar_latencia(self, latencia):
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media = 0.8 * self.latencia_media + 0.2 * latencia
+
+    def aumentar(self):
+        anterior = self.tasa
+        self.recortes_seguidos = 0
+        self.incrementos_seguidos += 1
+        self.total_incrementos += 1
+        self._fijar_tasa(self.tasa + self.incremento)
+
+        if (
+            self.tasa != anterior
+            and self.incrementos_seguidos % LOG_CADA_INCREMENTOS == 0
+        ):
+            print(
+                f"🐇 [{self.nombre}] tasa {self.tasa:.2f} req/s "
+                f"(latencia media {self.latencia_media:.2f}s)"
+            )
+
+    def recortar(self, motivo, retry_after=None):
+        anterior = self.tasa
+        self.incrementos_seguidos = 0
+        self.recortes_seguidos += 1
+        self.total_recortes += 1
+        self._fijar_tasa(self.tasa * self.factor_recorte)
+
+        # Si el servidor pide esperar (Retry-After), respetarlo
+        if retry_after:
+            self.pausa_hasta = max(self.pausa_hasta, time.monotonic() + retry_after)
+
+        mensaje = (
+            f"🐢 [{self.nombre}] {motivo}: tasa {anterior:.2f} → {self.tasa:.2f} req/s "
+            f"(recortes seguidos: {self.recortes_seguidos})"
+        )
+        if retry_after:
+            mensaje += f" | Retry-After {retry_after:.0f}s"
+        print(mensaje)
+
+    def intervalo(self):
+        """Segundos a esperar entre requests con la tasa actual"""
+        return 1 / self.tasa
+
+    def imprimir_estado(self):
+        latencia = (
+            f"{self.latencia_media:.2f}s" if self.latencia_media is not None else "-"
+        )
+        print(
+            f"   [{self.nombre}] tasa final {self.tasa:.2f} req/s | "
+            f"{self.total_incrementos} incrementos | {self.total_recortes} recortes | "
+            f"latencia media {latencia}"
+        )
+
+
+class Disyuntor:
+    """
+    Circuit breaker de un host (o de una zona dentro del host)
+
+    cerrado:     pasan todas las requests; se cuentan los fallos seguidos
+    abierto:     tras `umbral` fallos seguidos no pasa nada durante el
+                 enfriamiento, que se duplica en cada apertura seguida (hasta
+                 `enfriamiento_maximo`) y se sortea con jitter para que varios
+                 disyuntores no vuelvan todos juntos
+    semiabierto: vencido el enfriamiento pasa una sola request de prueba; si
+                 anda se cierra, si falla se vuelve a abrir
+
+    Args:
+        nombre: Identificador para los logs
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    ESPERA_PRUEBA = 1.0  # Segundos entre consultas mientras la prueba está en vuelo
+
+    def __init__(
+        self,
+        nombre,
+        umbral=FALLOS_PARA_ABRIR,
+        enfriamiento=ENFRIAMIENTO_INICIAL,
+        enfriamiento_maximo=ENFRIAMIENTO_MAXIMO,
+        jitter=JITTER_ENFRIAMIENTO,
+        rng=random,
+    ):
+        self.nombre = nombre
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.enfriamiento_maximo = enfriamiento_maximo
+        self.jitter = jitter
+        self.rng = rng
+
+        self.estado = self.CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas_seguidas = 0
+        self.abierto_hasta = 0.0  # time.monotonic()
+        self.prueba_en_vuelo = False
+        self.total_aperturas = 0
+        self.evitadas = 0  # Requests que no se hicieron por estar abierto
+
+    def abierto(self):
+        return self.estado != self.CERRADO
+
+    def espera(self):
+        """Segundos hasta que pueda pasar una request (0 si ya puede)"""
+        if self.estado == self.ABIERTO:
+            return max(0.0, self.abierto_hasta - time.monotonic())
+        if self.estado == self.SEMIABIERTO and self.prueba_en_vuelo:
+            return self.ESPERA_PRUEBA
+        return 0.0
+
+    def permitir(self):
+        """
+        Decide si se puede hacer una request ahora
+
+        En semiabierto deja pasar solo la primera (la prueba); quien la hace
+        tiene que informar el resultado con registrar_exito/registrar_fallo.
+        """
+        if self.estado == self.ABIERTO and time.monotonic() >= self.abierto_hasta:
+            self.estado = self.SEMIABIERTO
+            print(f"🔌 [{self.nombre}] enfriamiento cumplido, probando con una request")
+        if self.estado == self.CERRADO:
+            return True
+        if self.estado == self.SEMIABIERTO and not self.prueba_en_vuelo:
+            self.prueba_en_vuelo = True
+            return True
+        self.evitadas += 1
+        return False
+
+    def registrar_exito(self):
+        self.fallos_seguidos = 0
+        # Una respuesta tardía de antes de abrirse no alcanza para cerrarlo
+        if self.estado == self.SEMIABIERTO:
+            print(f"🔌 [{self.nombre}] la prueba anduvo: disyuntor cerrado")
+            self.estado = self.CERRADO
+            self.aperturas_seguidas = 0
+            self.prueba_en_vuelo = False
+
+    def registrar_fallo(self):
+        self.fallos_seguidos += 1
+        if self.estado == self.SEMIABIERTO or (
+            self.estado == self.CERRADO and self.fallos_seguidos >= self.umbral
+        ):
+            self._abrir()
+
+    def _abrir(self):
+        self.aperturas_seguidas += 1
+        self.total_aperturas += 1
+        base = min(
+            self.enfriamiento_maximo,
+            self.enfriamiento * 2 ** (self.aperturas_seguidas - 1),
+        )
+        enfriamiento = base * (1 - self.jitter * self.rng.random())
+        self.estado = self.ABIERTO
+        self.prueba_en_vuelo = False
+        self.abierto_hasta = time.monotonic() + enfriamiento
+        print(
+            f"🔌 [{self.nombre}] {self.fallos_seguidos} fallos seguidos: disyuntor "
+            f"abierto por {enfriamiento:.0f}s (apertura {self.aperturas_seguidas})"
+        )
+
+    def imprimir_estado(self):
+        print(
+            f"   [{self.nombre}] {self.estado} | {self.total_aperturas} aperturas | "
+            f"{self.evitadas} requests evitadas"
+        )
+
+
+def leer_retry_after(response):
+    """Devuelve los segundos del header Retry-After, o None si no viene"""
+    valor = response.headers.get("Retry-After")
+    if valor is None:
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        return None
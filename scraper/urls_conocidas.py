@@ -0,0 +1,161 @@
+"""
+Conjunto en memoria de las URLs que ya están en la base de datos
+
+Se carga una vez por corrida y reemplaza el SELECT por fila que hacía
+guardar_en_db para detectar duplicados. Hay dos modos:
+
+    exacto: un set de Python con todas las URLs (sin falsos positivos)
+    bloom:  un filtro de Bloom mucho más chico; un "no está" es seguro y un
+            "puede estar" se confirma contra la base
+
+Las URLs que se insertan durante la corrida quedan pendientes hasta que el
+commit que las guarda sale bien; si falla se descartan, así una URL que no
+llegó a la base no cuenta como conocida.
+"""
+
+import hashlib
+import math
+import sqlite3
+import sys
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre un bytearray
+
+    Args:
+        capacidad: Cantidad de elementos esperada
+        tasa_falsos_positivos: Probabilidad de falso positivo con esa capacidad
+    """
+
+    def __init__(self, capacidad, tasa_falsos_positivos=0.001):
+        capacidad = max(capacidad, 1)
+        self.bits = max(
+            8, int(-capacidad * math.log(tasa_falsos_positivos) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.bits / capacidad * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.elementos = 0
+
+    def _posiciones(self, clave):
+        # Double hashing: h1 + i*h2 con dos mitades de un blake2b
+        digest = hashlib.blake2b(clave.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def agregar(self, clave):
+        for pos in self._posiciones(clave):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+        self.elementos += 1
+
+    def __contains__(self, clave):
+        return all(
+            self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._posiciones(clave)
+        )
+
+    def memoria_bytes(self):
+        return sys.getsizeof(self.array)
+
+
+class URLsConocidas:
+    """
+    Pertenencia de URLs en O(1) para deduplicar al insertar
+
+    Args:
+        modo: "exacto" (set) o "bloom" (filtro de Bloom + confirmación en DB)
+        tasa_falsos_positivos: Solo para el modo bloom
+    """
+
+    def __init__(self, modo="exacto", tasa_falsos_positivos=0.001):
+        if modo not in ("exacto", "bloom"):
+            raise ValueError(f"Modo de URLs conocidas inválido: {modo}")
+        self.modo = modo
+        self.tasa_falsos_positivos = tasa_falsos_positivos
+        self.urls = set()
+        self.filtro = None
+        self.pendientes = set()  # Insertadas en la transacción abierta
+        self.consultas_db = 0  # Confirmaciones en DB (solo modo bloom)
+
+    def cargar(self, conn):
+        """Lee todas las URLs de la tabla propiedades"""
+        cursor = conn.cursor()
+        if self.modo == "exacto":
+            cursor.execute("SELECT url FROM propiedades")
+            self.urls = {url for (url,) in cursor}
+        else:
+            cursor.execute("SELECT COUNT(*) FROM propiedades")
+            total = cursor.fetchone()[0]
+            # Margen para lo que se inserte durante la corrida
+            self.filtro = FiltroBloom(
+                max(2 * total, 100_000), self.tasa_falsos_positivos
+            )
+            cursor.execute("SELECT url FROM propiedades")
+            for (url,) in cursor:
+                self.filtro.agregar(url)
+        return self
+
+    def contiene(self, url, cursor):
+        """
+        Indica si la URL ya está en la base
+
+        En modo bloom usa `cursor` para confirmar los posibles positivos.
+        Las URLs pendientes cuentan como conocidas: están en la misma
+        transacción que todavía no se confirmó.
+        """
+        if url in self.pendientes:
+            return True
+        if self.modo == "exacto":
+            return url in self.urls
+        if url not in self.filtro:
+            return False
+        self.consultas_db += 1
+        cursor.execute("SELECT 1 FROM propiedades WHERE url = ?", (url,))
+        return cursor.fetchone() is not None
+
+    def agregar(self, url):
+        """Anota una URL insertada; pasa a conocida con confirmar_pendientes"""
+        self.pendientes.add(url)
+
+    def confirmar_pendientes(self):
+        """Llamar después del commit que guardó las URLs pendientes"""
+        for url in self.pendientes:
+            if self.modo == "exacto":
+                self.urls.add(url)
+            else:
+                self.filtro.agregar(url)
+        self.pendientes = set()
+
+    def descartar_pendientes(self):
+        """Llamar si el commit falló: las URLs pendientes no están en la base"""
+        self.pendientes = set()
+
+    def __len__(self):
+        return len(self.urls) if self.modo == "exacto" else self.filtro.elementos
+
+    def memoria_bytes(self):
+        """Memoria aproximada de la estructura (incluye los strings en modo exacto)"""
+        if self.modo == "bloom":
+            return self.filtro.memoria_bytes()
+        return sys.getsizeof(self.urls) + sum(sys.getsizeof(url) for url in self.urls)
+
+    def imprimir_resumen(self):
+        print(
+            f"🔎 URLs conocidas ({self.modo}): {len(self):,} URLs en "
+            f"{self.memoria_bytes() / 1e6:.1f} MB"
+        )
+        if self.modo == "bloom":
+            print(
+                f"   Filtro: {self.filtro.bits:,} bits, {self.filtro.hashes} hashes, "
+                f"FP objetivo {self.tasa_falsos_positivos:.2%} | "
+                f"{self.consultas_db:,} confirmaciones en DB"
+            )
+
+
+def cargar_urls_conocidas(db_path, modo="exacto", tasa_falsos_positivos=0.001):
+    """Abre la base, carga las URLs conocidas y devuelve el URLsConocidas"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return URLsConocidas(modo, tasa_falsos_positivos).cargar(conn)
+    finally:
+        conn.close()
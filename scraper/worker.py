@@ -0,0 +1,167 @@
+"""
+Worker de la cola de trabajo: toma páginas, las descarga, parsea y guarda
+
+Se pueden correr varios a la vez en la misma máquina (la base está en WAL,
+que no sirve entre máquinas); cada uno toma lotes de páginas de `trabajos`
+con un lease (ver cola_trabajo.py) y termina cuando no queda nada pendiente.
+
+Uso:
+    python worker.py --sembrar [--reiniciar]   # encola la página 1 de cada ciudad
+    python worker.py [--nombre NOMBRE]         # procesa hasta vaciar la cola
+"""
+
+import os
+import socket
+import sys
+import time
+
+from archivo_html import ArchivoHTML
+from cola_trabajo import ColaTrabajo, Latido
+from config import (
+    CIUDADES_POR_ZONA,
+    ESPERA_COLA_VACIA,
+    MAX_PAGINAS,
+    TAMANO_LOTE_DB,
+    TRABAJOS_POR_LOTE,
+    calcular_paginas,
+    generar_url,
+)
+from escritor_db import EscritorDB
+from fetcher import FetcherAsincrono
+from http_client import ESTADISTICAS
+from parseo import ESTADISTICAS_PARSEO
+from pipeline import PipelineScraping
+from scraper_ml_incremental import crear_tabla_si_no_existe, extraer_data
+
+DB_PATH = "../propiedades.db"
+
+
+def sembrar(cola, reiniciar):
+    ciudades = [
+        (zona, ciudad)
+        for zona, ciudades in CIUDADES_POR_ZONA.items()
+        for ciudad in ciudades
+    ]
+    encoladas = cola.sembrar(ciudades, reiniciar)
+    print(f"🌱 {encoladas} ciudades encoladas (de {len(ciudades)})")
+    cola.imprimir_resumen()
+
+
+def procesar_lote(pipeline, cola, escritor, nombre, trabajos, totales):
+    """Descarga y guarda un lote de páginas tomadas"""
+    por_pagina = {(t.zona, t.ciudad, t.pagina): t for t in trabajos}
+
+    def procesar_pagina(zona, ciudad, pagina, parseada, fecha):
+        trabajo = por_pagina[(zona, ciudad, pagina)]
+        prefijo = f"    [{ciudad}] Página {pagina}..."
+        if parseada is None:
+            print(f"{prefijo} ✗ Vuelve a la cola")
+            cola.fallar(trabajo, nombre, "descarga o parseo")
+            return True
+
+        propiedades = parseada.propiedades
+        siguientes = ()
+        if pagina == 1 and propiedades:
+            total = parseada.total_resultados
+            paginas = calcular_paginas(total) if total is not None else MAX_PAGINAS
+            siguientes = range(2, paginas + 1)
+
+        escritor.agregar(propiedades)
+        cola.completar(escritor, trabajo, nombre, len(propiedades), siguientes)
+        totales["paginas"] += 1
+        totales["propiedades"] += len(propiedades)
+
+        mensaje = f"{prefijo} ✓ {len(propiedades)} propiedades"
+        if siguientes:
+            mensaje += f" (+{len(siguientes)} páginas encoladas)"
+        print(mensaje)
+        return True
+
+    # Cada página es su propia tarea: el fetcher las reparte entre sus slots
+    pipeline.recorrer(
+        [(t.zona, t.ciudad, [t.pagina]) for t in trabajos],
+        generar_url,
+        procesar_pagina,
+    )
+    # Confirmar antes de soltar los leases: lo hecho queda hecho en la base
+    escritor.confirmar()
+
+    # Lo que el disyuntor dejó sin pedir vuelve a la cola sin gastar intento
+    pendientes = pipeline.fuente.pendientes
+    salteadas = [
+        por_pagina[(zona, ciudad, pagina)]
+        for (zona, ciudad), paginas in pendientes.items()
+        for pagina in paginas
+    ]
+    pendientes.clear()
+    if salteadas:
+        print(f"    ⏸️  {len(salteadas)} páginas vuelven a la cola sin pedirse")
+        cola.devolver(salteadas, nombre)
+
+
+def main():
+    if "--sembrar" in sys.argv[1:]:
+        crear_tabla_si_no_existe(DB_PATH)
+        cola = ColaTrabajo(DB_PATH)
+        sembrar(cola, "--reiniciar" in sys.argv[1:])
+        cola.cerrar()
+        return
+
+    nombre = f"{socket.gethostname()}-{os.getpid()}"
+    for arg in sys.argv[1:]:
+        if arg.startswith("--nombre="):
+            nombre = arg.partition("=")[2]
+
+    print(f"\n{'=' * 60}")
+    print(f"👷 WORKER {nombre}")
+    print(f"{'=' * 60}\n")
+
+    crear_tabla_si_no_existe(DB_PATH)
+    cola = ColaTrabajo(DB_PATH)
+    # Sin URLs conocidas en memoria: otros workers insertan a la vez y el set
+    # quedaría viejo. El upsert por URL resuelve los duplicados en la base
+    escritor = EscritorDB(DB_PATH, TAMANO_LOTE_DB)
+    latido = Latido(DB_PATH, nombre)
+    latido.start()
+
+    totales = {"paginas": 0, "propiedades": 0}
+    fuente = FetcherAsincrono(archivo=ArchivoHTML())
+    try:
+        with PipelineScraping(fuente, extraer_data) as pipeline:
+            while True:
+                trabajos = cola.tomar(nombre, TRABAJOS_POR_LOTE)
+                if not trabajos:
+                    # Otro worker puede estar por encolar las páginas 2..n de
+                    # una ciudad, o morir y dejar su lease vencer
+                    if cola.contar().get("tomado"):
+                        time.sleep(ESPERA_COLA_VACIA)
+                        continue
+                    break
+                latido.vigilar(trabajos)
+                try:
+                    procesar_lote(pipeline, cola, escritor, nombre, trabajos, totales)
+                finally:
+                    latido.soltar(trabajos)
+    finally:
+        latido.parar()
+        escritor.cerrar()
+        # Si se cortó a mitad de un lote, lo no confirmado vuelve a la cola
+        cola.liberar(nombre)
+
+    print(f"\n{'=' * 60}")
+    print(f"✅ COLA VACÍA ({nombre})")
+    print(
+        f"PÁGINAS: {totales['paginas']} | PROPIEDADES: {totales['propiedades']} | "
+        f"INSERTADAS EN DB: {escritor.insertados}"
+    )
+    cola.imprimir_resumen()
+    fuente.imprimir_resumen()
+    pipeline.imprimir_resumen()
+    ESTADISTICAS.imprimir_resumen()
+    ESTADISTICAS_PARSEO.imprimir_resumen()
+    print(f"{'=' * 60}\n")
+    cola.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+ArchivoHTML: totales acumulados sin recorrer el índice
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from archivo_html import ArchivoHTML
+
+
+def guardar_paginas(archivo, cantidad, distintas):
+    for i in range(cantidad):
+        html = f"<html>{i % distintas}" + "x" * 1000 + "</html>"
+        archivo.guardar(f"https://ejemplo.com/{i}", html, "z", "c", i, "2026-01-01")
+
+
+def test_totales_se_llevan_al_guardar(tmp_path):
+    archivo = ArchivoHTML(str(tmp_path))
+    guardar_paginas(archivo, 10, distintas=4)
+
+    totales = archivo._leer_totales()
+    assert totales["descargas"] == 10
+    assert totales["blobs"] == 4
+    assert archivo.descargas == 10 and archivo.blobs_nuevos == 4
+    # Una corrida nueva sigue sumando sobre lo que había
+    otra = ArchivoHTML(str(tmp_path))
+    guardar_paginas(otra, 2, distintas=1)
+    assert otra._leer_totales()["descargas"] == 12
+    assert otra._leer_totales()["blobs"] == 4
+
+
+def test_un_archivo_sin_totales_se_recuenta_igual(tmp_path):
+    archivo = ArchivoHTML(str(tmp_path))
+    guardar_paginas(archivo, 10, distintas=4)
+    llevados = archivo._leer_totales()
+
+    os.remove(archivo.ruta_totales)
+    assert archivo._leer_totales() == llevados
@@ -0,0 +1,128 @@
+"""
+ColaTrabajo: leases, reintentos y páginas devueltas sin pedir
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from cola_trabajo import ColaTrabajo
+from escritor_db import EscritorDB
+from scraper_ml_incremental import crear_tabla_si_no_existe
+
+CIUDADES = [("GBA Norte", "pilar"), ("GBA Sur", "quilmes")]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    ruta = str(tmp_path / "propiedades.db")
+    crear_tabla_si_no_existe(ruta)
+    return ruta
+
+
+@pytest.fixture
+def cola(db_path):
+    cola = ColaTrabajo(db_path, lease=60, max_intentos=2)
+    cola.sembrar(CIUDADES)
+    yield cola
+    cola.cerrar()
+
+
+def estados(cola):
+    return dict(
+        cola.conn.execute("SELECT ciudad || '/' || pagina, estado FROM trabajos")
+    )
+
+
+def intentos(cola, trabajo):
+    return cola.conn.execute(
+        "SELECT intentos FROM trabajos WHERE id = ?", (trabajo.id,)
+    ).fetchone()[0]
+
+
+def test_dos_workers_no_toman_la_misma_pagina(cola):
+    a = cola.tomar("a", 1)
+    b = cola.tomar("b", 5)
+    assert len(a) == 1 and len(b) == 1
+    assert a[0].id != b[0].id
+    assert cola.tomar("c", 5) == []
+
+
+def test_lease_vencido_se_recupera_y_luego_falla(cola):
+    cola.lease = -1  # Cada toma ya nace vencida
+    primera = cola.tomar("a", 2)
+    segunda = cola.tomar("b", 2)
+    assert {t.id for t in segunda} == {t.id for t in primera}
+    assert cola.recuperados == 2
+
+    # Con max_intentos=2 el tercer vencimiento la da por fallida
+    assert cola.tomar("c", 2) == []
+    assert set(estados(cola).values()) == {"fallido"}
+
+
+def test_fallar_gasta_intentos_y_devolver_no(cola):
+    trabajo = next(t for t in cola.tomar("a", 2) if t.ciudad == "pilar")
+    cola.devolver([trabajo], "a")
+    assert estados(cola)["pilar/1"] == "pendiente"
+    assert intentos(cola, trabajo) == 0
+
+    for _ in range(2):
+        trabajo = next(t for t in cola.tomar("a", 2) if t.ciudad == "pilar")
+        cola.fallar(trabajo, "a", "descarga")
+    assert estados(cola)["pilar/1"] == "fallido"
+
+
+def test_completar_encola_el_resto_en_el_commit_de_las_filas(cola, db_path):
+    trabajo = next(t for t in cola.tomar("a", 2) if t.ciudad == "pilar")
+    escritor = EscritorDB(db_path)
+    cola.completar(escritor, trabajo, "a", 0, range(2, 4))
+    assert estados(cola)["pilar/1"] == "tomado"
+
+    escritor.cerrar()
+    assert estados(cola) == {
+        "pilar/1": "hecho",
+        "pilar/2": "pendiente",
+        "pilar/3": "pendiente",
+        "quilmes/1": "tomado",
+    }
+
+
+def test_un_worker_que_no_es_el_dueno_no_completa(cola, db_path):
+    trabajo = cola.tomar("a", 1)[0]
+    escritor = EscritorDB(db_path)
+    cola.completar(escritor, trabajo, "otro", 0)
+    escritor.cerrar()
+    assert "hecho" not in estados(cola).values()
+
+
+def test_worker_devuelve_lo_que_el_disyuntor_dejo_pendiente(cola, db_path):
+    from worker import procesar_lote
+
+    class PipelineFrenado:
+        """El disyuntor de quilmes está abierto: su página no se pide"""
+
+        class fuente:
+            pendientes = {}
+
+        def recorrer(self, tareas, generar_url, procesar):
+            for zona, ciudad, paginas in tareas:
+                if ciudad == "quilmes":
+                    self.fuente.pendientes[(zona, ciudad)] = list(paginas)
+
+    trabajos = cola.tomar("a", 2)
+    escritor = EscritorDB(db_path)
+    pipeline = PipelineFrenado()
+    procesar_lote(pipeline, cola, escritor, "a", trabajos, {})
+    escritor.cerrar()
+
+    quilmes = next(t for t in trabajos if t.ciudad == "quilmes")
+    assert estados(cola)["quilmes/1"] == "pendiente"
+    assert intentos(cola, quilmes) == 0
+    assert pipeline.fuente.pendientes == {}
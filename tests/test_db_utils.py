@@ -0,0 +1,93 @@
+"""
+CachePropiedades: puesta al día incremental del DataFrame del dashboard
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from data.db_utils import CachePropiedades
+from escritor_db import EscritorDB
+from scraper_ml_incremental import crear_tabla_si_no_existe
+
+
+def propiedad(i, ciudad="pilar", precio="100.000", fecha="2026-01-01 10:00:00"):
+    return {
+        "fecha_scraping": fecha,
+        "zona": "GBA Norte",
+        "ciudad": ciudad,
+        "precio": precio,
+        "ambientes": 3,
+        "bathrooms": 1,
+        "area": 50,
+        "url": f"https://casa.mercadolibre.com.ar/MLA-{i}",
+    }
+
+
+def guardar(db_path, propiedades):
+    with EscritorDB(db_path) as escritor:
+        escritor.agregar(propiedades)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    ruta = str(tmp_path / "propiedades.db")
+    crear_tabla_si_no_existe(ruta)
+    guardar(ruta, [propiedad(i) for i in range(10)])
+    return ruta
+
+
+def test_anexa_filas_nuevas_al_frame_cacheado(db_path):
+    cache = CachePropiedades(db_path)
+    assert len(cache.obtener()) == 10
+
+    guardar(db_path, [propiedad(100, ciudad="escobar")])
+    df = cache.obtener()
+
+    assert len(df) == 11
+    assert cache.recargas == 1
+    assert cache.anexadas == 1
+    assert isinstance(df["ciudad"].dtype, pd.CategoricalDtype)
+    assert set(df["ciudad"].cat.categories) == {"pilar", "escobar"}
+
+
+def test_reemplaza_filas_con_cambio_de_precio(db_path):
+    cache = CachePropiedades(db_path)
+    cache.obtener()
+
+    guardar(db_path, [propiedad(3, precio="90.000", fecha="2026-01-02 10:00:00")])
+    df = cache.obtener()
+
+    assert len(df) == 10
+    assert cache.actualizadas == 1
+    assert df.loc[df["url"].str.endswith("MLA-3"), "precio"].item() == 90_000
+    assert isinstance(df["ciudad"].dtype, pd.CategoricalDtype)
+
+
+def test_sin_cambios_devuelve_el_mismo_frame(db_path):
+    cache = CachePropiedades(db_path)
+    assert cache.obtener() is cache.obtener()
+
+
+def test_recarga_si_cambia_la_generacion(db_path):
+    cache = CachePropiedades(db_path)
+    cache.obtener()
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE propiedades SET precio_por_m2 = 1")
+        conn.execute("UPDATE version_datos SET generacion = generacion + 1")
+    conn.close()
+
+    assert (cache.obtener()["precio_por_m2"] == 1).all()
+    assert cache.recargas == 2
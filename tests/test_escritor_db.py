@@ -0,0 +1,209 @@
+"""
+EscritorDB: commits por lote, upsert con historial y transacciones atómicas
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from escritor_db import EscritorDB
+from scraper_ml_incremental import crear_tabla_si_no_existe
+from urls_conocidas import cargar_urls_conocidas
+
+
+def propiedad(i, precio="100.000", area=50, fecha="2026-01-01 10:00:00"):
+    return {
+        "fecha_scraping": fecha,
+        "zona": "GBA Norte",
+        "ciudad": "pilar",
+        "precio": precio,
+        "ambientes": 3,
+        "bathrooms": 1,
+        "area": area,
+        "url": f"https://casa.mercadolibre.com.ar/MLA-{i}",
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    ruta = str(tmp_path / "propiedades.db")
+    crear_tabla_si_no_existe(ruta)
+    return ruta
+
+
+def contar(db_path, tabla="propiedades"):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_confirma_cada_tamano_lote_filas(db_path):
+    confirmadas = []
+    with EscritorDB(db_path, tamano_lote=5) as escritor:
+        escritor.agregar(
+            [propiedad(i) for i in range(3)], lambda: confirmadas.append(1)
+        )
+        assert escritor.commits == 0 and contar(db_path) == 0
+        assert confirmadas == []
+
+        escritor.agregar([propiedad(i) for i in range(3, 6)])
+        assert escritor.commits == 1 and contar(db_path) == 6
+        assert confirmadas == [1]
+
+        escritor.agregar([propiedad(6)])
+    assert contar(db_path) == 7
+    assert escritor.insertados == 7
+
+
+def test_descarta_filas_invalidas_y_cuenta_las_nuevas(db_path):
+    urls = cargar_urls_conocidas(db_path)
+    with EscritorDB(db_path, urls_conocidas=urls) as escritor:
+        invalidas = [propiedad(90, precio=None), propiedad(91, precio="consultar")]
+        assert escritor.agregar([propiedad(1), propiedad(2)] + invalidas) == (2, 2)
+        # Conocida en el mismo lote, antes del commit
+        assert escritor.agregar([propiedad(2), propiedad(3)]) == (1, 0)
+        assert escritor.vistas == 1
+
+    assert contar(db_path) == 3
+    assert escritor.insertados == 3
+
+
+def test_un_commit_fallido_no_deja_nada_a_medias(db_path):
+    urls = cargar_urls_conocidas(db_path)
+    escritor = EscritorDB(db_path, urls_conocidas=urls)
+    confirmadas = []
+    escritor.agregar([propiedad(1)], lambda: confirmadas.append(1))
+    escritor.en_mismo_commit("INSERT INTO tabla_inexistente VALUES (1)")
+
+    with pytest.raises(sqlite3.OperationalError):
+        escritor.confirmar()
+
+    assert contar(db_path) == 0
+    assert confirmadas == []
+    # La URL no llegó a la base: no puede quedar como conocida
+    assert not urls.contiene(propiedad(1)["url"], None)
+    assert escritor.insertados == 0
+    escritor.conn.close()
+
+
+def guardar(db_path, propiedades):
+    with EscritorDB(db_path) as escritor:
+        escritor.agregar(propiedades)
+    return escritor
+
+
+def fila(db_path, i):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute(
+            "SELECT * FROM propiedades WHERE url = ?", (propiedad(i)["url"],)
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def historial(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT fecha, precio, area FROM historial_precios ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_volver_a_ver_sin_cambios_mueve_last_seen_sin_historial(db_path):
+    guardar(db_path, [propiedad(1)])
+    escritor = guardar(db_path, [propiedad(1, fecha="2026-01-05 10:00:00")])
+
+    vista = fila(db_path, 1)
+    assert vista["first_seen"] == "2026-01-01 10:00:00"
+    assert vista["last_seen"] == "2026-01-05 10:00:00"
+    assert contar(db_path) == 1
+    assert historial(db_path) == []
+    assert (escritor.insertados, escritor.cambios) == (0, 0)
+
+
+def test_cambio_de_precio_guarda_el_estado_inicial_y_el_nuevo(db_path):
+    guardar(db_path, [propiedad(1)])
+    escritor = guardar(
+        db_path, [propiedad(1, precio="90.000", fecha="2026-01-05 10:00:00")]
+    )
+
+    assert fila(db_path, 1)["precio"] == 90_000
+    assert fila(db_path, 1)["precio_por_m2"] == 1800
+    assert historial(db_path) == [
+        ("2026-01-01 10:00:00", 100_000, 50),
+        ("2026-01-05 10:00:00", 90_000, 50),
+    ]
+    assert escritor.cambios == 2
+
+
+def test_dato_opcional_faltante_conserva_el_anterior(db_path):
+    guardar(db_path, [propiedad(1)])
+    guardar(db_path, [propiedad(1, area=None, fecha="2026-01-05 10:00:00")])
+
+    assert fila(db_path, 1)["area"] == 50
+    assert historial(db_path) == []
+
+
+def test_replay_de_una_pagina_vieja_no_retrocede_last_seen(db_path):
+    guardar(db_path, [propiedad(1, fecha="2026-01-05 10:00:00")])
+    guardar(db_path, [propiedad(1, precio="80.000", fecha="2026-01-01 10:00:00")])
+
+    vista = fila(db_path, 1)
+    assert vista["last_seen"] == "2026-01-05 10:00:00"
+    assert vista["precio"] == 100_000
+    assert historial(db_path) == []
+
+
+def test_la_pagina_queda_hecha_en_el_mismo_commit_que_sus_filas(db_path):
+    escritor = EscritorDB(db_path, tamano_lote=100)
+    escritor.planificar_ciudad("GBA Norte", "pilar", 3)
+    escritor.agregar(
+        [propiedad(1), propiedad(2)],
+        pagina=("GBA Norte", "pilar", 1, "2026-01-01 10:00:00"),
+    )
+    # Antes del commit no hay ni filas ni progreso
+    assert contar(db_path) == 0
+    assert contar(db_path, "crawl_state") == 0
+
+    escritor.confirmar()
+    escritor.terminar_ciudad("GBA Norte", "pilar")
+    escritor.cerrar()
+
+    escritor = EscritorDB(db_path)
+    paginas_hechas, ciudades = escritor.estado_crawl()
+    assert paginas_hechas == {("GBA Norte", "pilar"): {1}}
+    assert ciudades == {("GBA Norte", "pilar"): (3, True)}
+    assert contar(db_path) == 2
+
+    escritor.borrar_estado_crawl()
+    assert escritor.estado_crawl() == ({}, {})
+    escritor.cerrar()
+
+
+def test_si_el_commit_falla_la_pagina_no_queda_hecha(db_path):
+    escritor = EscritorDB(db_path)
+    escritor.agregar(
+        [propiedad(1)], pagina=("GBA Norte", "pilar", 1, "2026-01-01 10:00:00")
+    )
+    escritor.en_mismo_commit("INSERT INTO tabla_inexistente VALUES (1)")
+
+    with pytest.raises(sqlite3.OperationalError):
+        escritor.confirmar()
+
+    assert contar(db_path, "crawl_state") == 0
+    assert escritor.estado_crawl() == ({}, {})
+    escritor.conn.close()
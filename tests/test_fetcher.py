@@ -0,0 +1,122 @@
+"""
+FetcherAsincrono, TokenBucket y planificar_recorrido
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from fetcher import FetcherAsincrono, TokenBucket, planificar_recorrido
+
+
+class DisyuntorFijo:
+    def __init__(self, abierto):
+        self._abierto = abierto
+
+    def abierto(self):
+        return self._abierto
+
+    def espera(self):
+        return 0.0
+
+
+class FetcherFalso(FetcherAsincrono):
+    """Devuelve HTML para todo salvo las ciudades bloqueadas, sin red"""
+
+    def __init__(self, bloqueadas):
+        super().__init__(concurrencia=2, max_reencoladas=0)
+        self.bloqueadas = bloqueadas
+        self.pedidas = []
+
+    def _disyuntor(self, url, zona=None):
+        return DisyuntorFijo(any(ciudad in url for ciudad in self.bloqueadas))
+
+    async def obtener(self, url, zona=None):
+        if any(ciudad in url for ciudad in self.bloqueadas):
+            return None
+        self.pedidas.append(url)
+        return "<html>"
+
+
+def generar_url(zona, ciudad, pagina):
+    return f"https://ejemplo.com/{ciudad}/{pagina}"
+
+
+def test_ciudad_con_pagina_1_pendiente_no_entra_en_el_plan():
+    fetcher = FetcherFalso({"quilmes"})
+    procesadas = []
+
+    def procesar(zona, ciudad, pagina, html, fecha):
+        procesadas.append((ciudad, pagina))
+        return True
+
+    tareas, paginas_por_ciudad = planificar_recorrido(
+        fetcher,
+        [("sur", "quilmes"), ("norte", "pilar")],
+        generar_url,
+        procesar,
+        leer_total=lambda html: 96,
+    )
+
+    assert [ciudad for _, ciudad, _ in tareas] == ["pilar"]
+    assert ("sur", "quilmes") not in paginas_por_ciudad
+    assert procesadas == [("pilar", 1)]
+    assert fetcher.pendientes == {("sur", "quilmes"): [1]}
+
+    terminadas = []
+    fetcher.recorrer(
+        tareas, generar_url, procesar, lambda zona, ciudad: terminadas.append(ciudad)
+    )
+    assert terminadas == ["pilar"]
+    assert fetcher.pendientes == {("sur", "quilmes"): [1]}
+
+
+def test_pendientes_se_acumulan_y_se_limpian_al_recorrer_de_nuevo():
+    fetcher = FetcherFalso({"quilmes"})
+
+    def procesar(zona, ciudad, pagina, html, fecha):
+        return True
+
+    # Varias tareas de una misma ciudad (como las arma el worker)
+    fetcher.recorrer(
+        [("sur", "quilmes", [3]), ("sur", "quilmes", [5])], generar_url, procesar
+    )
+    assert sorted(fetcher.pendientes[("sur", "quilmes")]) == [3, 5]
+
+    fetcher.bloqueadas = set()
+    fetcher.recorrer([("sur", "quilmes", [3, 5])], generar_url, procesar)
+    assert fetcher.pendientes == {}
+
+
+async def adquirir_varios(bucket, cantidad):
+    inicio = time.monotonic()
+    await asyncio.gather(*(bucket.adquirir() for _ in range(cantidad)))
+    return time.monotonic() - inicio
+
+
+def test_token_bucket_espacia_las_requests_segun_la_tasa():
+    bucket = TokenBucket(tasa=20)
+    # El primer token está disponible; los otros 4 se recargan a 20/s
+    duracion = asyncio.run(adquirir_varios(bucket, 5))
+    assert 4 / 20 <= duracion < 4 / 20 + 0.15
+
+
+def test_token_bucket_deja_pasar_una_rafaga_de_capacidad():
+    bucket = TokenBucket(tasa=10, capacidad=3)
+    assert asyncio.run(adquirir_varios(bucket, 3)) < 0.05
+    assert asyncio.run(adquirir_varios(bucket, 1)) >= 1 / 10 - 0.01
+
+
+def test_token_bucket_sirve_en_varios_event_loops():
+    # recorrer() hace un asyncio.run por pasada: el Lock no puede quedar
+    # atado al loop de la primera
+    bucket = TokenBucket(tasa=100)
+    asyncio.run(adquirir_varios(bucket, 3))
+    asyncio.run(adquirir_varios(bucket, 3))
@@ -0,0 +1,77 @@
+"""
+Backends de parseo.py: json, lxml y html.parser dan lo mismo por tarjeta
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+
+from paginas_sinteticas import generar_pagina
+from parseo import HAY_LXML, extraer_tarjetas, tarjetas_desde_json
+
+
+def registros(html, backend):
+    return [
+        (t["precio"], t["caracteristicas"], t["url"])
+        for t in extraer_tarjetas(html, backend)
+    ]
+
+
+@pytest.fixture(scope="module")
+def paginas():
+    rng = random.Random(7)
+    return [
+        generar_pagina(rng, con_json=i % 2 == 0, relleno_kb=20, inicio=i * 48)
+        for i in range(6)
+    ]
+
+
+@pytest.mark.skipif(not HAY_LXML, reason="lxml no está instalado")
+def test_lxml_igual_a_html_parser(paginas):
+    for html in paginas:
+        esperado = registros(html, "html.parser")
+        assert len(esperado) == 48
+        assert registros(html, "lxml") == esperado
+
+
+def test_pagina_sin_tarjetas():
+    html = "<html><body><p>No hay publicaciones</p></body></html>"
+    assert extraer_tarjetas(html, "html.parser") == []
+    if HAY_LXML:
+        assert extraer_tarjetas(html, "lxml") == []
+
+
+def test_json_igual_a_html_parser(paginas):
+    con_json = paginas[::2]
+    for html in con_json:
+        assert registros(html, "json") == registros(html, "html.parser")
+        tarjetas = tarjetas_desde_json(html)
+        # Lo que el DOM no trae: título y ubicación siempre, moneda con precio
+        assert all(t["titulo"] and t["ubicacion"] for t in tarjetas)
+        assert all(t["moneda"] == "USD" for t in tarjetas if t["precio"])
+
+
+def test_json_cae_al_dom_si_la_pagina_no_trae_el_estado(paginas):
+    sin_json = paginas[1]
+    assert tarjetas_desde_json(sin_json) is None
+    assert registros(sin_json, "json") == registros(sin_json, "html.parser")
+
+
+def test_estado_roto_cae_al_dom(paginas):
+    html = paginas[0].replace('"pageState": {', '"pageState": {{', 1)
+    assert tarjetas_desde_json(html) is None
+    assert len(registros(html, "json")) == 48
+
+
+def test_backend_invalido():
+    with pytest.raises(ValueError):
+        extraer_tarjetas("<html></html>", "regex")
@@ -0,0 +1,96 @@
+"""
+PlanificadorChurn: tasa de nuevas por día medida sobre ventanas de un día
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from esquema_db import migrar_churn
+from planificador_churn import PlanificadorChurn, Tasa
+
+CIUDAD = ("GBA Norte", "pilar")
+
+
+class EscritorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def en_mismo_commit(self, sql, params):
+        self.conn.execute(sql, params)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrar_churn(conn)
+    yield conn
+    conn.close()
+
+
+def hace(dias):
+    return (datetime.now() - timedelta(days=dias)).replace(microsecond=0)
+
+
+def test_dos_visitas_seguidas_no_inflan_la_tasa(conn):
+    planificador = PlanificadorChurn(conn)
+    planificador.tasas[CIUDAD] = Tasa(hace(0.003), 3, 10, 20.0, 2.0)
+
+    planificador.registrar(EscritorFalso(conn), *CIUDAD, paginas=5, nuevas=4)
+
+    tasa = planificador.tasas[CIUDAD]
+    assert tasa.nuevas_por_dia == 20.0
+    assert tasa.nuevas_ventana == 4
+
+
+def test_visitas_cortas_se_acumulan_hasta_completar_un_dia(conn):
+    planificador = PlanificadorChurn(conn)
+    # Ventana abierta hace dos días con 30 nuevas ya vistas en visitas cortas
+    planificador.tasas[CIUDAD] = Tasa(hace(0.2), 3, 10, 20.0, 2.0, hace(2), 30)
+
+    planificador.registrar(EscritorFalso(conn), *CIUDAD, paginas=5, nuevas=10)
+
+    tasa = planificador.tasas[CIUDAD]
+    # 40 nuevas en 2 días = 20/día, que suavizado con 20 sigue en 20
+    assert tasa.nuevas_por_dia == pytest.approx(20.0, rel=1e-3)
+    assert tasa.nuevas_ventana == 0
+    assert tasa.inicio_ventana == tasa.ultima_visita
+
+
+def test_la_ventana_se_guarda_y_se_vuelve_a_leer(conn):
+    planificador = PlanificadorChurn(conn)
+    planificador.registrar(EscritorFalso(conn), *CIUDAD, paginas=5, nuevas=50)
+    planificador.registrar(EscritorFalso(conn), *CIUDAD, paginas=2, nuevas=1)
+
+    tasa = PlanificadorChurn(conn).tasas[CIUDAD]
+    assert tasa.visitas == 2
+    assert tasa.nuevas_por_dia is None  # Todavía no pasó un día
+    assert tasa.nuevas_ventana == 1
+
+
+def test_migra_una_tabla_sin_ventana():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE churn_ciudades (zona TEXT NOT NULL, ciudad TEXT NOT NULL, "
+        "ultima_visita TEXT NOT NULL, visitas INTEGER NOT NULL, paginas INTEGER, "
+        "nuevas_por_dia REAL, nuevas_por_pagina REAL, PRIMARY KEY (zona, ciudad)) "
+        "WITHOUT ROWID"
+    )
+    conn.execute(
+        "INSERT INTO churn_ciudades VALUES "
+        "('GBA Norte', 'pilar', '2026-01-01 10:00:00', 2, 10, 5.0, 1.0)"
+    )
+    migrar_churn(conn)
+
+    tasa = PlanificadorChurn(conn).tasas[CIUDAD]
+    assert tasa.inicio_ventana is None
+    assert tasa.nuevas_ventana == 0
@@ -0,0 +1,62 @@
+"""
+procesar_caracteristicas_lote: mismo resultado que procesar_caracteristicas
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+
+from paginas_sinteticas import generar_listas_caracteristicas
+from processing import procesar_caracteristicas, procesar_caracteristicas_lote
+
+
+def por_tarjeta(lote, i):
+    return {
+        campo: None if pd.isna(lote[campo][i]) else lote[campo][i]
+        for campo in ("amb", "banos", "m2")
+    }
+
+
+@pytest.mark.parametrize(
+    "lista, esperado",
+    [
+        (["3 dormitorios", "2 baños", "120 m² cubiertos"], (3, 2, 120)),
+        (["1.200 m² totales", "4 ambientes"], (4, None, 1200)),
+        (["85,5 m² cubiertos", "300 m² totales"], (None, None, 85.5)),
+        (["Apto crédito", "a estrenar"], (None, None, None)),
+        ([], (None, None, None)),
+        (None, (None, None, None)),
+    ],
+)
+def test_casos_conocidos(lista, esperado):
+    lote = procesar_caracteristicas_lote([lista])
+    fila = por_tarjeta(lote, 0)
+    assert (fila["amb"], fila["banos"], fila["m2"]) == esperado
+    assert procesar_caracteristicas(lista) == fila
+
+
+def test_lote_igual_al_procesamiento_por_tarjeta():
+    listas = generar_listas_caracteristicas(5000)
+    lote = procesar_caracteristicas_lote(listas)
+
+    assert all(len(columna) == len(listas) for columna in lote.values())
+    diferentes = [
+        i
+        for i, lista in enumerate(listas)
+        if procesar_caracteristicas(lista) != por_tarjeta(lote, i)
+    ]
+    assert diferentes == []
+
+
+def test_lote_vacio():
+    lote = procesar_caracteristicas_lote([])
+    assert all(len(columna) == 0 for columna in lote.values())
@@ -0,0 +1,62 @@
+"""
+RespaldoCSV: anexar al retomar, con y sin gzip
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import zlib
+
+import pandas as pd
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from respaldo_csv import RespaldoCSV
+
+
+def pagina(desde, cantidad=3):
+    return [
+        {"zona": "z", "ciudad": "c", "precio": "100", "url": f"u{i}"}
+        for i in range(desde, desde + cantidad)
+    ]
+
+
+def test_anexar_sin_gzip_sigue_el_mismo_archivo(tmp_path):
+    ruta = str(tmp_path / "data.csv")
+    with RespaldoCSV(ruta, comprimir=False, rotar_mb=None) as respaldo:
+        respaldo.escribir(pagina(0))
+    with RespaldoCSV(ruta, comprimir=False, rotar_mb=None, anexar=True) as respaldo:
+        respaldo.escribir(pagina(3))
+
+    assert list(pd.read_csv(ruta)["url"]) == [f"u{i}" for i in range(6)]
+
+
+def test_anexar_con_gzip_no_sigue_detras_de_un_miembro_cortado(tmp_path):
+    ruta = str(tmp_path / "data.csv")
+    respaldo = RespaldoCSV(ruta, comprimir=True, rotar_mb=None)
+    respaldo.escribir(pagina(0))
+    # El proceso muere después del flush, sin cerrar el miembro gzip
+    cortado = str(tmp_path / "cortado.gz")
+    shutil.copy(ruta + ".gz", cortado)
+    respaldo.cerrar()
+    shutil.copy(cortado, ruta + ".gz")
+
+    with pytest.raises(EOFError):
+        with gzip.open(ruta + ".gz") as f:
+            f.read()
+    # Lo escrito hasta el flush igual se recupera
+    with open(ruta + ".gz", "rb") as f:
+        recuperado = zlib.decompressobj(wbits=31).decompress(f.read())
+    assert recuperado.count(b"\n") == 4  # Encabezado y 3 filas
+
+    with RespaldoCSV(ruta, comprimir=True, rotar_mb=None, anexar=True) as respaldo:
+        respaldo.escribir(pagina(3))
+
+    assert respaldo.archivos == [str(tmp_path / "data-2.csv.gz")]
+    assert list(pd.read_csv(respaldo.archivos[0])["url"]) == ["u3", "u4", "u5"]
@@ -0,0 +1,77 @@
+"""
+get_summary: resúmenes por triggers y lectura de bases sin migrar
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import data.db_utils as db_utils
+from scraper.esquema_db import migrar_resumenes
+
+FILAS = [
+    ("GBA Norte", "pilar", 100_000, 50),
+    ("GBA Norte", "pilar", 150_000, 75),
+    ("GBA Norte", "escobar", 90_000, None),
+    ("GBA Sur", "quilmes", 120_000, 60),
+]
+
+
+@pytest.fixture
+def db_sin_resumenes(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "propiedades.db")
+    conn = sqlite3.connect(ruta)
+    conn.execute(
+        "CREATE TABLE propiedades (id INTEGER PRIMARY KEY, zona TEXT, ciudad TEXT, "
+        "precio INTEGER, area INTEGER, precio_por_m2 REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO propiedades (zona, ciudad, precio, area, precio_por_m2) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(z, c, p, a, p / a if a else None) for z, c, p, a in FILAS],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db_utils, "DB_PATH", ruta)
+    return ruta
+
+
+def test_no_migra_una_base_sin_resumenes(db_sin_resumenes):
+    df = db_utils.get_summary("ciudad")
+
+    conn = sqlite3.connect(db_sin_resumenes)
+    tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    assert "resumen_ciudades" not in tablas
+    pilar = df.set_index("ciudad").loc["pilar"]
+    assert pilar["cantidad"] == 2
+    assert pilar["promedio_precio"] == 125_000
+
+
+@pytest.mark.parametrize("nivel", ["global", "zona", "ciudad"])
+def test_mismo_resultado_con_y_sin_resumenes(db_sin_resumenes, nivel):
+    directo = db_utils.get_summary(nivel)
+
+    conn = sqlite3.connect(db_sin_resumenes)
+    migrar_resumenes(conn)
+    conn.execute("DELETE FROM propiedades WHERE ciudad = 'quilmes'")
+    conn.execute(
+        "INSERT INTO propiedades (zona, ciudad, precio, area, precio_por_m2) "
+        "VALUES ('GBA Sur', 'quilmes', 120000, 60, 2000)"
+    )
+    conn.commit()
+    conn.close()
+    con_triggers = db_utils.get_summary(nivel)
+
+    pd.testing.assert_frame_equal(
+        directo, con_triggers, check_dtype=False, check_like=True
+    )
@@ -0,0 +1,159 @@
+"""
+ControladorAIMD y Disyuntor: cuánto y cuándo se le pide a cada host
+
+Uso (desde la raíz del repo):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "scraper"))
+
+from config import LATENCIA_MAXIMA
+import throttle
+from throttle import ControladorAIMD, Disyuntor
+
+
+def controlador():
+    tasas = []
+    aimd = ControladorAIMD(
+        "test",
+        1.0,
+        al_cambiar_tasa=tasas.append,
+        tasa_minima=0.1,
+        tasa_maxima=2.0,
+        incremento=0.25,
+        factor_recorte=0.5,
+    )
+    return aimd, tasas
+
+
+def test_respuestas_sanas_suben_la_tasa_hasta_el_maximo():
+    aimd, tasas = controlador()
+    for _ in range(6):
+        aimd.registrar_respuesta(200, 0.2)
+    assert tasas == [1.25, 1.5, 1.75, 2.0, 2.0, 2.0]
+    assert aimd.intervalo() == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_sobrecarga_recorta_a_la_mitad_hasta_el_minimo(status):
+    aimd, tasas = controlador()
+    for _ in range(5):
+        aimd.registrar_respuesta(status, 0.2)
+    assert tasas == [0.5, 0.25, 0.125, 0.1, 0.1]
+    assert aimd.total_recortes == 5
+
+
+def test_timeout_recorta_y_un_404_no_cambia_nada():
+    aimd, tasas = controlador()
+    aimd.registrar_respuesta(404, 0.2)
+    aimd.registrar_fallo("timeout")
+    assert tasas == [0.5]
+
+
+def test_retry_after_pausa_el_host():
+    aimd, _ = controlador()
+    aimd.registrar_respuesta(429, 0.2, retry_after=30)
+    assert aimd.pausa_hasta == pytest.approx(time.monotonic() + 30, abs=1)
+
+
+def test_pico_de_latencia_recorta():
+    aimd, tasas = controlador()
+    for _ in range(3):
+        aimd.registrar_respuesta(200, 0.5)
+    # Lenta respecto de la media pero por debajo del mínimo: no es pico
+    aimd.registrar_respuesta(200, 0.9)
+    assert tasas[-1] == 2.0
+    # Más de FACTOR_PICO_LATENCIA veces la media
+    aimd.registrar_respuesta(200, 2.5)
+    assert tasas[-1] == 1.0
+    aimd.registrar_respuesta(200, LATENCIA_MAXIMA + 1)
+    assert tasas[-1] == 0.5
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class SinJitter:
+    def random(self):
+        return 0.0
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(throttle.time, "monotonic", reloj)
+    return reloj
+
+
+def disyuntor():
+    return Disyuntor(
+        "test", umbral=3, enfriamiento=10, enfriamiento_maximo=25, rng=SinJitter()
+    )
+
+
+def test_disyuntor_se_abre_tras_umbral_fallos_seguidos(reloj):
+    d = disyuntor()
+    d.registrar_fallo()
+    d.registrar_fallo()
+    d.registrar_exito()  # Un éxito reinicia la cuenta
+    d.registrar_fallo()
+    d.registrar_fallo()
+    assert d.estado == Disyuntor.CERRADO and d.permitir()
+
+    d.registrar_fallo()
+    assert d.estado == Disyuntor.ABIERTO
+    assert d.espera() == 10
+    assert not d.permitir()
+    assert d.evitadas == 1
+
+
+def test_disyuntor_deja_pasar_una_sola_prueba_y_se_cierra_si_anda(reloj):
+    d = disyuntor()
+    for _ in range(3):
+        d.registrar_fallo()
+
+    reloj.ahora += 10
+    assert d.permitir()
+    assert d.estado == Disyuntor.SEMIABIERTO
+    assert not d.permitir()  # La prueba está en vuelo
+    assert d.espera() == Disyuntor.ESPERA_PRUEBA
+
+    d.registrar_exito()
+    assert d.estado == Disyuntor.CERRADO
+    assert d.aperturas_seguidas == 0
+    assert d.permitir() and d.permitir()
+
+
+def test_disyuntor_duplica_el_enfriamiento_si_la_prueba_falla(reloj):
+    d = disyuntor()
+    for _ in range(3):
+        d.registrar_fallo()
+
+    for enfriamiento in (20, 25):  # El segundo llega al tope
+        reloj.ahora += 10
+        assert d.permitir()
+        d.registrar_fallo()  # Falla la prueba: basta uno para reabrirlo
+        assert d.estado == Disyuntor.ABIERTO
+        assert d.espera() == enfriamiento
+        reloj.ahora += enfriamiento - 10
+    assert d.total_aperturas == 3
+
+
+def test_exito_tardio_no_cierra_un_disyuntor_abierto(reloj):
+    d = disyuntor()
+    for _ in range(3):
+        d.registrar_fallo()
+    d.registrar_exito()  # Respuesta de una request de antes de abrirse
+    assert d.estado == Disyuntor.ABIERTO